@@ -0,0 +1,836 @@
+"""Benchmarks for the WASP interpreter.
+
+    python bench.py            # every suite
+    python bench.py parse ...  # selected suites
+
+Each suite prints one line per measurement (best of a few runs).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import sys
+import time
+
+import swaspi
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def parse_source(text, proven=True):
+    tokens, error = swaspi.Lexer(text).make_tokens()
+    if error:
+        raise Exception(error.as_string())
+    tree_list = swaspi.Parser(tokens).statement_list()
+    if proven:
+        swaspi.prove_bounds(tree_list)
+    return tree_list
+
+
+def run_source(text, optimize=False, table_class=None, proven=True):
+    # Fresh parse and interpreter state, output discarded
+    tree_list = parse_source(text, proven)
+    if optimize:
+        tree_list, _ = swaspi.optimize(tree_list)
+    swaspi.symbol_table = (table_class or swaspi.SymbolTable)()
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        swaspi.run_program(tree_list)
+    return out.getvalue()
+
+
+def report(name, seconds, extra=''):
+    print(f'{name:<40} {seconds * 1000:10.2f} ms {extra}')
+
+
+SUITES = {}
+
+def suite(fn):
+    SUITES[fn.__name__[len('bench_'):]] = fn
+    return fn
+
+# Documented parse time budgets (seconds) for machine-generated expressions.
+PARSE_BUDGET_LONG = 1.0    # 100k-term flat expression
+PARSE_BUDGET_DEEP = 0.25   # 10k-deep parenthesized expression
+
+@suite
+def bench_parse(args):
+    long_src = 'int x = ' + '+'.join(str(i % 7) for i in range(100000)) + ';'
+    deep_src = 'int y = ' + '(' * 10000 + '1' + ')' * 10000 + ';'
+    for name, text, budget in (
+        ('parse 100k-term expression', long_src, PARSE_BUDGET_LONG),
+        ('parse 10k-deep parentheses', deep_src, PARSE_BUDGET_DEEP),
+    ):
+        seconds = best_of(lambda: parse_source(text))
+        verdict = 'ok' if seconds <= budget else f'OVER BUDGET ({budget:.2f} s)'
+        report(name, seconds, verdict)
+
+
+# Loop-heavy programs shared by the execution suites
+LOOP_PROGRAMS = {
+    'counter': '''
+        int i = 0;
+        int s = 0;
+        while (i < 200000) {
+            s = s + i * 2 % 7;
+            i = i + 1;
+        };
+        give(s);
+    ''',
+    'tape': '''
+        int memory[30000];
+        int pointer = 0;
+        int steps = 0;
+        while (steps < 100000) {
+            memory[pointer] = (memory[pointer] + 1) % 256;
+            pointer = (pointer + 7) % 30000;
+            steps = steps + 1;
+        };
+        give(memory[7]);
+    ''',
+    'nested': '''
+        int total = 0;
+        int i = 0;
+        int j = 0;
+        while (i < 300) {
+            j = 0;
+            while (j < 300) {
+                total = total + i * j;
+                j = j + 1;
+            };
+            i = i + 1;
+        };
+        give(total);
+    ''',
+    'invariant': '''
+        int n = 1000;
+        int k = 3;
+        int a[1000];
+        int i = 0;
+        int s = 0;
+        a[3] = 5;
+        while (i < n * 200) {
+            s = s + a[k] * (n + k) + i * 4;
+            if (a[i % 1000] > 2) { s = s + a[i % 1000] * 2; };
+            i = i + 1;
+        };
+        give(s);
+    ''',
+    'dead': '''
+        int log[50000];
+        int checksum = 0;
+        int last = 0;
+        int i = 0;
+        int s = 0;
+        while (i < 100000) {
+            last = i * 7 % 13;
+            checksum = (checksum + last) % 65521;
+            log[i % 50000] = last;
+            last = i % 5;
+            s = s + last;
+            i = i + 1;
+        };
+        give(s);
+    ''',
+}
+
+
+@suite
+def bench_tier(args):
+    saved = swaspi.tier_threshold
+    try:
+        for name, text in LOOP_PROGRAMS.items():
+            swaspi.tier_threshold = 0
+            cold = best_of(lambda: run_source(text))
+            swaspi.tier_threshold = saved
+            hot = best_of(lambda: run_source(text))
+            report(f'tier {name} tree-walker', cold)
+            report(f'tier {name} tiered', hot, f'x{cold / hot:.2f}')
+    finally:
+        swaspi.tier_threshold = saved
+
+
+@suite
+def bench_optimize(args):
+    saved = swaspi.tier_threshold
+    try:
+        for threshold, tier in ((0, 'tree-walker'), (saved, 'tiered')):
+            swaspi.tier_threshold = threshold
+            for name, text in LOOP_PROGRAMS.items():
+                assert run_source(text) == run_source(text, optimize=True)
+                before = best_of(lambda: run_source(text))
+                after = best_of(lambda: run_source(text, optimize=True))
+                report(f'optimize {name} {tier}', before)
+                report(f'optimize {name} {tier} -O', after, f'x{before / after:.2f}')
+    finally:
+        swaspi.tier_threshold = saved
+
+
+class UncachedTable(swaspi.SymbolTable):
+    # A version that changes on every read makes each inline cache check
+    # fail, so every variable access takes the full lookup path.
+    @property
+    def version(self):
+        self._version += 1
+        return self._version
+
+    @version.setter
+    def version(self, value):
+        self._version = value
+
+
+VARIABLE_PROGRAMS = {
+    'locals': '''
+        int a = 1;
+        int b = 2;
+        int c = 3;
+        int d = 4;
+        int i = 0;
+        while (i < 100000) {
+            a = (b + c) % 1000;
+            b = (c + d) % 1000;
+            c = (d + a) % 1000;
+            d = a - b + c - d % 10;
+            i = i + 1;
+        };
+        give(a + b + c + d);
+    ''',
+    'mixed': '''
+        dec x = 0;
+        dec y = 1;
+        word w = "";
+        int i = 0;
+        while (i < 100000) {
+            x = x + y * 2;
+            y = y + 1;
+            if (i % 10000 == 0) { w = w + "."; };
+            i = i + 1;
+        };
+        give(x);
+        give(w);
+    ''',
+}
+
+
+@suite
+def bench_variables(args):
+    saved = swaspi.tier_threshold
+    try:
+        for threshold, tier in ((0, 'tree-walker'), (saved, 'tiered')):
+            swaspi.tier_threshold = threshold
+            for name, text in VARIABLE_PROGRAMS.items():
+                assert run_source(text) == run_source(text, table_class=UncachedTable)
+                uncached = best_of(lambda: run_source(text, table_class=UncachedTable))
+                cached = best_of(lambda: run_source(text))
+                report(f'variables {name} {tier} uncached', uncached)
+                report(f'variables {name} {tier} cached', cached, f'x{uncached / cached:.2f}')
+    finally:
+        swaspi.tier_threshold = saved
+
+
+SPARSE_PROGRAM = '''
+    int memory[%d];
+    int i = 0;
+    while (i < 1000) {
+        memory[i * 9973 %% %d] = i;
+        i = i + 1;
+    };
+    give(memory[9973]);
+'''
+
+
+@suite
+def bench_sparse(args):
+    saved = swaspi.sparse_threshold
+    try:
+        for size in (10 ** 7, 10 ** 8):
+            text = SPARSE_PROGRAM % (size, size)
+            if size <= 10 ** 7:
+                swaspi.sparse_threshold = size
+                eager = best_of(lambda: run_source(text), repeat=1)
+                report(f'sparse {size} cells eager', eager)
+            swaspi.sparse_threshold = 0
+            paged = best_of(lambda: run_source(text))
+            report(f'sparse {size} cells paged', paged,
+                   f'x{eager / paged:.2f}' if size <= 10 ** 7 else '')
+        # per-access cost on a dense tape
+        text = LOOP_PROGRAMS['tape']
+        swaspi.sparse_threshold = saved
+        dense = best_of(lambda: run_source(text))
+        swaspi.sparse_threshold = 0
+        paged = best_of(lambda: run_source(text))
+        report('sparse tape list', dense)
+        report('sparse tape paged', paged, f'x{dense / paged:.2f}')
+    finally:
+        swaspi.sparse_threshold = saved
+
+
+def run_source_async(text, yield_every=None):
+    tree_list = parse_source(text)
+    return asyncio.run(swaspi.run_async(tree_list, yield_every=yield_every))
+
+
+async def run_many(texts):
+    trees = [parse_source(text) for text in texts]
+    return await asyncio.gather(*(swaspi.run_async(tree) for tree in trees))
+
+
+# Documented bound: one script on run_async stays within this factor of the
+# synchronous engine.
+ASYNC_BUDGET = 1.10
+
+@suite
+def bench_async(args):
+    saved = swaspi.tier_threshold
+    try:
+        for threshold, tier in ((0, 'tree-walker'), (saved, 'tiered')):
+            swaspi.tier_threshold = threshold
+            for name, text in LOOP_PROGRAMS.items():
+                assert run_source(text) == run_source_async(text)
+                sync = best_of(lambda: run_source(text))
+                coroutine = best_of(lambda: run_source_async(text))
+                report(f'async {name} {tier} sync', sync)
+                report(f'async {name} {tier} run_async', coroutine,
+                       f'x{coroutine / sync:.2f} (budget x{ASYNC_BUDGET:.2f})')
+        swaspi.tier_threshold = saved
+        text = LOOP_PROGRAMS['tape']
+        for count in (10, 100):
+            texts = [text] * count
+            outputs = asyncio.run(run_many(texts))
+            assert outputs == [run_source(text)] * count
+            elapsed = best_of(lambda: asyncio.run(run_many(texts)), repeat=1)
+            report(f'async {count} concurrent tapes', elapsed, f'{elapsed / count * 1000:.2f} ms/script')
+    finally:
+        swaspi.tier_threshold = saved
+
+
+# Documented bound: --sample-profile at the default interval costs less than
+# this factor.
+PROFILE_BUDGET = 1.05
+
+PROFILE_PROGRAM = '''
+    int n = 0;
+    int s = 0;
+    while (n < 100000) {
+        if (n % 3 == 0) {
+            s = s + n * 2;
+        };
+        for (int j = 0; j < 2; j = j + 1) {
+            s = s + j;
+        };
+        n = n + 1;
+    };
+    give(s);
+'''
+
+def run_profiled(run, text):
+    profiler = swaspi.SampleProfiler()
+    profiler.start()
+    try:
+        output = run(text)
+    finally:
+        profiler.stop()
+    return output, profiler
+
+@suite
+def bench_profile(args):
+    saved = swaspi.tier_threshold
+    programs = dict(LOOP_PROGRAMS, nested=PROFILE_PROGRAM)
+    try:
+        for threshold, tier in ((0, 'tree-walker'), (saved, 'tiered')):
+            swaspi.tier_threshold = threshold
+            for name, text in programs.items():
+                assert run_profiled(run_source, text)[0] == run_source(text)
+                plain = best_of(lambda: run_source(text))
+                profiled = best_of(lambda: run_profiled(run_source, text))
+                samples = run_profiled(run_source, text)[1].samples
+                report(f'profile {name} {tier}', plain)
+                report(f'profile {name} {tier} sampled', profiled,
+                       f'x{profiled / plain:.3f} (budget x{PROFILE_BUDGET:.2f}), {samples} samples')
+        # the async engine is sampled through the same node locals
+        swaspi.tier_threshold = saved
+        stacks = [set(run_profiled(run, PROFILE_PROGRAM)[1].counts) for run in (run_source, run_source_async)]
+        report('profile nested run_async sampled', best_of(lambda: run_profiled(run_source_async, PROFILE_PROGRAM)),
+               f'{len(stacks[1])} distinct stacks, {len(stacks[0])} on the sync engine')
+    finally:
+        swaspi.tier_threshold = saved
+
+
+def run_source_checkpointed(text, path, every):
+    tree_list = parse_source(text)
+    swaspi.symbol_table = swaspi.SymbolTable()
+    checkpointer = swaspi.Checkpointer(path, every, 'bench')
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        swaspi.run_checkpointed(tree_list, checkpointer)
+    return out.getvalue(), checkpointer
+
+
+@suite
+def bench_checkpoint(args):
+    text = LOOP_PROGRAMS['tape']
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tape.ckpt')
+        plain = best_of(lambda: run_source(text))
+        report('checkpoint tape plain run', plain)
+        for every in (None, 0.05):
+            out, checkpointer = run_source_checkpointed(text, path, every)
+            assert out == run_source(text)
+            elapsed = best_of(lambda: run_source_checkpointed(text, path, every))
+            label = 'tracking only' if every == None else f'every {every * 1000:.0f} ms'
+            report(f'checkpoint tape {label}', elapsed,
+                   f'x{elapsed / plain:.2f} ({checkpointer.saved} snapshots)')
+        # one snapshot of the finished 30000-cell tape
+        run_source(text)
+        checkpointer = swaspi.Checkpointer(path, None, 'bench')
+        with contextlib.redirect_stdout(io.StringIO()):
+            write = best_of(lambda: checkpointer.save([['top', 0]]), repeat=10)
+        report('checkpoint snapshot write 30000 cells', write, f'{os.path.getsize(path)} bytes')
+        start = time.perf_counter()
+        swaspi.load_checkpoint(path)
+        report('checkpoint snapshot load 30000 cells', time.perf_counter() - start)
+
+
+SERVE_PROGRAM = '''
+    int n = take(int);
+    int total = 0;
+    int i = 0;
+    while (i < n) {
+        total = total + i % 7;
+        i = i + 1;
+    };
+    give(total);
+'''
+
+
+def serve_client(path):
+    sock = socket.socket(socket.AF_UNIX)
+    for _ in range(100):
+        try:
+            sock.connect(path)
+            break
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.05)
+    stream = sock.makefile('rwb')
+
+    def request(**fields):
+        stream.write(json.dumps(fields).encode() + b'\n')
+        stream.flush()
+        return json.loads(stream.readline())
+    return sock, request
+
+
+@suite
+def bench_serve(args):
+    swaspi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'swaspi.py')
+    with tempfile.TemporaryDirectory() as tmp:
+        program = os.path.join(tmp, 'program.wasp')
+        with open(program, 'w') as f:
+            f.write(SERVE_PROGRAM)
+        runs = 20
+        start = time.perf_counter()
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, swaspi_path, program], input=b'500',
+                                 capture_output=True, check=True).stdout
+        spawn = (time.perf_counter() - start) / runs
+        report('serve process per run', spawn, f'{1 / spawn:8.1f} req/s')
+
+        path = os.path.join(tmp, 'serve.sock')
+        server = subprocess.Popen([sys.executable, swaspi_path, 'serve', '--socket', path],
+                                  stderr=subprocess.DEVNULL)
+        try:
+            sock, request = serve_client(path)
+            first = request(source=SERVE_PROGRAM, input='500')
+            assert first['ok'] and first['output'].encode() == out, first
+            runs = 500
+            start = time.perf_counter()
+            for _ in range(runs):
+                request(program=first['program'], input='500')
+            served = (time.perf_counter() - start) / runs
+            report('serve warm pool', served, f'{1 / served:8.1f} req/s x{spawn / served:.1f}')
+            sock.close()
+        finally:
+            server.terminate()
+            server.wait()
+
+
+# random values from a linear congruential generator
+SORT_FILL = '''
+    int n = %d;
+    int a[%d];
+    int seed = 12345;
+    int i = 0;
+    while (i < n) {
+        seed = (seed * 1103515245 + 12345) %% 2147483648;
+        a[i] = seed %% 1000000;
+        i = i + 1;
+    };
+'''
+
+SORT_BUILTIN = '''
+    sort(a);
+    give(a[0]);
+    give(a[n - 1]);
+'''
+
+# the same sort written in WASP: bottom-up merge sort
+SORT_LOOP = '''
+    int tmp[n];
+    int width = 1;
+    int lo = 0;
+    int mid = 0;
+    int hi = 0;
+    int l = 0;
+    int r = 0;
+    int k = 0;
+    int pick = 0;
+    while (width < n) {
+        lo = 0;
+        while (lo < n) {
+            mid = lo + width;
+            if (mid > n) { mid = n; };
+            hi = mid + width;
+            if (hi > n) { hi = n; };
+            l = lo;
+            r = mid;
+            k = lo;
+            while (k < hi) {
+                pick = 0;
+                if (l < mid) {
+                    pick = 1;
+                    if (r < hi) {
+                        if (a[r] < a[l]) { pick = 0; };
+                    };
+                };
+                if (pick == 1) {
+                    tmp[k] = a[l];
+                    l = l + 1;
+                }
+                else {
+                    tmp[k] = a[r];
+                    r = r + 1;
+                };
+                k = k + 1;
+            };
+            lo = hi;
+        };
+        k = 0;
+        while (k < n) {
+            a[k] = tmp[k];
+            k = k + 1;
+        };
+        width = width * 2;
+    };
+    give(a[0]);
+    give(a[n - 1]);
+'''
+
+SORT_SIZE = 10 ** 6
+SORT_LOOP_SIZE = 10 ** 5  # the WASP loop is extrapolated from this size without --full
+
+@suite
+def bench_sort(args):
+    size = SORT_SIZE
+    fill = best_of(lambda: run_source(SORT_FILL % (size, size)), repeat=1)
+    builtin = best_of(lambda: run_source(SORT_FILL % (size, size) + SORT_BUILTIN), repeat=1) - fill
+    report(f'sort {size} builtin', builtin)
+    loop_size = size if args.full else SORT_LOOP_SIZE
+    text = SORT_FILL % (loop_size, loop_size)
+    assert run_source(text + SORT_LOOP) == run_source(text + SORT_BUILTIN)
+    loop = best_of(lambda: run_source(text + SORT_LOOP), repeat=1) - best_of(lambda: run_source(text), repeat=1)
+    if loop_size != size:
+        # merge sort grows as n log n
+        loop *= size * math.log(size) / (loop_size * math.log(loop_size))
+    report(f'sort {size} WASP merge sort' + ('' if args.full else ' (est.)'), loop, f'x{loop / builtin:.0f}')
+
+
+# ~100k characters of text, built by doubling
+WORDS_TEXT = '''
+    word t = "the cat sat on the mat. ";
+    int i = 0;
+    while (i < 12) {
+        t = t + t;
+        i = i + 1;
+    };
+    int n = len(t);
+    int half = n / 2;
+    int hits = 0;
+'''
+
+WORDS_BUILTIN = '''
+    hits = count(t, "at");
+    give(hits);
+    give(find(t, "mat", half));
+'''
+
+# the same scans one character at a time
+WORDS_LOOP = '''
+    i = 0;
+    while (i < n - 1) {
+        if (t[i] == "a") {
+            if (t[i + 1] == "t") { hits = hits + 1; };
+        };
+        i = i + 1;
+    };
+    give(hits);
+    int at = -1;
+    i = half;
+    while (i < n - 2) {
+        if (t[i] == "m") {
+            if (t[i + 1] == "a") {
+                if (t[i + 2] == "t") {
+                    at = i;
+                    i = n;
+                };
+            };
+        };
+        i = i + 1;
+    };
+    give(at);
+'''
+
+@suite
+def bench_words(args):
+    setup = best_of(lambda: run_source(WORDS_TEXT))
+    assert run_source(WORDS_TEXT + WORDS_LOOP) == run_source(WORDS_TEXT + WORDS_BUILTIN)
+    builtin = best_of(lambda: run_source(WORDS_TEXT + WORDS_BUILTIN)) - setup
+    loop = best_of(lambda: run_source(WORDS_TEXT + WORDS_LOOP), repeat=1) - setup
+    report('count + find builtins', builtin)
+    report('count + find WASP loop', loop, f'x{loop / max(builtin, 1e-9):.0f}')
+
+
+# a tape machine's hot cell update, on int cells kept in range with % and
+# on byte cells that wrap by themselves
+TAPE_PROGRAM = '''
+    %s tape[30000];
+    int p = 0;
+    int i = 0;
+    while (i < 300000) {
+        tape[p] = %s;
+        tape[p] = %s;
+        p = (p + 7) %% 30000;
+        i = i + 1;
+    };
+    give(tape[0]);
+'''
+
+TAPE_VARIANTS = {
+    'int cells, % 256': ('int', '(tape[p] + 1) % 256'),
+    'byte cells': ('byte', 'tape[p] + 1'),
+}
+
+@suite
+def bench_bytes(args):
+    outputs = set()
+    for name, (cell, update) in TAPE_VARIANTS.items():
+        text = TAPE_PROGRAM % (cell, update, update)
+        outputs.add(run_source(text))
+        seconds = best_of(lambda: run_source(text))
+        size = swaspi.value_size(swaspi.symbol_table.get('tape'))
+        report(f'tape {name}', seconds, f'tape {swaspi.format_size(size)}')
+    assert len(outputs) == 1
+
+
+MODULE_COUNT = 50
+MODULE_CONSTANTS = 60
+
+
+def module_source(k):
+    # a helper file: constants and a lookup table built by a loop
+    lines = [f'int m{k}_base = {k};', f'word m{k}_name = "module{k}";']
+    lines += [f'int m{k}_c{j} = ({j} * 7 + m{k}_base) % 13 + {j};' for j in range(MODULE_CONSTANTS)]
+    lines += [f'int m{k}_table[16];',
+              f'int m{k}_i = 0;',
+              f'while (m{k}_i < 16) {{',
+              f'    m{k}_table[m{k}_i] = (m{k}_i * m{k}_base + m{k}_c3) % 17;',
+              f'    m{k}_i = m{k}_i + 1;',
+              '};']
+    return '\n'.join(lines) + '\n'
+
+
+@suite
+def bench_modules(args):
+    swaspi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'swaspi.py')
+    with tempfile.TemporaryDirectory() as tmp:
+        os.mkdir(os.path.join(tmp, 'lib'))
+        for k in range(MODULE_COUNT):
+            with open(os.path.join(tmp, 'lib', f'm{k}.wasp'), 'w') as f:
+                f.write(module_source(k))
+        main = os.path.join(tmp, 'main.wasp')
+        with open(main, 'w') as f:
+            f.write(''.join(f'use "lib/m{k}.wasp";\n' for k in range(MODULE_COUNT)))
+            f.write('int total = 0;\n')
+            f.write(''.join(f'total = total + m{k}_table[3];\n' for k in range(MODULE_COUNT)))
+            f.write('give(total);\n')
+        empty = os.path.join(tmp, 'empty.wasp')
+        with open(empty, 'w') as f:
+            f.write('give(0);\n')
+        cache = os.path.join(tmp, 'lib', swaspi.MODULE_CACHE_DIR)
+
+        def run(path):
+            return subprocess.run([sys.executable, swaspi_path, path], capture_output=True, check=True).stdout
+
+        def cold():
+            shutil.rmtree(cache, ignore_errors=True)
+            return run(main)
+
+        expected = cold()
+        assert run(main) == expected
+        base = best_of(lambda: run(empty))
+        report('modules: process start, no modules', base)
+        report(f'modules: {MODULE_COUNT} modules, cold', best_of(cold), '(parsed, cache written)')
+        report(f'modules: {MODULE_COUNT} modules, warm', best_of(lambda: run(main)), f'(from {swaspi.MODULE_CACHE_DIR})')
+
+        # in one process: every later parse finds the modules in memory
+        with open(main) as f:
+            text = f.read()
+        source = swaspi.SourceMap(text, main)
+        swaspi.parse_program(text, source)
+        report(f'modules: {MODULE_COUNT} modules, in memory', best_of(lambda: swaspi.parse_program(text, source)))
+
+
+# a data-parallel transform: every element of b from the same element of a
+# and a small lookup table
+PARALLEL_SIZE = 300000
+PARALLEL_PROGRAM = '''
+    int n = %d;
+    int a[%d];
+    int b[%d];
+    int table[16] = {3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9, 3};
+    fill(a, 7);
+    parallel for (int i = 0; i < n; i = i + 1) {
+        b[i] = ((a[i] * 31 + i * 17) %% 1009 + table[i %% 16] * (i %% 7)) * (i %% 13 + 1) %% 65536;
+    };
+    give(b[n - 1] + b[n / 2]);
+''' % (PARALLEL_SIZE, PARALLEL_SIZE, PARALLEL_SIZE)
+
+@suite
+def bench_parallel(args):
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2} | {2 ** k for k in range(cpus.bit_length()) if 2 ** k <= cpus} | {cpus})
+    saved = swaspi.parallel_workers
+    outputs = set()
+    try:
+        base = None
+        for workers in counts:
+            swaspi.parallel_workers = workers
+            outputs.add(run_source(PARALLEL_PROGRAM))  # also starts the pool
+            seconds = best_of(lambda: run_source(PARALLEL_PROGRAM))
+            base = base or seconds
+            label = 'serial loop' if workers == 1 else f'{workers} workers'
+            report(f'parallel: {PARALLEL_SIZE} elements, {label}', seconds,
+                   f'x{base / seconds:.2f} ({cpus} CPU(s))')
+    finally:
+        swaspi.parallel_workers = saved
+        swaspi.stop_parallel()
+    assert len(outputs) == 1
+
+
+# element reads and stores in counted loops, all of them provably in range
+BOUNDS_PROGRAM = '''
+    int a[1000];
+    int b[1000];
+    for (int i = 0; i < len(a); i = i + 1) { a[i] = i * 7 % 101; };
+    for (int r = 0; r < 60; r = r + 1) {
+        for (int i = 0; i < len(b); i = i + 1) { b[i] = b[i] + a[i] * 3 - a[(i + r) % 1000]; };
+    };
+    for (int i = len(b) - 1; i >= 1; i = i - 1) { b[i - 1] = b[i - 1] + b[i] % 7; };
+    give(b[0]);
+'''
+
+@suite
+def bench_bounds(args):
+    tree_list = parse_source(BOUNDS_PROGRAM)
+    accesses = [node for root in tree_list for node in swaspi.walk(root)
+                if isinstance(node, (swaspi.arrayvalnode, swaspi.arraysingularassignnode))]
+    proven = sum(node.safe for node in accesses)
+    assert run_source(BOUNDS_PROGRAM) == run_source(BOUNDS_PROGRAM, proven=False)
+    saved = swaspi.tier_threshold
+    try:
+        for threshold, tier in ((0, 'tree-walker'), (saved, 'tiered')):
+            swaspi.tier_threshold = threshold
+            fast = best_of(lambda: run_source(BOUNDS_PROGRAM))
+            checked = best_of(lambda: run_source(BOUNDS_PROGRAM, proven=False))
+            report(f'bounds {tier}, every access checked', checked)
+            report(f'bounds {tier}, checks proven away', fast,
+                   f'x{checked / fast:.2f} ({proven} of {len(accesses)} accesses proven)')
+    finally:
+        swaspi.tier_threshold = saved
+
+
+# a deterministic script reading its input: a checksum over a table built
+# from the numbers read
+RESULTS_PROGRAM = '''
+int n = take(int);
+int seed = take(int);
+int table[5000];
+for (int i = 0; i < len(table); i = i + 1) { table[i] = (i * seed + n) % 9973; };
+int total = 0;
+for (int r = 0; r < n; r = r + 1) {
+    for (int i = 0; i < len(table); i = i + 1) { total = (total + table[i] * r) % 1000003; };
+};
+give(total);
+'''
+RESULTS_INPUT = b'40 17\n'
+
+@suite
+def bench_results(args):
+    swaspi_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'swaspi.py')
+    with tempfile.TemporaryDirectory() as tmp:
+        program = os.path.join(tmp, 'checksum.wasp')
+        with open(program, 'w') as f:
+            f.write(RESULTS_PROGRAM)
+        cache = os.path.join(tmp, 'results')
+
+        def run(*flags):
+            return subprocess.run([sys.executable, swaspi_path, program, *flags], input=RESULTS_INPUT,
+                                  capture_output=True, check=True).stdout
+
+        def miss():
+            shutil.rmtree(cache, ignore_errors=True)
+            return run('--cache-results', cache)
+
+        empty = os.path.join(tmp, 'empty.wasp')
+        with open(empty, 'w') as f:
+            f.write('give(0);\n')
+        expected = run()
+        assert miss() == expected and run('--cache-results', cache) == expected
+        report('results: process start', best_of(lambda: subprocess.run([sys.executable, swaspi_path, empty],
+                                                                         capture_output=True, check=True)))
+        uncached = best_of(run)
+        report('results: no cache', uncached)
+        report('results: miss', best_of(miss), '(runs, output stored)')
+        hit = best_of(lambda: run('--cache-results', cache))
+        report('results: hit', hit, f'x{uncached / hit:.1f} (output replayed)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WASP interpreter benchmarks')
+    parser.add_argument('suites', nargs='*',
+                        help='suites to run (default: all): ' + ', '.join(SUITES))
+    parser.add_argument('--full', action='store_true',
+                        help='sort: time the WASP merge sort on all 1M elements instead of estimating it')
+    args = parser.parse_args()
+    for name in args.suites:
+        if name not in SUITES:
+            parser.error(f'unknown suite {name}')
+    for name in args.suites or SUITES:
+        SUITES[name](args)
+
+
+if __name__ == '__main__':
+    main()
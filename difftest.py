@@ -0,0 +1,716 @@
+"""Differential tests for the WASP interpreter's execution engines.
+
+    python difftest.py                    # fixed corpus: seeds 0..199, every engine
+    python difftest.py --seeds 2000       # a bigger corpus
+    python difftest.py --engine async ... # selected engines
+
+Every seed generates a random well-formed program. It runs on the reference
+tree-walker (no tiering, no optimizer) and on each alternative engine; the
+output and the final variables must match (only the output for engines that
+may drop variables nothing reads). A diverging program is shrunk to
+a minimal reproducer and printed. Exit status is 1 if any engine diverged.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+import swaspi
+
+
+#######################################
+# PROGRAM GENERATOR
+#######################################
+
+# Programs are nested tuples rendered to source text, so the shrinker can
+# edit them structurally:
+#   statements  ('decl', text) ('assign', name, expr) ('store', array, index, expr)
+#               ('give', expr) ('if', [(cond, body), ...], else_body or None)
+#               ('while', counter, count, body) ('for', var, count, body)
+#               ('parallel', var, start, stop, body)
+#               ('call', builtin, arg, ...)
+#   expressions ('num', value) ('str', text) ('var', name) ('bin', op, left, right)
+#               ('neg', expr) ('index', array, expr) ('slice', name, start, stop)
+#               ('len', name) ('char', expr) ('take',) ('call', builtin, arg, ...)
+#   conditions  ('cmp', op, left, right) ('not', cond)
+
+INTS = ['x0', 'x1', 'x2']
+DECS = ['d0']
+BYTES = ['y0']
+WORDS = ['w0', 'w1']
+ARRAYS = {'a0': 8, 'a1': 5, 'b0': 6}
+COUNTERS = ['c0', 'c1', 'c2']
+MAX_WORD = 24
+MODULUS = 1000
+
+class Generator:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.loop_vars = 0
+
+    def program(self):
+        rng = self.rng
+        decls = [('decl', f'int {name} = {rng.randint(-9, 9)};') for name in INTS]
+        decls += [('decl', f'dec {name} = {rng.randint(0, 40) / 4};') for name in DECS]
+        decls += [('decl', f'byte {name} = {rng.randint(-300, 300)};') for name in BYTES]
+        decls += [('decl', f'word {name} = "{self.word()}";') for name in WORDS]
+        decls.append(('decl', 'int a0[8];'))
+        values = ', '.join(str(rng.randint(-5, 5)) for _ in range(ARRAYS['a1']))
+        decls.append(('decl', f'int a1[5] = {{{values}}};'))
+        decls.append(('decl', 'byte b0[6];'))
+        decls += [('decl', f'int {name} = 0;') for name in COUNTERS]
+        data = ' '.join(str(rng.randint(-50, 50)) for _ in range(rng.randint(0, 30)))
+        return decls + self.block(0, INTS + BYTES + COUNTERS, rng.randint(4, 10)), data.encode()
+
+    def word(self):
+        return ''.join(self.rng.choice('abcxyz') for _ in range(self.rng.randint(0, 4)))
+
+    def block(self, depth, ints, size):
+        return [self.statement(depth, ints) for _ in range(size)]
+
+    def statement(self, depth, ints):
+        rng = self.rng
+        roll = rng.random()
+        if depth < 2 and roll < 0.25:
+            return self.loop(depth, ints)
+        if depth < 3 and roll < 0.4:
+            cases = [(self.cond(ints), self.block(depth + 1, ints, rng.randint(1, 3)))
+                     for _ in range(rng.randint(1, 3))]
+            other = self.block(depth + 1, ints, rng.randint(1, 2)) if rng.random() < 0.4 else None
+            return ('if', cases, other)
+        if roll < 0.55:
+            return ('give', self.any_expr(ints))
+        if roll < 0.65:
+            return self.word_assign(ints)
+        if roll < 0.76:
+            array = rng.choice(list(ARRAYS))
+            index = self.index(array, ints, 2)
+            if rng.random() < 0.3:
+                # a cell update, compiled to read and write through one index
+                op = rng.choice('+-')
+                return ('store', array, index, ('bin', op, ('index', array, index), ('num', rng.randint(1, 200))))
+            if rng.random() < 0.1:
+                # a comparison stores a bool, which has to stay one
+                return ('store', array, index, self.cond(ints))
+            return ('store', array, index, self.mod(self.int_expr(ints, 2)))
+        if roll < 0.8:
+            return self.array_call(ints)
+        if roll < 0.88:
+            return ('assign', rng.choice(DECS), self.mod(self.dec_expr(ints, 2)))
+        return ('assign', rng.choice(INTS + BYTES), self.mod(self.num_expr(ints, 2)))
+
+    def loop(self, depth, ints):
+        rng = self.rng
+        count = rng.randint(0, 6)
+        roll = rng.random()
+        if roll < 0.4:
+            counter = COUNTERS[depth]
+            return ('while', counter, count, self.block(depth + 1, ints, rng.randint(1, 3)))
+        var = f'f{self.loop_vars}'
+        self.loop_vars += 1
+        if roll < 0.8:
+            return ('for', var, count, self.block(depth + 1, ints + [var], rng.randint(1, 3)))
+        # stores only at the loop variable, which moves on after each
+        # statement, so the last one stores at most at stop + size - 2
+        array = rng.choice(list(ARRAYS))
+        size = rng.randint(1, 2)
+        start = rng.randint(0, ARRAYS[array] - size + 1)
+        stop = rng.randint(start, ARRAYS[array] - size + 1)
+        body = [('store', array, ('var', var), self.mod(self.parallel_expr(ints, var, array, 2)))
+                for _ in range(size)]
+        return ('parallel', var, start, stop, body)
+
+    def parallel_expr(self, ints, var, array, depth):
+        # an int that reads `array` only at `var`
+        rng = self.rng
+        roll = rng.random()
+        if depth <= 0 or roll < 0.3:
+            return ('num', rng.randint(-20, 20)) if rng.random() < 0.4 else ('var', rng.choice(ints + [var]))
+        if roll < 0.45:
+            return ('index', array, ('var', var))
+        if roll < 0.6:
+            other = rng.choice([name for name in ARRAYS if name != array])
+            index = self.parallel_expr(ints, var, array, depth - 1)
+            return ('index', other, ('bin', '%', index, ('num', ARRAYS[other])))
+        if roll < 0.65:
+            return ('len', rng.choice(WORDS + list(ARRAYS)))
+        if roll < 0.75:
+            return ('bin', '%', self.parallel_expr(ints, var, array, depth - 1), ('num', rng.randint(1, 9)))
+        op = rng.choice('+-*')
+        return ('bin', op, self.parallel_expr(ints, var, array, depth - 1),
+                self.parallel_expr(ints, var, array, depth - 1))
+
+    def array_arg(self):
+        # an array or a slice of one, and its length
+        array = self.rng.choice(list(ARRAYS))
+        if self.rng.random() < 0.7:
+            return ('var', array), ARRAYS[array]
+        start = self.rng.randint(0, ARRAYS[array])
+        stop = self.rng.randint(start, ARRAYS[array])
+        return ('slice', array, start, stop), stop - start
+
+    def array_call(self, ints):
+        rng = self.rng
+        roll = rng.random()
+        if roll < 0.4:
+            return ('call', 'sort', self.array_arg()[0])
+        if roll < 0.7:
+            return ('call', 'fill', self.array_arg()[0], self.mod(self.int_expr(ints, 1)))
+        (dst, dst_len), (src, src_len) = self.array_arg(), self.array_arg()
+        return ('call', 'copy', dst, src, ('num', rng.randint(0, min(dst_len, src_len))))
+
+    def word_assign(self, ints):
+        rng = self.rng
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.4:
+            value = ('bin', '+', ('var', word), ('str', self.word()))
+        elif roll < 0.7:
+            value = ('bin', '+', ('var', word), ('char', ('bin', '+', ('num', 97),
+                                                          ('bin', '%', self.int_expr(ints, 1), ('num', 26)))))
+        else:
+            value = self.word_expr(ints)
+        # keep words short
+        return ('if', [(('cmp', '<', ('len', word), ('num', MAX_WORD)), [('assign', word, value)])], None)
+
+    def index(self, array, ints, depth):
+        # wrapped into range, or a for loop's variable, which prove_bounds()
+        # can show to be in range: below 6, plus at most 2 for the
+        # increments after the statements before it
+        loop_vars = [name for name in ints if name.startswith('f')]
+        if loop_vars and ARRAYS[array] >= 8 and self.rng.random() < 0.3:
+            return ('var', self.rng.choice(loop_vars))
+        return ('bin', '%', self.int_expr(ints, depth), ('num', ARRAYS[array]))
+
+    def mod(self, expr):
+        return ('bin', '%', expr, ('num', MODULUS))
+
+    def int_expr(self, ints, depth):
+        rng = self.rng
+        roll = rng.random()
+        if depth <= 0 or roll < 0.3:
+            return ('num', rng.randint(-20, 20)) if rng.random() < 0.4 else ('var', rng.choice(ints))
+        if roll < 0.45:
+            array = rng.choice(list(ARRAYS))
+            return ('index', array, self.index(array, ints, depth - 1))
+        if roll < 0.47:
+            return ('len', rng.choice(WORDS + list(ARRAYS)))
+        if roll < 0.49:
+            return ('call', rng.choice(['index_of', 'bsearch']), self.array_arg()[0], self.int_expr(ints, depth - 1))
+        if roll < 0.52:
+            return self.word_call(ints, depth)
+        if roll < 0.55:
+            return ('take',)
+        if roll < 0.6:
+            return ('neg', self.int_expr(ints, depth - 1))
+        if roll < 0.7:
+            return ('bin', '%', self.int_expr(ints, depth - 1), ('num', rng.randint(1, 9)))
+        op = rng.choice('+-*')
+        return ('bin', op, self.int_expr(ints, depth - 1), self.int_expr(ints, depth - 1))
+
+    def dec_expr(self, ints, depth):
+        rng = self.rng
+        roll = rng.random()
+        if depth <= 0 or roll < 0.3:
+            return ('var', rng.choice(DECS)) if rng.random() < 0.5 else ('num', rng.randint(0, 40) / 4)
+        if roll < 0.5:
+            return ('bin', '/', self.num_expr(ints, depth - 1), ('num', rng.choice([2, 4, 0.5, 8])))
+        op = rng.choice('+-*')
+        return ('bin', op, self.num_expr(ints, depth - 1), self.num_expr(ints, depth - 1))
+
+    def num_expr(self, ints, depth):
+        if self.rng.random() < 0.6:
+            return self.int_expr(ints, depth)
+        return self.dec_expr(ints, depth)
+
+    def word_call(self, ints, depth):
+        # int valued word builtins, with arguments that cannot fail
+        rng = self.rng
+        word = ('var', rng.choice(WORDS))
+        roll = rng.random()
+        if roll < 0.3:
+            return ('call', 'find', word, ('str', self.word()), ('num', rng.randint(0, 5)))
+        if roll < 0.6:
+            return ('call', 'count', word, ('str', self.word()))
+        if roll < 0.8:
+            return ('call', 'ord', ('call', 'substr', ('bin', '+', word, ('str', 'a')), ('num', 0), ('num', 1)))
+        return ('call', 'int_of', ('call', 'word_of', self.int_expr(ints, depth - 1)))
+
+    def word_expr(self, ints):
+        rng = self.rng
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.1:
+            return ('call', 'replace', ('var', word), ('str', self.word() or 'a'), ('str', self.word()))
+        if roll < 0.2:
+            return ('call', 'substr', ('var', word), ('num', rng.randint(0, 3)), ('num', rng.randint(0, 4)))
+        if roll < 0.25:
+            return ('call', 'word_of', self.int_expr(ints, 1))
+        if roll < 0.4:
+            start = rng.randint(0, 3)
+            return ('slice', word, start, start + rng.randint(0, 4))
+        if roll < 0.7:
+            return ('bin', '+', ('str', self.word()), ('var', rng.choice(WORDS)))
+        return ('str', self.word())
+
+    def any_expr(self, ints):
+        roll = self.rng.random()
+        if roll < 0.2:
+            return ('var', self.rng.choice(WORDS + list(ARRAYS)))
+        if roll < 0.3:
+            return self.word_expr(ints)
+        return self.num_expr(ints, 3)
+
+    def cond(self, ints):
+        rng = self.rng
+        if rng.random() < 0.15:
+            word = rng.choice(WORDS)
+            cond = ('cmp', '==', ('var', word), ('str', self.word()))
+        else:
+            op = rng.choice(['<', '>', '<=', '>=', '==', '!='])
+            cond = ('cmp', op, self.num_expr(ints, 2), self.num_expr(ints, 1))
+        if rng.random() < 0.15:
+            return ('not', cond)
+        return cond
+
+
+def render_expr(expr):
+    kind = expr[0]
+    if kind == 'num':
+        return str(expr[1]) if expr[1] >= 0 else f'({expr[1]})'
+    if kind == 'str':
+        return f'"{expr[1]}"'
+    if kind == 'var':
+        return expr[1]
+    if kind == 'bin':
+        return f'({render_expr(expr[2])} {expr[1]} {render_expr(expr[3])})'
+    if kind == 'neg':
+        return f'(-{render_expr(expr[1])})'
+    if kind == 'index':
+        return f'{expr[1]}[{render_expr(expr[2])}]'
+    if kind == 'slice':
+        return f'{expr[1]}[{expr[2]}:{expr[3]}]'
+    if kind == 'len':
+        return f'len({expr[1]})'
+    if kind == 'char':
+        return f'char({render_expr(expr[1])})'
+    if kind == 'take':
+        return 'take(int)'
+    if kind == 'call':
+        return f'{expr[1]}(' + ', '.join(render_expr(arg) for arg in expr[2:]) + ')'
+    if kind == 'cmp':
+        return f'{render_expr(expr[2])} {expr[1]} {render_expr(expr[3])}'
+    if kind == 'not':
+        return f'not ({render_expr(expr[1])})'
+    raise Exception(f'unknown expression {kind}')
+
+def render_block(statements, indent):
+    return ''.join(render(statement, indent + 1) for statement in statements)
+
+def render(statement, indent=0):
+    pad = '    ' * indent
+    kind = statement[0]
+    if kind == 'decl':
+        return f'{pad}{statement[1]}\n'
+    if kind == 'assign':
+        return f'{pad}{statement[1]} = {render_expr(statement[2])};\n'
+    if kind == 'store':
+        return f'{pad}{statement[1]}[{render_expr(statement[2])}] = {render_expr(statement[3])};\n'
+    if kind == 'give':
+        return f'{pad}give({render_expr(statement[1])});\n'
+    if kind == 'call':
+        return f'{pad}{render_expr(statement)};\n'
+    if kind == 'if':
+        cases, other = statement[1], statement[2]
+        text = ''
+        for k, (cond, body) in enumerate(cases):
+            head = 'if' if k == 0 else '} elif'
+            text += f'{pad}{head} ({render_expr(cond)}) {{\n'
+            text += render_block(body, indent)
+        if other != None:
+            text += f'{pad}}} else {{\n' + render_block(other, indent)
+        return text + f'{pad}}};\n'
+    if kind == 'while':
+        counter, count, body = statement[1:]
+        return (f'{pad}{counter} = 0;\n{pad}while ({counter} < {count}) {{\n'
+                + render_block(body, indent) + f'{pad}    {counter} = {counter} + 1;\n{pad}}};\n')
+    if kind == 'for':
+        var, count, body = statement[1:]
+        # an empty body would never run the increment
+        body = body or [('assign', var, ('var', var))]
+        return (f'{pad}for (int {var} = 0; {var} < {count}; {var} = {var} + 1) {{\n'
+                + render_block(body, indent) + f'{pad}}};\n')
+    if kind == 'parallel':
+        var, start, stop, body = statement[1:]
+        body = body or [('assign', var, ('var', var))]
+        return (f'{pad}parallel for (int {var} = {start}; {var} < {stop}; {var} = {var} + 1) {{\n'
+                + render_block(body, indent) + f'{pad}}};\n')
+    raise Exception(f'unknown statement {kind}')
+
+def render_program(statements):
+    return ''.join(render(statement) for statement in statements)
+
+
+#######################################
+# ENGINES
+#######################################
+
+# An engine runs program text on the given input bytes and returns
+# (output, variables); every engine starts from fresh interpreter state.
+
+ENGINES = {}
+
+def engine(fn):
+    ENGINES[fn.__name__[len('engine_'):]] = fn
+    return fn
+
+def parse_source(text):
+    tokens, error = swaspi.Lexer(text).make_tokens()
+    if error:
+        raise Exception(error.as_string())
+    return swaspi.Parser(tokens).statement_list()
+
+def variables(table):
+    return {name: (table.types.get(name), typed_value(value)) for name, value in table.symbols.items()}
+
+def typed_value(value):
+    # True == 1, so bools in arrays are compared with their type
+    if isinstance(value, (list, swaspi.PagedArray)):
+        return [(item, item.__class__ is bool) for item in value]
+    return value
+
+@contextlib.contextmanager
+def fresh_state(data, threshold=0, sparse=None, workers=1):
+    saved = (swaspi.tier_threshold, swaspi.sparse_threshold, swaspi.symbol_table,
+             swaspi.input_stream, swaspi.output_stream, swaspi.mem_tracker,
+             swaspi.parallel_workers, swaspi.parallel_min_iterations)
+    swaspi.tier_threshold = threshold
+    swaspi.parallel_workers = workers
+    swaspi.parallel_min_iterations = 1
+    if sparse != None:
+        swaspi.sparse_threshold = sparse
+    swaspi.symbol_table = swaspi.SymbolTable()
+    swaspi.input_stream = swaspi.InputStream(io.BytesIO(data))
+    swaspi.output_stream = None
+    swaspi.mem_tracker = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            yield out
+    finally:
+        (swaspi.tier_threshold, swaspi.sparse_threshold, swaspi.symbol_table,
+         swaspi.input_stream, swaspi.output_stream, swaspi.mem_tracker,
+         swaspi.parallel_workers, swaspi.parallel_min_iterations) = saved
+
+def run_sync(text, data, threshold=0, optimize=False, sparse=None, typed=False, keep_all=True, workers=1,
+             proven=False):
+    tree_list = parse_source(text)
+    if proven:
+        swaspi.prove_bounds(tree_list)
+    if typed:
+        swaspi.typecheck(tree_list)
+    if optimize:
+        # -O may drop stores nothing reads before the program ends; keeping
+        # every name lets the final variables be compared
+        keep = swaspi.Effects(tree_list).writes if keep_all else ()
+        tree_list, _ = swaspi.optimize(tree_list, keep)
+    with fresh_state(data, threshold, sparse, workers) as out:
+        swaspi.run_program(tree_list)
+        return out.getvalue(), variables(swaspi.symbol_table) if keep_all else None
+
+@engine
+def engine_reference(text, data):
+    return run_sync(text, data)
+
+@engine
+def engine_tier1(text, data):
+    return run_sync(text, data, threshold=1)
+
+@engine
+def engine_tier3(text, data):
+    return run_sync(text, data, threshold=3)
+
+@engine
+def engine_optimized(text, data):
+    return run_sync(text, data, optimize=True)
+
+@engine
+def engine_optimized_tier1(text, data):
+    return run_sync(text, data, threshold=1, optimize=True)
+
+@engine
+def engine_optimized_dead(text, data):
+    # as run by the CLI: only the output is kept
+    return run_sync(text, data, optimize=True, keep_all=False)
+
+@engine
+def engine_sparse(text, data):
+    return run_sync(text, data, threshold=1, sparse=0)
+
+@engine
+def engine_typed(text, data):
+    return run_sync(text, data, typed=True)
+
+@engine
+def engine_typed_optimized(text, data):
+    return run_sync(text, data, threshold=1, optimize=True, typed=True)
+
+@engine
+def engine_bounds(text, data):
+    # element accesses prove_bounds() finds in range run without checks
+    return run_sync(text, data, threshold=1, proven=True)
+
+@engine
+def engine_parallel(text, data):
+    # every parallel for that can be split runs on two worker processes
+    return run_sync(text, data, threshold=1, workers=2)
+
+async def feed(data):
+    # input arrives one byte at a time
+    reader = asyncio.StreamReader()
+    async def produce():
+        for k in range(len(data)):
+            reader.feed_data(data[k:k + 1])
+            await asyncio.sleep(0)
+        reader.feed_eof()
+    producer = asyncio.ensure_future(produce())
+    return reader, producer
+
+@engine
+def engine_async(text, data):
+    tree_list = parse_source(text)
+    table = swaspi.SymbolTable()
+    async def main():
+        reader, producer = await feed(data)
+        output = await swaspi.run_async(tree_list, reader, yield_every=2, table=table)
+        await producer
+        return output
+    with fresh_state(b'', threshold=1):
+        output = asyncio.run(main())
+    return output, variables(table)
+
+@engine
+def engine_checkpoint(text, data):
+    tree_list = parse_source(text)
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpointer = swaspi.Checkpointer(os.path.join(tmp, 'p.ckpt'), None, 'difftest')
+        with fresh_state(data, threshold=1) as out:
+            swaspi.run_checkpointed(tree_list, checkpointer)
+            return out.getvalue(), variables(swaspi.symbol_table)
+
+class Crash(BaseException):
+    pass
+
+class CrashingCheckpointer(swaspi.Checkpointer):
+    # saves at every back-edge and dies right after the `crash_after`-th save
+    def __init__(self, path, crash_after):
+        super().__init__(path, None, 'difftest')
+        self.due = 0
+        self.crash_after = crash_after
+
+    def save(self, frames):
+        super().save(frames)
+        if self.saved == self.crash_after:
+            raise Crash()
+
+def optimized_source(text):
+    tree_list = parse_source(text)
+    tree_list, _ = swaspi.optimize(tree_list, swaspi.Effects(tree_list).writes)
+    return tree_list
+
+def run_resumed(text, data, optimize=False):
+    # run until a crash after a few snapshots, then resume from the last one
+    parse = optimized_source if optimize else parse_source
+    crash_after = 1 + len(text) % 5
+    saved_every = swaspi.CHECKPOINT_CHECK_EVERY
+    swaspi.CHECKPOINT_CHECK_EVERY = 1
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'p.ckpt')
+            with fresh_state(data, threshold=1) as out:
+                try:
+                    swaspi.run_checkpointed(parse(text), CrashingCheckpointer(path, crash_after))
+                    return out.getvalue(), variables(swaspi.symbol_table)
+                except Crash:
+                    before = out.getvalue()
+            snapshot = swaspi.load_checkpoint(path)
+            with fresh_state(data, threshold=1) as out:
+                if snapshot['input'] != None:
+                    offset, hit_eof = snapshot['input']
+                    swaspi.input_stream.skip(offset)
+                    swaspi.input_stream.hit_eof = hit_eof
+                checkpointer = swaspi.Checkpointer(path, None, 'difftest')
+                swaspi.run_checkpointed(parse(text), checkpointer, snapshot)
+                return before + out.getvalue(), variables(swaspi.symbol_table)
+    finally:
+        swaspi.CHECKPOINT_CHECK_EVERY = saved_every
+
+@engine
+def engine_resume(text, data):
+    return run_resumed(text, data)
+
+@engine
+def engine_optimized_resume(text, data):
+    # hoisted and CSE values have to survive the snapshot
+    return run_resumed(text, data, optimize=True)
+
+
+#######################################
+# COMPARISON AND SHRINKING
+#######################################
+
+def outcome(name, text, data):
+    try:
+        return ENGINES[name](text, data)
+    except Exception as e:
+        # errors escaping an engine are results too
+        return f'raised {e.__class__.__name__}: {e}', None
+
+def agrees(expected, result):
+    # engines that do not keep the final variables report None for them
+    return expected[0] == result[0] and (result[1] == None or expected[1] == result[1])
+
+def diverges(name, statements, data):
+    text = render_program(statements)
+    return not agrees(outcome('reference', text, data), outcome(name, text, data))
+
+def expr_variants(expr):
+    # simpler expressions that could stand in for `expr`
+    if expr[0] != 'num':
+        yield ('num', 0)
+        yield ('num', 1)
+    for k, part in enumerate(expr):
+        if isinstance(part, tuple):
+            yield part
+            for simpler in expr_variants(part):
+                yield expr[:k] + (simpler,) + expr[k + 1:]
+
+def statement_variants(statement):
+    # lists of statements that could replace `statement`
+    yield []
+    kind = statement[0]
+    if kind in ('assign', 'give', 'store', 'call'):
+        for k in range(1 if kind == 'give' else 2, len(statement)):
+            if isinstance(statement[k], tuple):
+                for simpler in expr_variants(statement[k]):
+                    yield [statement[:k] + (simpler,) + statement[k + 1:]]
+    elif kind == 'if':
+        cases, other = statement[1], statement[2]
+        for cond, body in cases:
+            yield body
+        if other != None:
+            yield other
+            yield [('if', cases, None)]
+        if len(cases) > 1:
+            for k in range(len(cases)):
+                yield [('if', cases[:k] + cases[k + 1:], other)]
+        for k, (cond, body) in enumerate(cases):
+            for simpler in expr_variants(cond):
+                yield [('if', cases[:k] + [(simpler, body)] + cases[k + 1:], other)]
+            for smaller in list_variants(body):
+                yield [('if', cases[:k] + [(cond, smaller)] + cases[k + 1:], other)]
+        if other != None:
+            for smaller in list_variants(other):
+                yield [('if', cases, smaller)]
+    elif kind in ('while', 'for'):
+        var, count, body = statement[1:]
+        yield body
+        for smaller in sorted({0, 1, count // 2, count - 1}):
+            if 0 <= smaller < count:
+                yield [(kind, var, smaller, body)]
+        for smaller in list_variants(body):
+            yield [(kind, var, count, smaller)]
+    elif kind == 'parallel':
+        var, start, stop, body = statement[1:]
+        for smaller in sorted({start, start + 1, stop - 1}):
+            if start <= smaller < stop:
+                yield [(kind, var, start, smaller, body)]
+        for smaller in list_variants(body):
+            if smaller:
+                yield [(kind, var, start, stop, smaller)]
+
+def list_variants(statements):
+    for k, statement in enumerate(statements):
+        for replacement in statement_variants(statement):
+            yield statements[:k] + replacement + statements[k + 1:]
+
+def shrink(name, statements, data):
+    # greedy: take the first smaller program that still diverges, repeat
+    while True:
+        for candidate in list_variants(statements):
+            if diverges(name, candidate, data):
+                statements = candidate
+                break
+        else:
+            break
+    while data and diverges(name, statements, data[:len(data) // 2]):
+        data = data[:len(data) // 2]
+    return statements, data
+
+
+#######################################
+# MAIN
+#######################################
+
+def show(label, result):
+    output, symbols = result
+    print(f'--- {label} output:')
+    print(output, end='' if output.endswith('\n') else '\n')
+    if symbols != None:
+        print(f'--- {label} variables: {symbols}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seeds', type=int, default=200, help='number of generated programs')
+    parser.add_argument('--first', type=int, default=0, help='first seed')
+    parser.add_argument('--engine', nargs='*', choices=[name for name in ENGINES if name != 'reference'],
+                        help='engines to compare with the reference (default all)')
+    parser.add_argument('--save', metavar='DIR', help='write each minimized reproducer to DIR')
+    parser.add_argument('--show', type=int, metavar='SEED', help='print the program for SEED and exit')
+    parser.add_argument('--no-shrink', action='store_true', help='report failing programs as generated')
+    args = parser.parse_args()
+    sys.setrecursionlimit(10000)
+
+    if args.show != None:
+        statements, data = Generator(args.show).program()
+        print(render_program(statements), end='')
+        print(f'input: {data.decode()}', file=sys.stderr)
+        return 0
+
+    names = args.engine or [name for name in ENGINES if name != 'reference']
+    failures = {name: 0 for name in names}
+    for seed in range(args.first, args.first + args.seeds):
+        statements, data = Generator(seed).program()
+        text = render_program(statements)
+        expected = outcome('reference', text, data)
+        for name in names:
+            if agrees(expected, outcome(name, text, data)):
+                continue
+            failures[name] += 1
+            if not args.no_shrink:
+                statements, data = shrink(name, statements, data)
+                text = render_program(statements)
+            print(f'=== seed {seed}: {name} diverges from reference')
+            print(text, end='')
+            print(f'--- input: {data.decode()}')
+            show('reference', outcome('reference', text, data))
+            show(name, outcome(name, text, data))
+            if args.save:
+                os.makedirs(args.save, exist_ok=True)
+                path = os.path.join(args.save, f'seed{seed}-{name}.wasp')
+                with open(path, 'w') as f:
+                    f.write(text)
+                with open(path[:-len('.wasp')] + '.in', 'wb') as f:
+                    f.write(data)
+            break
+    swaspi.stop_parallel()
+    for name in names:
+        print(f'{name:<20} {args.seeds - failures[name]}/{args.seeds} programs agree')
+    return 1 if any(failures.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
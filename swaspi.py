@@ -1,1388 +1,6195 @@
-import string 
-import sys
-import argparse
-
-def custom_excepthook(exc_type, exc_value, exc_traceback):
-    print(f"Error: {exc_value}")
-
-sys.excepthook = custom_excepthook
-#######################################
-# CONSTANTS
-#######################################
-
-DIGITS = '0123456789'
-LETTERS = string.ascii_letters
-LETTERS_DIGITS = LETTERS + DIGITS
-
-#######################################
-# ERRORS
-#######################################
-
-class Error:
-    def __init__(self, pos_start, pos_end, error_name, details):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
-        self.error_name = error_name
-        self.details = details
-    
-    def as_string(self):
-        result  = f'{self.error_name}: {self.details}\n'
-        result += f'File {self.pos_start.fn}, line {self.pos_start.ln + 1}'
-        return result
-
-class IllegalCharError(Error):
-    def __init__(self, pos_start, pos_end, details):
-        super().__init__(pos_start, pos_end, 'Illegal Character', details)
-
-class RTError(Error):
-	def __init__(self, pos_start, pos_end, details, context):
-		super().__init__(pos_start, pos_end, 'Runtime Error', details)
-		self.context = context
-
-	def as_string(self):
-		result  = self.generate_traceback()
-		result += f'{self.error_name}: {self.details}'
-		#result += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
-		return result
-
-	def generate_traceback(self):
-		result = ''
-		pos = self.pos_start
-		ctx = self.context
-
-		while ctx:
-			result = f'  File {pos.fn}, line {str(pos.ln + 1)}, in {ctx.display_name}\n' + result
-			pos = ctx.parent_entry_pos
-			ctx = ctx.parent
-
-		return 'Traceback (most recent call last):\n' + result        
-
-#######################################
-# POSITION
-#######################################
-
-class Position:
-    def __init__(self, idx, ln, col, fn, ftxt):
-        self.idx = idx
-        self.ln = ln
-        self.col = col
-        self.fn = fn
-        self.ftxt = ftxt
-
-    def advance(self, current_char):
-        self.idx += 1
-        self.col += 1
-
-        if current_char == '\n':
-            self.ln += 1
-            self.col = 0
-
-        return self
-
-    def copy(self):
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
-
-#######################################
-# TOKENS
-#######################################
-
-INT_C = 'INT_CONST'
-DEC_C = 'DEC_CONST'
-INT_T='int'
-DEC_T='dec'
-PLUS = 'PLUS'
-MIN = 'MIN'
-DIV = 'DIV'
-MUL = 'MUL'
-MOD='MOD'
-DOT='DOT'
-LPAREN   = 'LPAREN'
-RPAREN   = 'RPAREN'
-ASSIGN='ASSIGN'
-SEMI='SEMI'
-COMP_E='EQUAL TO'
-COMP_GT='GREATER THAN'
-COMP_LT='LESS THAN'
-AND='and'
-NOT='not'
-OR='or'
-COMP_NE='NOT EQUAL'
-COMP_LTE				= 'LESS THAN EQUAL'
-COMP_GTE				= 'GREATER THAN EQUAL'
-COMMA='COMMA'
-ID='IDENTIFIER'
-KEYWORD='KEYWORD'
-IF='if'
-ELIF='elif'
-ELSE='else'
-WHILE='while'
-FOR='for'
-LBRACES='LBRACES'
-RBRACES='RBRACES'
-SLBRACES='SBRACES'
-SRBRACES='SRBRACES'
-WORD='word_const'
-WORD_T='word'
-GIVE='give'
-TAKE='take'
-CHAR='char'
-
-class Token:
-    def __init__(self, type_, value=None):
-        self.type = type_
-        self.value = value
-    
-    def __repr__(self):
-        if self.value: return f'{self.type}:{self.value}'
-        return f'{self.type}'
-
-########################################
-#RESERVED KEYWORDS# 
-####################################
-
-Keywords=[
-
-
-    'int',
-    'dec',
-    'if',
-    'elif',
-    'else',
-    'while',
-    'for',
-    'or',
-    'and',
-    'not',
-    'word',
-    'give',
-    'take',
-    'char'
-]
-
-#######################################
-# LEXER
-#######################################
-
-class Lexer:
-    def __init__(self, text):
-        fn = "testfile"
-        self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
-        self.current_char = None
-        self.advance()
-    
-    def advance(self):
-        self.pos.advance(self.current_char)
-        self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
-
-    def make_tokens(self):
-        tokens = []
-        
-        while self.current_char != None:
-            if self.current_char in ' \t\n':
-                self.advance()
-            elif self.current_char in DIGITS:
-                tokens.append(self.make_number())
-            elif self.current_char in LETTERS:
-                tokens.append(self.make_identifier())    
-            elif self.current_char == '+':
-                tokens.append(Token(PLUS))
-                self.advance()
-            elif self.current_char == ',':
-                self.advance()
-                tokens.append(Token(COMMA, ','))   
-            elif self.current_char == '-':
-                tokens.append(Token(MIN))
-                self.advance()
-            elif self.current_char == '*':
-                tokens.append(Token(MUL))
-                self.advance()
-            elif self.current_char == '/':
-                tokens.append(Token(DIV))
-                self.advance()
-            elif self.current_char == '%':
-                tokens.append(Token(MOD))
-                self.advance()
-            elif self.current_char == '(':
-                tokens.append(Token(LPAREN))
-                self.advance()
-            elif self.current_char == ')':
-                tokens.append(Token(RPAREN))
-                self.advance()
-            elif self.current_char == '{':
-                tokens.append(Token(LBRACES))
-                self.advance()
-            elif self.current_char == '}':
-                tokens.append(Token(RBRACES))
-                self.advance()    
-            elif self.current_char == '[':
-                tokens.append(Token(SLBRACES))
-                self.advance()
-            elif self.current_char == ']':
-                tokens.append(Token(SRBRACES))
-                self.advance()     
-            elif self.current_char == '=':
-                tokens.append(self.make_equals())
-            elif self.current_char == '!':
-                tokens.append(self.make_not_equals())
-            elif self.current_char == '>':
-                tokens.append(self.make_greater_than())  
-            elif self.current_char == '<':
-                tokens.append(self.make_less_than()) 
-            elif self.current_char == '"':
-                tokens.append(self.make_string())          
-            elif self.current_char == ';':
-                tokens.append(Token(SEMI))
-                self.advance()
-            elif self.current_char == '.':
-                tokens.append(Token(DOT)) 
-                self.advance()           
-            else:
-                pos_start = self.pos.copy()
-                char = self.current_char
-                self.advance()
-                return [], IllegalCharError(pos_start, self.pos, "'" + char + "'")
-
-        return tokens, None
-    
-    def peek(self):
-        peek_pos = self.pos + 1
-        if peek_pos > len(self.text) - 1:
-            return None
-        else:
-            return self.text[peek_pos]
-
-    def make_string(self):
-        id_str = ""
-        self.advance()
-        while self.current_char != '"' :
-                id_str += self.current_char
-                self.advance()   
-        self.advance()  
-        return Token(WORD,id_str)
-        
-    def make_identifier(self):
-            id_str = ''
-           # pos_start = self.pos.copy()
-
-            while self.current_char != None and self.current_char in LETTERS_DIGITS + '_':
-                id_str += self.current_char
-                self.advance()
-
-            tok_type = id_str if id_str in Keywords else ID
-            tok_value = None if id_str in Keywords else id_str
-            return Token(tok_type,tok_value)        
-    def make_number(self):
-        num_str = ''
-        dot_count = 0
-
-        while self.current_char != None and self.current_char in DIGITS + '.':
-            if self.current_char == '.':
-                if dot_count == 1: break
-                dot_count += 1
-                num_str += '.'
-            else:
-                num_str += self.current_char
-            self.advance()
-
-        if dot_count == 0:
-            return Token(INT_C, int(num_str))
-        else:
-            return Token(DEC_C, float(num_str))
-        
-    def make_not_equals(self):
-        pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            return Token(COMP_NE)
-
-        raise IllegalCharError(self.pos, pos_start, "Expected '=' after '!'")
-	
-    def make_equals(self):
-        tok_type = ASSIGN
-        #pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = COMP_E
-
-        return Token(tok_type)
-
-    def make_less_than(self):
-        tok_type = COMP_LT
-        #pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = COMP_LTE
-
-        return Token(tok_type)
-
-    def make_greater_than(self):
-        tok_type = COMP_GT
-        #pos_start = self.pos.copy()
-        self.advance()
-
-        if self.current_char == '=':
-            self.advance()
-            tok_type = COMP_GTE
-
-        return Token(tok_type)        
-
-#######################################
-#NODES
-########################################\
-class Numnode:
-    def __init__(self,token):
-        self.token=token
-        self.type=token.type
-        self.value=token.value
-    def __repr__(self):
-        return f'{self.type}:{self.value}'
-class Binnode:
-    def __init__(self,left,op,right):
-        self.left=left
-        self.op=op
-        self.right=right
-    def __repr__(self):
-        return f'({self.left},{self.op},{self.right})'
-
-######################################
-class VarNode:
-    def __init__(self, var_name):
-        self.var_name = var_name
-
-    def __repr__(self):
-        return f'(Var {self.var_name})'
-    
-class VarAssignNode:
-    def __init__(self, var_name, value_node, var_type=None):
-        self.var_type = var_type  # Type (e.g., int)
-        self.var_name = var_name  # Variable name (e.g., a)
-        self.value_node = value_node  # Assigned value (e.g., 2)
-
-    def __repr__(self):
-        return f'(Var {self.var_type} {self.var_name} = {self.value_node})'
-    
-class ArrayAssignNode:
-    def __init__(self, var_name, value_node, var_type=None):
-        self.var_type = var_type  # Type (e.g., int)
-        self.var_name = var_name  # Variable name (e.g., a)
-        self.value_node = value_node  # Assigned value (e.g., 2)
-
-    def __repr__(self):
-        return f'(Var {self.var_type} {self.var_name} = {self.value_node})'
-    
-class UnaryOpNode:
-	def __init__(self, op_tok, node):
-		self.op_tok = op_tok
-		self.node = node
-
-		# self.pos_start = self.op_tok.pos_start
-		# self.pos_end = node.pos_end
-
-	def __repr__(self):
-		return f'({self.op_tok}, {self.node})'
-
-class Ifnode:
-    def __init__(self,cases,elsecase):
-        self.elsecase = elsecase
-        self.cases = cases
-
-    def __repr__(self):
-        return f'({self.cases}, {self.elsecase})'    
-    
-
-class Whilenode:
-    def __init__(self,condition,expressions):
-        self.condition = condition
-        self.expressions = expressions
-
-    def __repr__(self):
-        return f'({self.expressions}, {self.condition})'  
-    
-class Fornode:
-        def __init__(self,decl,cond,inc,expressions):
-            self.decl = decl
-            self.cond = cond
-            self.inc=inc
-            self.expressions=expressions
-
-class blocknode:
-      def __init__(self,statements):
-        self.statements=statements
-
-      def __repr__(self):
-        return f'({self.statements})' 
-     
-class stringnode:
-    def __init__(self,token):
-        self.value=token.value
-        self.type=token.type
-
-class givenode:
-    def __init__(self,token):
-        self.token=token
-
-    def __repr__(self):
-        return f'(print {self.token.value})' 
-
-class arraynode:
-    def __init__(self,expressions,num):
-        self.expressions=expressions
-        self.num=num
-
-class arrayvalnode:
-    def __init__(self,var_name,idx):
-        self.var_name=var_name
-        self.idx=idx
-
-class arraysingularassignnode:
-    def __init__(self,var_name,idx,val):
-        self.var_name=var_name
-        self.idx=idx
-        self.value=val
-
-class typecastnode:
-    def __init__(self,val):
-        self.value=val
-
-# class VarDeclNode:
-#     def __init__(self, var_type, var_name, value_node):
-#         self.var_type = var_type  # Type (e.g., int)
-#         self.var_name = var_name  # Variable name (e.g., a)
-#         self.value_node = value_node  # Assigned value (e.g., 2)
-
-#     def __repr__(self):
-#         return f'(VarDecl {self.var_type} {self.var_name} = {self.value_node})'
-
-#######################################
-#PARSER
-#######################################
-class Parser:
-    def __init__(self,tokens):
-        self.tokens=tokens
-        self.current_token=tokens[0]
-        self.idx=0
-    def next_token(self):
-        self.idx+=1
-        if(self.idx<len(self.tokens)):
-            self.current_token=self.tokens[self.idx]
-        else:
-            self.current_token=Token(None)
-    def peek_next_token(self):
-        if self.idx + 1 < len(self.tokens):
-            return self.tokens[self.idx + 1]
-        return Token(None)
-            
-    def factor(self):
-        token=self.current_token
-        if token.type=='INT_CONST' or token.type=='DEC_CONST':
-                self.next_token()
-                return Numnode(token)
-        elif token.type==WORD:
-                self.next_token()
-                return stringnode(token)
-        elif token.type==CHAR:
-                self.next_token()
-                if self.current_token.type!=LPAREN:
-                    raise Exception('expected parenthesis')
-                self.next_token()
-                val=self.comp_exprs()
-                if self.current_token.type!=RPAREN:
-                    raise Exception('expected parenthesis')
-                self.next_token()
-                return typecastnode(val)
-        elif token.type=='IDENTIFIER':
-                var=self.current_token.value
-                self.next_token()
-                if self.current_token.type==SLBRACES:
-                    self.next_token()
-                    n_node=self.comp_exprs()
-                    if self.current_token.type!=SRBRACES:
-                        raise Exception('expected right square braces')
-                    self.next_token()
-                    return arrayvalnode(var,n_node)
-                return VarNode(token.value)
-        elif token.type==MIN or token.type==PLUS:
-                self.next_token()
-                node=self.exprs()
-                return UnaryOpNode(token,node)
-        elif token.type == 'LPAREN':
-            self.next_token()
-            node = self.comp_exprs()  # Parse the inner expression
-            if self.current_token and self.current_token.type == 'RPAREN':
-                self.next_token()
-            else:
-                raise Exception("Expected ')'")  # Add error handling for unmatched parentheses
-            return node
-        raise Exception(f"Unexpected token: {token}")
-
-    def term(self):
-        node=self.factor()
-        if isinstance(self.current_token, tuple):
-            raise TypeError(f"Unexpected tuple encountered: {self.current_token}")
-
-        while self.current_token.type is not None and self.current_token.type in ('MUL', 'DIV','MOD'):
-            if(self.current_token.type=='DIV' or self.current_token.type=='MUL' or self.current_token.type=='MOD'):
-                token= self.current_token
-                self.next_token()
-            node = Binnode(node,token,self.factor())
-        return node
-    
-    def exprs(self):
-        node =self.term()
-        while self.current_token.type is not None and self.current_token.type in ('PLUS', 'MIN'):
-            if(self.current_token.type=='PLUS' or self.current_token.type=='MIN'):
-                token= self.current_token
-                self.next_token()
-            node =Binnode (node,token,self.term())
-        return node
-    
-    def block(self):
-        if self.current_token.type == LBRACES:
-            self.next_token()
-            statements=self.statement_list()
-            if self.current_token.type != RBRACES:
-                raise Exception("Expected right braces")
-            self.next_token()
-            return blocknode(statements)
-        return self.statement()    
-
-
-    def statement_list(self):
-        node = self.statement()
-
-        results = [node]
-        while self.current_token.type == SEMI and self.peek_next_token().type!= RBRACES and self.peek_next_token().type!=None:
-            self.next_token()
-            results.append(self.statement())
-        if self.current_token.type != SEMI:
-            raise Exception("Expected semicolon")    
-        self.next_token()
-        return results
-
-    def statement(self):
-        if self.current_token.type == INT_T or self.current_token.type == DEC_T or self.current_token.type == WORD_T:
-            node = self.parse_var_decl()
-        elif self.current_token.type == ID and self.peek_next_token().type!=SLBRACES:
-            node = self.parse_var_decl()
-        elif self.current_token.type == ID and self.peek_next_token().type==SLBRACES:
-            node = self.parse_array_decl()
-        elif self.current_token.type == GIVE:
-            node = self.parse_give()
-        elif self.current_token.type == IF:
-            node = self.ifexprs()
-        elif self.current_token.type == WHILE:
-            node = self.whileexprs()
-        elif self.current_token.type == FOR:
-            node = self.forexprs()
-        elif self.current_token.type==LBRACES:
-            node=self.block()
-        else:
-            raise Exception(f"Syntax error - {self.current_token}")
-        return node
-    
-    def forexprs(self):
-        if self.current_token.type == FOR:  # Look for 'for'
-            self.next_token()
-            if self.current_token.type != 'LPAREN':
-                raise Exception("Expected '(' after 'for'")
-            self.next_token()
-            decl = self.parse_var_decl()  # Parse condition inside parentheses
-            if self.current_token.type != SEMI:
-                raise Exception("Expected ';' at the end of the statement")
-            self.next_token()
-            cond=self.comp_exprs()
-            if self.current_token.type != SEMI:
-                raise Exception("Expected ';' at the end of the statement")
-            self.next_token()
-            inc=self.parse_var_decl()
-            if self.current_token.type != 'RPAREN':
-                raise Exception("Expected ')' after condition")
-            self.next_token()
-            if self.current_token.type != LBRACES:
-                raise Exception("Expected left braces")
-            self.next_token()
-            node = self.ifexprs()
-
-            expressions = [node]
-
-            while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
-                self.next_token()
-                expressions.append(self.ifexprs())
-            if self.current_token.type != SEMI:
-                raise Exception("Expected semicolon")    
-            self.next_token()
-            if self.current_token.type != RBRACES:
-                raise Exception("Expected right braces")
-            self.next_token()
-            return Fornode(decl,cond,inc,expressions) 
-        return(self.statement())
-    
-    
-    def whileexprs(self):
-        if self.current_token.type == WHILE: 
-            self.next_token()
-            if self.current_token.type != 'LPAREN':
-                raise Exception("Expected '(' after 'while'")
-            self.next_token()
-            condition = self.comp_exprs()  # Parse condition inside parentheses
-            if self.current_token.type != 'RPAREN':
-                raise Exception("Expected '(' after 'while'")
-            self.next_token()
-            if self.current_token.type != LBRACES:
-                raise Exception("Expected left braces")
-            self.next_token()
-            node = self.ifexprs()
-            expressions = [node]
-
-            while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
-                self.next_token()
-                expressions.append(self.ifexprs())
-            if self.current_token.type != SEMI:
-                raise Exception("Expected semicolon")    
-            self.next_token()
-            if self.current_token.type != RBRACES:
-                raise Exception("Expected right braces")
-            self.next_token()
-            return Whilenode(condition,expressions)   
-        return(self.statement())
-
-    def ifexprs(self):
-        cases=[]
-        elsecase=None
-        if self.current_token.type == IF:  
-            self.next_token()
-            if self.current_token.type != 'LPAREN':
-                raise Exception("Expected '(' after 'if'")
-            self.next_token()
-            condition = self.comp_exprs()  # Parse condition inside parentheses
-            if self.current_token.type != 'RPAREN':
-                raise Exception("Expected '(' after 'if'")
-            self.next_token()
-            if self.current_token.type != LBRACES:
-                raise Exception("Expected left braces")
-            self.next_token()
-            node = self.statement()
-
-            expressions = [node]
-
-            while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
-                self.next_token()
-                expressions.append(self.statement())
-            if self.current_token.type != SEMI:
-                raise Exception("Expected semicolon")
-            self.next_token()
-            if self.current_token.type != RBRACES:
-                raise Exception("Expected right braces")
-            self.next_token()
-            cases.append([condition,expressions])
-            while self.current_token.type == ELIF: 
-                self.next_token()
-                if self.current_token.type != 'LPAREN':
-                    raise Exception("Expected '(' after 'elif'")
-                self.next_token()
-                condition = self.comp_exprs()  # Parse condition inside parentheses
-                if self.current_token.type != 'RPAREN':
-                    raise Exception("Expected '(' after 'elif'")
-                self.next_token()
-                if self.current_token.type != LBRACES:
-                    raise Exception("Expected left braces")
-                self.next_token()
-                node = self.statement()
-                expressions = [node]
-                while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
-                    self.next_token()
-                    expressions.append(self.statement())
-                if self.current_token.type != SEMI:
-                    raise Exception("Expected semicolon")    
-                self.next_token()
-                if self.current_token.type != RBRACES:
-                    raise Exception("Expected right braces")
-                self.next_token()
-                cases.append([condition,expressions])
-            if self.current_token.type == ELSE:  # Look for 'int' or 'dec'
-                self.next_token()
-                if self.current_token.type != LBRACES:
-                    raise Exception("Expected variable name")
-                self.next_token()
-                node = self.statement()
-
-                expressions = [node]
-
-                while self.current_token.type == SEMI and self.peek_next_token().type!= RBRACES:
-                    self.next_token()
-                    expressions.append(self.statement())
-                if self.current_token.type != SEMI:
-                    raise Exception("Expected semicolon")    
-                self.next_token()
-                if self.current_token.type != RBRACES:
-                    raise Exception("Expected right braces")
-                self.next_token()
-                elsecase=expressions
-            return Ifnode(cases,elsecase)
-        return(self.statement())
-
-    def parse_var_decl(self):
-        if self.current_token.type == INT_T or self.current_token.type == DEC_T: 
-            var_type = self.current_token.type
-            self.next_token()
-            var_name = self.current_token  # Variable name
-            if var_name.type != ID:
-                raise Exception("Expected variable name")
-            self.next_token()
-            if var_type==INT_T:
-                     value_node = Numnode(Token(INT_C,0)) 
-            else:
-                value_node=Numnode(Token(DEC_C,0.0)) 
-            if self.current_token.type == ASSIGN:
-                self.next_token()
-                value_node = self.comp_exprs()
-            elif self.current_token.type==SLBRACES:
-                self.next_token()
-                num = self.comp_exprs()
-                if self.current_token.type != SRBRACES:
-                    raise Exception('Expected square bracket')
-                self.next_token()
-                expressions=None
-                if self.current_token.type == ASSIGN:
-                    self.next_token()
-                    if self.current_token.type==LBRACES:
-                        self.next_token()
-                        element_node = self.comp_exprs()
-                        expressions = [element_node]
-                        while self.current_token.type == COMMA :
-                            self.next_token()
-                            expressions.append(self.comp_exprs())
-                        if self.current_token.type != RBRACES:
-                            raise Exception('Expected curly bracket')
-                        self.next_token()
-                    else:
-                           raise Exception('Expected curly bracket')
-
-                value_node=   arraynode(expressions,num)  
-
-                return ArrayAssignNode(var_name.value, value_node,var_type)    
-            return VarAssignNode(var_name.value,value_node,var_type)
-        elif self.current_token.type == WORD_T:
-            self.next_token()
-            var_name = self.current_token  # Variable name
-            if var_name.type != ID:
-                raise Exception("Expected variable name")
-            self.next_token()
-            value_node=stringnode(Token(WORD,""))
-            if self.current_token.type == ASSIGN:
-                self.next_token()
-                # if self.current_token.type!=WORD :
-                #     if self.current_token.type!=CHAR:
-                #         raise Exception("Expected double quotes")
-                # if self.current_token.type==CHAR:
-                value_node=self.type_cast()
-                # else:    
-                #     value_node = stringnode(self.current_token)
-                #     self.next_token()
-            return VarAssignNode(var_name.value,value_node,WORD_T)
-            # if self.current_token.type != SEMI:
-            #     raise Exception("Expected ';' at the end of the statement")
-            # self.next_token()
-        
-        elif self.current_token.type == ID:
-            var_name = self.current_token
-            self.next_token()
-            if self.current_token.type == ASSIGN:
-                self.next_token()
-                value_node = self.type_cast()    
-
-            # if self.current_token.type != SEMI:
-            #     raise Exception("Expected ';' at the end of the statement")
-            # self.next_token()
-        
-                return VarAssignNode( var_name.value, value_node)
-        else:
-            node =self.comp_exprs()
-            while self.current_token.type is not None and self.current_token.type in ('and', 'or'):
-                token= self.current_token
-                self.next_token()
-                node =Binnode (node,token,self.comp_exprs())
-            return node  # Handle other expressions
-        
-    def parse_array_decl(self):
-        var_name=self.current_token.value
-        self.next_token()
-        self.next_token()
-        n=self.comp_exprs()
-        if self.current_token.type!=SRBRACES:
-            raise Exception("expected square braces")
-        self.next_token()
-        if self.current_token.type!=ASSIGN:
-            return arrayvalnode(var_name,n)
-        elif self.current_token.type==ASSIGN:
-            self.next_token()
-            val=self.comp_exprs()
-            return arraysingularassignnode(var_name,n,val)
-        else:
-            raise Exception("Sytax Error")
-        
-    def parse_give(self):
-        if self.current_token.type== GIVE:
-            self.next_token()
-            if self.current_token.type!=LPAREN:
-                raise Exception('Expected Left Braces')
-            self.next_token()
-            node = self.comp_exprs()
-            if self.current_token.type!=RPAREN:
-                raise Exception('Expected Right Braces')
-            self.next_token()    
-            return givenode(node)
-        return self.statement()        
-
-    def type_cast(self):
-        if self.current_token.type== CHAR:
-            self.next_token()
-            if self.current_token.type!=LPAREN:
-                raise Exception('expected parenthesis')
-            self.next_token()
-            val=self.comp_exprs()
-            if self.current_token.type!=RPAREN:
-                raise Exception('expected parenthesis')
-            self.next_token()
-            return typecastnode(val)
-        return self.comp_exprs()
-
-
-    def comp_exprs(self):
-        if self.current_token.type ==NOT:
-            self.next_token()
-            node= self.comp_exprs()
-            return UnaryOpNode(Token(NOT),node)
-        else:
-            node=self.exprs()
-            while self.current_token.type is not None and self.current_token.type in (COMP_E,COMP_GT,COMP_GTE,COMP_LT,COMP_LTE,COMP_NE):
-                op=self.current_token
-                self.next_token()   
-                node=Binnode (node,op,self.exprs()) 
-
-        return node
-
-
-#######################################################################
-#######################################################################
-
-
-class Value:
-    def __init__(self):
-        self.set_pos()
-        self.set_context()
-
-    def set_pos(self, pos_start=None, pos_end=None):
-        self.pos_start = pos_start
-        self.pos_end = pos_end
-        return self
-
-    def set_context(self, context=None):
-        self.context = context
-        return self
-
-    def added_to(self, other):
-        return None, self.illegal_operation(other)
-
-    def subbed_by(self, other):
-        return None, self.illegal_operation(other)
-
-    def multed_by(self, other):
-        return None, self.illegal_operation(other)
-
-    def dived_by(self, other):
-        return None, self.illegal_operation(other)
-
-    def powed_by(self, other):
-        return None, self.illegal_operation(other)
-
-    def get_comparison_eq(self, other):
-        return None, self.illegal_operation(other)
-
-    def get_comparison_ne(self, other):
-        return None, self.illegal_operation(other)
-
-    def get_comparison_lt(self, other):
-        return None, self.illegal_operation(other)
-
-    def get_comparison_gt(self, other):
-        return None, self.illegal_operation(other)
-
-    def get_comparison_lte(self, other):
-        return None, self.illegal_operation(other)
-
-    def get_comparison_gte(self, other):
-        return None, self.illegal_operation(other)
-
-    def anded_by(self, other):
-        return None, self.illegal_operation(other)
-
-    def ored_by(self, other):
-        return None, self.illegal_operation(other)
-
-    def notted(self):
-        return None, self.illegal_operation()
-
-
-    def copy(self):
-        raise Exception('No copy method defined')
-
-    def is_true(self):
-        return False
-
-    def illegal_operation(self, other=None):
-        if not other: other = self
-        return RTError(
-            self.pos_start, other.pos_end,
-            'Illegal operation',
-            self.context
-        )
-
-class Number(Value):
-    def __init__(self, value):
-        super().__init__()
-        self.value = value
-
-    def added_to(self, other):
-        if isinstance(other, Number):
-            return Number(self.value + other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def subbed_by(self, other):
-        if isinstance(other, Number):
-            return Number(self.value - other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def multed_by(self, other):
-        if isinstance(other, Number):
-            return Number(self.value * other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def dived_by(self, other):
-        if isinstance(other, Number):
-            if other.value == 0:
-                return None, RTError(
-                    other.pos_start, other.pos_end,
-                    'Division by zero',
-                    self.context
-                )
-
-            return Number(self.value / other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def powed_by(self, other):
-        if isinstance(other, Number):
-            return Number(self.value ** other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def get_comparison_eq(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value == other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def get_comparison_ne(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value != other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def get_comparison_lt(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value < other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def get_comparison_gt(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value > other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def get_comparison_lte(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value <= other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def get_comparison_gte(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value >= other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def anded_by(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value and other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def ored_by(self, other):
-        if isinstance(other, Number):
-            return Number(int(self.value or other.value)).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def notted(self):
-        return Number(1 if self.value == 0 else 0).set_context(self.context), None
-
-    def copy(self):
-        copy = Number(self.value)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
-
-    def is_true(self):
-        return self.value != 0
-
-    def __repr__(self):
-        return str(self.value)
-
-class String(Value):
-    def __init__(self, value):
-        super().__init__()
-        self.value = value
-
-    def added_to(self, other):
-        if isinstance(other, String):
-            return String(self.value + other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def multed_by(self, other):
-        if isinstance(other, Number):
-            return String(self.value * other.value).set_context(self.context), None
-        else:
-            return None, Value.illegal_operation(self, other)
-
-    def is_true(self):
-        return len(self.value) > 0
-
-    def copy(self):
-        copy = String(self.value)
-        copy.set_pos(self.pos_start, self.pos_end)
-        copy.set_context(self.context)
-        return copy
-
-    def __repr__(self):
-        return f'"{self.value}"'
-
-
-#######################################
-# SYMBOL TABLE
-#######################################
-
-class SymbolTable:
-    def __init__(self):
-        self.symbols = {}
-        self.types = {}       
-        self.parent = None
-
-    def get(self, name):
-        value = self.symbols.get(name, None)
-        if value == None and self.parent:
-           return self.parent.get(name)
-        return value
-    
-    def gettype(self, name):
-        type_ = self.symbols.get(name, None)
-        if type_ == None and self.parent:
-          return self.parent.get(name)
-        return type_    
-
-    def set(self, name, value):
-        self.symbols[name] = value
-
-    def settype(self, name, _type):
-        self.types[name] = _type            
-
-    def remove(self, name):
-        del self.symbols[name]
-        del self.types[name]
-
-    def copy(self,symb):
-        self.symbols=symb.symbols.copy()
-        self.types=symb.types.copy()
-       
-
-
-#######################################
-#GLOBAL VARIABLES
-######################################
-
-symbol_table = SymbolTable()
-
-#######################################
-# INTERPRETER
-#######################################              
-class Interpreter():
-    def __init__(self, tree):
-        self.tree = tree
-        global symbol_table
-
-    def visit(self, node):
-        if isinstance(node, Binnode):
-            return self.visit_Binnode(node)
-        elif isinstance(node, VarNode):
-            return self.visit_VarNode(node)
-        elif isinstance(node, blocknode):
-            return self.visit_blocknode(node)
-        elif isinstance(node, ArrayAssignNode):
-            return self.visit_arrayassignnode(node)
-        elif isinstance(node, arraynode):
-            return self.visit_arraynode(node)
-        elif isinstance(node, arrayvalnode):
-            return self.visit_arrayvalnode(node)
-        elif isinstance(node, arraysingularassignnode):
-            return self.visit_arraysingularassignnode(node)
-        elif isinstance(node, Ifnode):
-            return self.visit_Ifnode(node)
-        elif isinstance(node, Whilenode):
-            return self.visit_Whilenode(node)
-        elif isinstance(node, Fornode):
-            return self.visit_Fornode(node)
-        elif isinstance(node, givenode):
-            return self.visit_givenode(node)
-        elif isinstance(node, typecastnode):
-            return self.visit_typecastnode(node)
-        elif isinstance(node, VarAssignNode):
-            return self.visit_VarAssignNode(node)
-        elif isinstance(node, Numnode):
-            return self.visit_Numnode(node)
-        elif isinstance(node, stringnode):
-            return self.visit_stringnode(node)
-        elif isinstance(node, UnaryOpNode):
-            return self.visit_UnaryOpNode(node)
-        elif isinstance(node, Token) and node.type == ID:  # Variable reference
-            return symbol_table.get(node.value, f"Undefined variable: {node.value}")
-
-    def visit_VarNode(self, node):
-        var_name = node.var_name
-        value=symbol_table.get(var_name)
-        return value
-
-    def visit_VarAssignNode(self, node):
-        var_name = node.var_name
-        var_type=node.var_type
-        # print(symbol_table.symbols)
-        if var_type!=None:
-            if var_name in symbol_table.symbols.keys():
-                raise Exception(f'variable declared twice {var_name},')
-            symbol_table.settype(var_name, var_type)
-        if var_type==None:
-            if var_name not in symbol_table.symbols.keys():
-                raise Exception('variable not declared')
-        value = self.visit(node.value_node)
-
-        var_type = symbol_table.types[var_name]
-        if var_type==INT_T:
-            symbol_table.set(var_name,int(value))
-        elif var_type==DEC_T:
-            symbol_table.set(var_name,float(value))
-        elif var_type==WORD_T:
-            symbol_table.set(var_name,value)
-        
-    def visit_Binnode(self, node):
-        if node.op.type == PLUS:
-            return self.visit(node.left) + self.visit(node.right)
-        elif node.op.type == MIN:
-            return self.visit(node.left) - self.visit(node.right)
-        elif node.op.type == MUL:
-            return self.visit(node.left) * self.visit(node.right)
-        elif node.op.type == DIV:
-            return self.visit(node.left) / self.visit(node.right)
-        elif node.op.type == MOD:
-            return self.visit(node.left) % self.visit(node.right)
-        elif node.op.type == COMP_GTE:
-            return self.visit(node.left) >= self.visit(node.right)
-        elif node.op.type == COMP_GT:
-            return self.visit(node.left) > self.visit(node.right)
-        elif node.op.type == COMP_E:
-            return self.visit(node.left) == self.visit(node.right)
-        elif node.op.type == COMP_NE:
-            return self.visit(node.left) != self.visit(node.right)
-        elif node.op.type == COMP_LT:
-            return self.visit(node.left) < self.visit(node.right)
-        elif node.op.type == COMP_LTE:
-            return self.visit(node.left) <= self.visit(node.right)
-        elif node.op.type == AND:
-            return self.visit(node.left) and self.visit(node.right)
-        elif node.op.type == OR:
-            return self.visit(node.left) or self.visit(node.right)
-
-    def visit_Numnode(self, node):
-        return node.value
-    
-    def visit_stringnode(self, node):
-        return node.value
-    
-    def visit_arrayassignnode(self,node):
-        arr=[]
-        var_name = node.var_name
-        var_type=node.var_type
-        if var_type!=None:
-            if var_name in symbol_table.symbols.keys():
-                raise Exception('variable declared twice')
-            symbol_table.settype(var_name, var_type)
-        if var_type==None:
-            if var_name not in symbol_table.symbols.keys():
-                raise Exception('variable not declared')
-        value = self.visit(node.value_node)
-
-        # Update the variable in the symbol table
-        var_type=symbol_table.types[var_name]
-        if var_type==INT_T:
-            for i in value:
-                arr.append(int(i))
-            symbol_table.set(var_name,arr)
-        elif var_type==DEC_T:
-            for i in value:
-                arr.append(int(i))
-            symbol_table.set(var_name,arr)
-        elif var_type==WORD_T:
-            symbol_table.set(var_name,value)
-
-    def visit_arraynode(self, node):
-        arr=[]
-        num=self.visit(node.num)
-        expressions=node.expressions
-        if node.expressions==None:
-            for i in range(num):
-                arr.append(0)
-            return arr
-        else:
-            if num!=len(expressions):
-                raise Exception('Expected same values as of size')
-            for i in expressions:
-                arr.append(self.visit(i))
-        return arr
-    
-
-    def visit_arraysingularassignnode(self,node):
-        arr=symbol_table.symbols[node.var_name]
-        idx=self.visit(node.idx)
-        val=self.visit(node.value)
-        arr[idx]=val
-
-    def visit_arrayvalnode(self,node):
-        arr=symbol_table.symbols[node.var_name]
-        idx=self.visit(node.idx)
-        return arr[idx]
-
-    def visit_typecastnode(self,node):
-        val=self.visit(node.value)
-        return chr(val)
-    def visit_UnaryOpNode(self, node):
-        if not hasattr(node.op_tok, 'type'):
-           raise Exception(f"Invalid op_tok: expected Token, got {type(node.op_tok).__name__}")
-        value = self.visit(node.node)
-
-       # error = None
-
-        if node.op_tok.type == MIN:
-            value = -value
-        elif node.op_tok.type == NOT:
-            value = not(value)
-        return value
-
-    def visit_blocknode(self,node):
-        symb=SymbolTable()
-        symb.copy(symbol_table) 
-        for statement in node.statements:
-            self.visit(statement)
-        keys_to_remove = [i for i in symbol_table.symbols.keys() if i not in symb.symbols.keys()]
-        for i in keys_to_remove:
-            symbol_table.remove(i)       
-
-    def visit_Ifnode(self,node):
-        j=0
-        for condition,cases in node.cases:
-            if(self.visit(condition)==True):
-                j=1
-                for case in cases:
-                    self.visit(case)
-        if node.elsecase and j==0:
-            for case in node.elsecase:
-                          self.visit(case)  
-
-    def visit_Whilenode(self,node):
-        symb=SymbolTable()
-        symb.copy(symbol_table)
-        while(self.visit(node.condition)):
-            for cases in node.expressions:
-                self.visit(cases) 
-        keys_to_remove = [i for i in symbol_table.symbols.keys() if i not in symb.symbols.keys()]
-        for i in keys_to_remove:
-            symbol_table.remove(i)       
-    def visit_Fornode(self,node):
-        symb=SymbolTable()
-        symb.copy(symbol_table) 
-        self.visit(node.decl)
-        while(self.visit(node.cond)):
-            for cases in node.expressions:
-                self.visit(cases) 
-                self.visit(node.inc)
-        keys_to_remove = [i for i in symbol_table.symbols.keys() if i not in symb.symbols.keys()]
-        for i in keys_to_remove:
-            symbol_table.remove(i)      
-
-    def visit_givenode(self,node):
-        value=self.visit(node.token)
-        print(value)
-
-    def interpret(self):
-        return self.visit(self.tree)
-    
-    
-            
-#######################################
-# RUN
-#######################################
-
-def main():
-    parser = argparse.ArgumentParser(
-        description='SWASPI - Simple WASP Interpreter'
-    )
-    parser.add_argument('inputfile', help='WASP source file')
-    parser.add_argument(
-        '--scope',
-        help='Print scope information',
-        action='store_true',
-    )
-    args = parser.parse_args()
-    global _SHOULD_LOG_SCOPE
-    _SHOULD_LOG_SCOPE = args.scope
-
-    text = open(args.inputfile, 'r').read()
-    lexer = Lexer(text)
-    try:
-        tokens, error = lexer.make_tokens()
-    except Exception as e:
-        print(f"Error: {e}")
-    #print(tokens)
-    # try:    
-    # Parser(tokens).statement_list()
-    # except Exception as e:
-    #     print(f"Error: {e}")  
-    tree_list=   Parser(tokens).statement_list()
-    try:    
-        for i in tree_list:
-            Interpreter(i).interpret()
-    except Exception as e:
-        print(f"Error: {e}")   
- 
-
-if __name__ == '__main__':
-    main()
\ No newline at end of file
+import string 
+import sys
+import argparse
+import re
+import os
+import mmap
+import time
+import hashlib
+import copy
+import io
+import asyncio
+import json
+import collections
+import contextlib
+import concurrent.futures
+import signal
+import pickle
+import zlib
+import array
+import bisect
+from multiprocessing import shared_memory
+
+def custom_excepthook(exc_type, exc_value, exc_traceback):
+    print(f"Error: {exc_value}")
+
+sys.excepthook = custom_excepthook
+#######################################
+# CONSTANTS
+#######################################
+
+DIGITS = '0123456789'
+LETTERS = string.ascii_letters
+LETTERS_DIGITS = LETTERS + DIGITS
+
+#######################################
+# ERRORS
+#######################################
+
+class Error:
+    def __init__(self, pos_start, pos_end, error_name, details, source=None):
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+        self.error_name = error_name
+        self.details = details
+        self.source = source
+    
+    def as_string(self):
+        result  = f'{self.error_name}: {self.details}'
+        if self.source != None and self.pos_start != None:
+            result += f'\n{self.source.location(self.pos_start)}'
+        return result
+
+class IllegalCharError(Error):
+    def __init__(self, pos_start, pos_end, details, source=None):
+        super().__init__(pos_start, pos_end, 'Illegal Character', details, source)
+
+class InvalidSyntaxError(Error):
+    def __init__(self, pos_start, pos_end, details, source=None):
+        super().__init__(pos_start, pos_end, 'Invalid Syntax', details, source)
+
+class TypeCheckError(Error):
+    def __init__(self, pos_start, pos_end, details, source=None):
+        super().__init__(pos_start, pos_end, 'Type Error', details, source)
+
+class ModuleError(Error):
+    def __init__(self, pos_start, pos_end, details, source=None):
+        super().__init__(pos_start, pos_end, 'Module Error', details, source)
+
+class ParallelError(Error):
+    def __init__(self, pos_start, pos_end, details, source=None):
+        super().__init__(pos_start, pos_end, 'Parallel Error', details, source)
+
+class RTError(Error):
+	def __init__(self, pos_start, pos_end, details, context, source=None):
+		super().__init__(pos_start, pos_end, 'Runtime Error', details, source)
+		self.context = context
+
+	def as_string(self):
+		result  = self.generate_traceback()
+		result += f'{self.error_name}: {self.details}'
+		#result += '\n\n' + string_with_arrows(self.pos_start.ftxt, self.pos_start, self.pos_end)
+		return result
+
+	def generate_traceback(self):
+		result = ''
+		pos = self.pos_start
+		ctx = self.context
+
+		while ctx:
+			result = f'  {(ctx.source or self.source).location(pos)}, in {ctx.display_name}\n' + result
+			pos = ctx.parent_entry_pos
+			ctx = ctx.parent
+
+		return 'Traceback (most recent call last):\n' + result        
+
+class Context:
+    def __init__(self, display_name, parent=None, parent_entry_pos=None, source=None):
+        self.display_name = display_name
+        self.parent = parent
+        self.parent_entry_pos = parent_entry_pos
+        self.source = source  # file the context's code is in, if not the error's
+
+#######################################
+# POSITION
+#######################################
+
+# Tokens and nodes carry `pos`, the integer offset of their first character
+# in the source text. Lines and columns are only worked out, from the index
+# of line starts, when a position is reported.
+
+class SourceMap:
+    def __init__(self, text, fn='<program>'):
+        self.text = text
+        self.fn = fn
+        self.starts = None
+
+    def line_col(self, pos):
+        # 1-based line and column of an offset
+        if self.starts == None:
+            self.starts = [0] + [m.end() for m in re.finditer('\n', self.text)]
+        line = bisect.bisect_right(self.starts, pos)
+        return line, pos - self.starts[line - 1] + 1
+
+    def location(self, pos):
+        line, col = self.line_col(pos)
+        return f'File {self.fn}, line {line}, column {col}'
+
+#######################################
+# TOKENS
+#######################################
+
+INT_C = 'INT_CONST'
+DEC_C = 'DEC_CONST'
+INT_T='int'
+DEC_T='dec'
+BYTE_T='byte'
+PLUS = 'PLUS'
+MIN = 'MIN'
+DIV = 'DIV'
+MUL = 'MUL'
+MOD='MOD'
+DOT='DOT'
+LPAREN   = 'LPAREN'
+RPAREN   = 'RPAREN'
+ASSIGN='ASSIGN'
+SEMI='SEMI'
+COMP_E='EQUAL TO'
+COMP_GT='GREATER THAN'
+COMP_LT='LESS THAN'
+AND='and'
+NOT='not'
+OR='or'
+COMP_NE='NOT EQUAL'
+COMP_LTE				= 'LESS THAN EQUAL'
+COMP_GTE				= 'GREATER THAN EQUAL'
+COMMA='COMMA'
+ID='IDENTIFIER'
+KEYWORD='KEYWORD'
+IF='if'
+ELIF='elif'
+ELSE='else'
+WHILE='while'
+FOR='for'
+LBRACES='LBRACES'
+RBRACES='RBRACES'
+SLBRACES='SBRACES'
+SRBRACES='SRBRACES'
+COLON='COLON'
+WORD='word_const'
+WORD_T='word'
+GIVE='give'
+TAKE='take'
+CHAR='char'
+EOF='eof'
+USE='use'
+PARALLEL='parallel'
+
+class Token:
+    def __init__(self, type_, value=None, pos=None):
+        self.type = type_
+        self.value = value
+        self.pos = pos
+    
+    def __repr__(self):
+        if self.value: return f'{self.type}:{self.value}'
+        return f'{self.type}'
+
+# Shared token returned for every read past the end of the token list
+END_TOKEN = Token(None)
+
+########################################
+#RESERVED KEYWORDS# 
+####################################
+
+Keywords=[
+
+
+    'int',
+    'dec',
+    'byte',
+    'if',
+    'elif',
+    'else',
+    'while',
+    'for',
+    'or',
+    'and',
+    'not',
+    'word',
+    'give',
+    'take',
+    'char',
+    'eof',
+    'use',
+    'parallel'
+]
+
+#######################################
+# LEXER
+#######################################
+
+_SPACES = re.compile(r'[ \t\n]+')
+_IDENTIFIER = re.compile(r'[A-Za-z][A-Za-z0-9_]*')
+_NUMBER = re.compile(r'[0-9]+(?:\.[0-9]*)?')
+
+# Tokens made of one character
+SINGLE_CHAR_TOKENS = {
+    '+': PLUS, '-': MIN, '*': MUL, '/': DIV, '%': MOD,
+    '(': LPAREN, ')': RPAREN, '{': LBRACES, '}': RBRACES,
+    '[': SLBRACES, ']': SRBRACES, ':': COLON, ';': SEMI, '.': DOT,
+}
+
+class Lexer:
+    # `base` is added to every token position, for lexing a piece of a
+    # larger text
+    def __init__(self, text, fn='<program>', base=0):
+        self.fn = fn
+        self.text = text
+        self.base = base
+        self.pos = -1
+        self.current_char = None
+        self.advance()
+    
+    def advance(self):
+        self.pos += 1
+        self.current_char = self.text[self.pos] if self.pos < len(self.text) else None
+
+    def skip_to(self, end):
+        self.pos = end - 1
+        self.advance()
+
+    def error(self, pos_start, details):
+        # a piece of a larger text has no SourceMap of its own; the caller
+        # that knows the whole text sets it
+        source = SourceMap(self.text, self.fn) if self.base == 0 else None
+        return IllegalCharError(self.base + pos_start, self.base + self.pos, details, source)
+
+    def make_tokens(self):
+        tokens = []
+        
+        while self.current_char != None:
+            single = SINGLE_CHAR_TOKENS.get(self.current_char)
+            if single != None:
+                tokens.append(Token(single, None, self.base + self.pos))
+                self.advance()
+            elif self.current_char in ' \t\n':
+                self.skip_to(_SPACES.match(self.text, self.pos).end())
+            elif self.current_char in DIGITS:
+                tokens.append(self.make_number())
+            elif self.current_char in LETTERS:
+                tokens.append(self.make_identifier())    
+            elif self.current_char == ',':
+                tokens.append(Token(COMMA, ',', self.base + self.pos))   
+                self.advance()
+            elif self.current_char == '=':
+                tokens.append(self.make_equals())
+            elif self.current_char == '!':
+                pos_start = self.pos
+                self.advance()
+                if self.current_char != '=':
+                    return [], self.error(pos_start, "Expected '=' after '!'")
+                self.advance()
+                tokens.append(Token(COMP_NE, None, self.base + pos_start))
+            elif self.current_char == '>':
+                tokens.append(self.make_greater_than())  
+            elif self.current_char == '<':
+                tokens.append(self.make_less_than()) 
+            elif self.current_char == '"':
+                pos_start = self.pos
+                token = self.make_string()
+                if token == None:
+                    return [], self.error(pos_start, 'Unterminated string')
+                tokens.append(token)          
+            else:
+                pos_start = self.pos
+                char = self.current_char
+                self.advance()
+                return [], self.error(pos_start, "'" + char + "'")
+
+        return tokens, None
+    
+    def peek(self):
+        peek_pos = self.pos + 1
+        if peek_pos > len(self.text) - 1:
+            return None
+        else:
+            return self.text[peek_pos]
+
+    def make_string(self):
+        pos_start = self.base + self.pos
+        end = self.text.find('"', self.pos + 1)
+        if end < 0:
+            return None
+        id_str = self.text[self.pos + 1:end]
+        self.pos = end
+        self.advance()  
+        return Token(WORD,id_str,pos_start)
+        
+    def make_identifier(self):
+            pos_start = self.base + self.pos
+            match = _IDENTIFIER.match(self.text, self.pos)
+            id_str = match.group()
+            self.skip_to(match.end())
+
+            tok_type = id_str if id_str in Keywords else ID
+            tok_value = None if id_str in Keywords else id_str
+            return Token(tok_type,tok_value,pos_start)        
+    def make_number(self):
+        pos_start = self.base + self.pos
+        match = _NUMBER.match(self.text, self.pos)
+        num_str = match.group()
+        self.skip_to(match.end())
+
+        if '.' not in num_str:
+            return Token(INT_C, int(num_str), pos_start)
+        else:
+            return Token(DEC_C, float(num_str), pos_start)
+	
+    def make_equals(self):
+        tok_type = ASSIGN
+        pos_start = self.base + self.pos
+        self.advance()
+
+        if self.current_char == '=':
+            self.advance()
+            tok_type = COMP_E
+
+        return Token(tok_type, None, pos_start)
+
+    def make_less_than(self):
+        tok_type = COMP_LT
+        pos_start = self.base + self.pos
+        self.advance()
+
+        if self.current_char == '=':
+            self.advance()
+            tok_type = COMP_LTE
+
+        return Token(tok_type, None, pos_start)
+
+    def make_greater_than(self):
+        tok_type = COMP_GT
+        pos_start = self.base + self.pos
+        self.advance()
+
+        if self.current_char == '=':
+            self.advance()
+            tok_type = COMP_GTE
+
+        return Token(tok_type, None, pos_start)        
+
+#######################################
+#NODES
+########################################\
+class Numnode:
+    def __init__(self,token):
+        self.token=token
+        self.type=token.type
+        self.value=token.value
+        self.pos=token.pos
+    def __repr__(self):
+        return f'{self.type}:{self.value}'
+class Binnode:
+    def __init__(self,left,op,right):
+        self.left=left
+        self.op=op
+        self.right=right
+    def __repr__(self):
+        return f'({self.left},{self.op},{self.right})'
+
+######################################
+class VarNode:
+    def __init__(self, var_name):
+        self.var_name = var_name
+        # inline cache filled by SymbolTable.bind
+        self.cache_table = None
+        self.cache_version = -1
+        self.cache_holder = None
+
+    def __getstate__(self):
+        # the inline cache points into a live symbol table
+        state = self.__dict__.copy()
+        state['cache_table'] = state['cache_holder'] = None
+        state['cache_version'] = -1
+        return state
+
+    def __repr__(self):
+        return f'(Var {self.var_name})'
+    
+class VarAssignNode:
+    def __init__(self, var_name, value_node, var_type=None):
+        self.var_type = var_type  # Type (e.g., int)
+        self.var_name = var_name  # Variable name (e.g., a)
+        self.value_node = value_node  # Assigned value (e.g., 2)
+        self.pos = None
+        self.proven = False  # set by typecheck: value needs no conversion
+        # inline cache filled by SymbolTable.bind
+        self.cache_table = None
+        self.cache_version = -1
+        self.cache_holder = None
+        self.cache_coerce = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['cache_table'] = state['cache_holder'] = state['cache_coerce'] = None
+        state['cache_version'] = -1
+        return state
+
+    def __repr__(self):
+        return f'(Var {self.var_type} {self.var_name} = {self.value_node})'
+    
+class ArrayAssignNode:
+    def __init__(self, var_name, value_node, var_type=None):
+        self.var_type = var_type  # Type (e.g., int)
+        self.var_name = var_name  # Variable name (e.g., a)
+        self.value_node = value_node  # Assigned value (e.g., 2)
+        self.pos = None
+        self.proven = False  # set by typecheck: elements need no conversion
+
+    def __repr__(self):
+        return f'(Var {self.var_type} {self.var_name} = {self.value_node})'
+    
+class UnaryOpNode:
+	def __init__(self, op_tok, node):
+		self.op_tok = op_tok
+		self.node = node
+
+		# self.pos_start = self.op_tok.pos_start
+		# self.pos_end = node.pos_end
+
+	def __repr__(self):
+		return f'({self.op_tok}, {self.node})'
+
+class Ifnode:
+    def __init__(self,cases,elsecase):
+        self.elsecase = elsecase
+        self.cases = cases
+
+    def __repr__(self):
+        return f'({self.cases}, {self.elsecase})'    
+    
+
+class Whilenode:
+    def __init__(self,condition,expressions):
+        self.condition = condition
+        self.expressions = expressions
+        self.hits = 0  # iterations run on the tree-walker
+        self.compiled = None
+
+    def __repr__(self):
+        return f'({self.expressions}, {self.condition})'  
+    
+class Fornode:
+        def __init__(self,decl,cond,inc,expressions):
+            self.decl = decl
+            self.cond = cond
+            self.inc=inc
+            self.expressions=expressions
+            self.hits = 0
+            self.compiled = None
+            self.parallel = False  # written as parallel for
+            self.plan = None  # ParallelPlan, or False to run it serially
+
+class blocknode:
+      def __init__(self,statements):
+        self.statements=statements
+
+      def __repr__(self):
+        return f'({self.statements})' 
+     
+class stringnode:
+    def __init__(self,token):
+        self.value=token.value
+        self.type=token.type
+        self.pos=token.pos
+
+class givenode:
+    def __init__(self,token):
+        self.token=token
+
+    def __repr__(self):
+        return f'(print {self.token.value})' 
+
+class arraynode:
+    def __init__(self,expressions,num):
+        self.expressions=expressions
+        self.num=num
+
+class arrayvalnode:
+    def __init__(self,var_name,idx):
+        self.var_name=var_name
+        self.idx=idx
+        self.safe=False  # set by prove_bounds: the index is always in range
+
+class arraysingularassignnode:
+    def __init__(self,var_name,idx,val):
+        self.var_name=var_name
+        self.idx=idx
+        self.pos=None
+        self.value=val
+        self.safe=False  # set by prove_bounds: the index is always in range
+
+class typecastnode:
+    def __init__(self,val):
+        self.value=val
+
+class takenode:
+    def __init__(self,kind=None):
+        self.kind=kind  # None (byte), char, word (line), int or dec
+
+    def __repr__(self):
+        return f'(take {self.kind})'
+
+class eofnode:
+    def __repr__(self):
+        return '(eof)'
+
+class slicenode:
+    def __init__(self,var_name,start,stop):
+        self.var_name=var_name
+        self.start=start
+        self.stop=stop
+
+class sliceassignnode:
+    def __init__(self,var_name,start,stop,val):
+        self.var_name=var_name
+        self.pos=None
+        self.start=start
+        self.stop=stop
+        self.value=val
+
+class callnode:
+    def __init__(self,name,args):
+        self.name=name
+        self.args=args
+
+    def __repr__(self):
+        return f'(call {self.name} {self.args})'
+
+class usenode:
+    # use "path"; link_modules() fills in the module it names
+    def __init__(self,path):
+        self.path=path
+        self.pos=None
+        self.module=None
+
+    def __repr__(self):
+        return f'(use {self.path})'
+
+class hoistnode:
+    # Loop-invariant expression. Evaluated on first use after its loop is
+    # entered and reused for the rest of that execution of the loop.
+    def __init__(self,expr):
+        self.expr=expr
+        self.pos=expr.pos
+        self.valid=False
+        self.value=None
+
+class hoistscopenode:
+    # Wraps a loop whose invariant expressions were hoisted
+    def __init__(self,loop,hoisted):
+        self.loop=loop
+        self.pos=loop.pos
+        self.hoisted=hoisted
+
+class inductionnode:
+    # var * factor where var is a loop induction variable and factor a
+    # hoisted invariant: one multiply, without the Binnode dispatch
+    def __init__(self,var_name,factor,var_first):
+        self.var_name=var_name
+        self.factor=factor
+        self.var_first=var_first
+
+class csedefnode:
+    # First read of an array element that is read again later in the same
+    # straight-line code; the value is kept for the cseusenodes.
+    def __init__(self,read):
+        self.read=read
+        self.pos=read.pos
+        self.value=None
+        self.uses=0
+
+class cseusenode:
+    def __init__(self,source):
+        self.source=source
+        self.pos=source.pos
+
+# class VarDeclNode:
+#     def __init__(self, var_type, var_name, value_node):
+#         self.var_type = var_type  # Type (e.g., int)
+#         self.var_name = var_name  # Variable name (e.g., a)
+#         self.value_node = value_node  # Assigned value (e.g., 2)
+
+#     def __repr__(self):
+#         return f'(VarDecl {self.var_type} {self.var_name} = {self.value_node})'
+
+#######################################
+#PARSER
+#######################################
+# Binding power of the binary operators handled by Parser.comp_exprs.
+# Prefix - and + take everything up to the next comparison as their operand
+# and prefix not takes a whole comparison chain.
+BINARY_PREC = {
+    COMP_E: 1, COMP_NE: 1, COMP_LT: 1, COMP_GT: 1, COMP_LTE: 1, COMP_GTE: 1,
+    PLUS: 2, MIN: 2,
+    MUL: 3, DIV: 3, MOD: 3,
+}
+SIGN_PREC = 1.5
+NOT_PREC = 0.5
+
+class ExprFrame:
+    # One pending bracketed context of the iterative expression parser:
+    # the top level, (...), char(...), a call's argument, a[...] or a[i:...]
+    __slots__ = ('kind', 'ops', 'vals', 'want_operand', 'allow_not', 'name', 'data', 'token')
+
+    def __init__(self, kind, name=None, data=None, token=None):
+        self.kind = kind
+        self.token = token  # the token the frame's node is placed at
+        self.ops = []
+        self.vals = []
+        self.want_operand = True
+        self.allow_not = True
+        self.name = name
+        self.data = data
+
+    def reduce(self, prec):
+        ops = self.ops
+        vals = self.vals
+        while ops and ops[-1][0] >= prec:
+            _, token, prefix = ops.pop()
+            if prefix:
+                vals.append(at(UnaryOpNode(token, vals.pop()), token))
+            else:
+                right = vals.pop()
+                vals.append(at(Binnode(vals.pop(), token, right), token))
+
+    def finish(self):
+        self.reduce(0)
+        return self.vals[0]
+
+def at(node, token):
+    # Give a node the source position of the token it starts at
+    node.pos = token.pos
+    return node
+
+class Parser:
+    def __init__(self,tokens):
+        self.tokens=tokens
+        self.current_token=tokens[0] if tokens else END_TOKEN
+        self.idx=0
+        self.parallel_loops=[]  # checked by parse_text once parsed
+    def next_token(self):
+        self.idx+=1
+        if(self.idx<len(self.tokens)):
+            self.current_token=self.tokens[self.idx]
+        else:
+            self.current_token=END_TOKEN
+    def peek_next_token(self):
+        if self.idx + 1 < len(self.tokens):
+            return self.tokens[self.idx + 1]
+        return END_TOKEN
+            
+    def block(self):
+        if self.current_token.type == LBRACES:
+            start = self.current_token
+            self.next_token()
+            statements=self.statement_list()
+            if self.current_token.type != RBRACES:
+                raise Exception("Expected right braces")
+            self.next_token()
+            return at(blocknode(statements), start)
+        return self.statement()    
+
+
+    def statement_list(self):
+        node = self.statement()
+
+        results = [node]
+        while self.current_token.type == SEMI and self.peek_next_token().type!= RBRACES and self.peek_next_token().type!=None:
+            self.next_token()
+            results.append(self.statement())
+        if self.current_token.type != SEMI:
+            raise Exception("Expected semicolon")    
+        self.next_token()
+        return results
+
+    def statement(self):
+        if self.current_token.type in (INT_T, DEC_T, BYTE_T, WORD_T):
+            node = self.parse_var_decl()
+        elif self.current_token.type == ID and self.peek_next_token().type==LPAREN:
+            node = self.comp_exprs()
+        elif self.current_token.type == ID and self.peek_next_token().type!=SLBRACES:
+            node = self.parse_var_decl()
+        elif self.current_token.type == ID and self.peek_next_token().type==SLBRACES:
+            node = self.parse_array_decl()
+        elif self.current_token.type == GIVE:
+            node = self.parse_give()
+        elif self.current_token.type == USE:
+            node = self.parse_use()
+        elif self.current_token.type == PARALLEL:
+            node = self.parse_parallel()
+        elif self.current_token.type == IF:
+            node = self.ifexprs()
+        elif self.current_token.type == WHILE:
+            node = self.whileexprs()
+        elif self.current_token.type == FOR:
+            node = self.forexprs()
+        elif self.current_token.type==LBRACES:
+            node=self.block()
+        else:
+            raise Exception(f"Syntax error - {self.current_token}")
+        return node
+    
+    def forexprs(self):
+        if self.current_token.type == FOR:  # Look for 'for'
+            start = self.current_token
+            self.next_token()
+            if self.current_token.type != 'LPAREN':
+                raise Exception("Expected '(' after 'for'")
+            self.next_token()
+            decl = self.parse_var_decl()  # Parse condition inside parentheses
+            if self.current_token.type != SEMI:
+                raise Exception("Expected ';' at the end of the statement")
+            self.next_token()
+            cond=self.comp_exprs()
+            if self.current_token.type != SEMI:
+                raise Exception("Expected ';' at the end of the statement")
+            self.next_token()
+            inc=self.parse_var_decl()
+            if self.current_token.type != 'RPAREN':
+                raise Exception("Expected ')' after condition")
+            self.next_token()
+            if self.current_token.type != LBRACES:
+                raise Exception("Expected left braces")
+            self.next_token()
+            node = self.ifexprs()
+
+            expressions = [node]
+
+            while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
+                self.next_token()
+                expressions.append(self.ifexprs())
+            if self.current_token.type != SEMI:
+                raise Exception("Expected semicolon")    
+            self.next_token()
+            if self.current_token.type != RBRACES:
+                raise Exception("Expected right braces")
+            self.next_token()
+            return at(Fornode(decl,cond,inc,expressions), start)
+        return(self.statement())
+    
+    
+    def whileexprs(self):
+        if self.current_token.type == WHILE: 
+            start = self.current_token
+            self.next_token()
+            if self.current_token.type != 'LPAREN':
+                raise Exception("Expected '(' after 'while'")
+            self.next_token()
+            condition = self.comp_exprs()  # Parse condition inside parentheses
+            if self.current_token.type != 'RPAREN':
+                raise Exception("Expected '(' after 'while'")
+            self.next_token()
+            if self.current_token.type != LBRACES:
+                raise Exception("Expected left braces")
+            self.next_token()
+            node = self.ifexprs()
+            expressions = [node]
+
+            while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
+                self.next_token()
+                expressions.append(self.ifexprs())
+            if self.current_token.type != SEMI:
+                raise Exception("Expected semicolon")    
+            self.next_token()
+            if self.current_token.type != RBRACES:
+                raise Exception("Expected right braces")
+            self.next_token()
+            return at(Whilenode(condition,expressions), start)
+        return(self.statement())
+
+    def ifexprs(self):
+        cases=[]
+        elsecase=None
+        if self.current_token.type == IF:  
+            start = self.current_token
+            self.next_token()
+            if self.current_token.type != 'LPAREN':
+                raise Exception("Expected '(' after 'if'")
+            self.next_token()
+            condition = self.comp_exprs()  # Parse condition inside parentheses
+            if self.current_token.type != 'RPAREN':
+                raise Exception("Expected '(' after 'if'")
+            self.next_token()
+            if self.current_token.type != LBRACES:
+                raise Exception("Expected left braces")
+            self.next_token()
+            node = self.statement()
+
+            expressions = [node]
+
+            while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
+                self.next_token()
+                expressions.append(self.statement())
+            if self.current_token.type != SEMI:
+                raise Exception("Expected semicolon")
+            self.next_token()
+            if self.current_token.type != RBRACES:
+                raise Exception("Expected right braces")
+            self.next_token()
+            cases.append([condition,expressions])
+            while self.current_token.type == ELIF: 
+                self.next_token()
+                if self.current_token.type != 'LPAREN':
+                    raise Exception("Expected '(' after 'elif'")
+                self.next_token()
+                condition = self.comp_exprs()  # Parse condition inside parentheses
+                if self.current_token.type != 'RPAREN':
+                    raise Exception("Expected '(' after 'elif'")
+                self.next_token()
+                if self.current_token.type != LBRACES:
+                    raise Exception("Expected left braces")
+                self.next_token()
+                node = self.statement()
+                expressions = [node]
+                while self.current_token.type == SEMI and self.peek_next_token().type != RBRACES:
+                    self.next_token()
+                    expressions.append(self.statement())
+                if self.current_token.type != SEMI:
+                    raise Exception("Expected semicolon")    
+                self.next_token()
+                if self.current_token.type != RBRACES:
+                    raise Exception("Expected right braces")
+                self.next_token()
+                cases.append([condition,expressions])
+            if self.current_token.type == ELSE:  # Look for 'int' or 'dec'
+                self.next_token()
+                if self.current_token.type != LBRACES:
+                    raise Exception("Expected variable name")
+                self.next_token()
+                node = self.statement()
+
+                expressions = [node]
+
+                while self.current_token.type == SEMI and self.peek_next_token().type!= RBRACES:
+                    self.next_token()
+                    expressions.append(self.statement())
+                if self.current_token.type != SEMI:
+                    raise Exception("Expected semicolon")    
+                self.next_token()
+                if self.current_token.type != RBRACES:
+                    raise Exception("Expected right braces")
+                self.next_token()
+                elsecase=expressions
+            return at(Ifnode(cases,elsecase), start)
+        return(self.statement())
+
+    def parse_var_decl(self):
+        if self.current_token.type in (INT_T, DEC_T, BYTE_T):
+            var_type = self.current_token.type
+            self.next_token()
+            var_name = self.current_token  # Variable name
+            if var_name.type != ID:
+                raise Exception("Expected variable name")
+            self.next_token()
+            if var_type==DEC_T:
+                value_node=Numnode(Token(DEC_C,0.0)) 
+            else:
+                value_node = Numnode(Token(INT_C,0)) 
+            if self.current_token.type == ASSIGN:
+                self.next_token()
+                value_node = self.comp_exprs()
+            elif self.current_token.type==SLBRACES:
+                self.next_token()
+                num = self.comp_exprs()
+                if self.current_token.type != SRBRACES:
+                    raise Exception('Expected square bracket')
+                self.next_token()
+                expressions=None
+                if self.current_token.type == ASSIGN:
+                    self.next_token()
+                    if self.current_token.type==LBRACES:
+                        self.next_token()
+                        element_node = self.comp_exprs()
+                        expressions = [element_node]
+                        while self.current_token.type == COMMA :
+                            self.next_token()
+                            expressions.append(self.comp_exprs())
+                        if self.current_token.type != RBRACES:
+                            raise Exception('Expected curly bracket')
+                        self.next_token()
+                    else:
+                           raise Exception('Expected curly bracket')
+
+                value_node=   at(arraynode(expressions,num), var_name)
+
+                return at(ArrayAssignNode(var_name.value, value_node,var_type),var_name)    
+            return at(VarAssignNode(var_name.value,value_node,var_type),var_name)
+        elif self.current_token.type == WORD_T:
+            self.next_token()
+            var_name = self.current_token  # Variable name
+            if var_name.type != ID:
+                raise Exception("Expected variable name")
+            self.next_token()
+            value_node=stringnode(Token(WORD,""))
+            if self.current_token.type == ASSIGN:
+                self.next_token()
+                # if self.current_token.type!=WORD :
+                #     if self.current_token.type!=CHAR:
+                #         raise Exception("Expected double quotes")
+                # if self.current_token.type==CHAR:
+                value_node=self.type_cast()
+                # else:    
+                #     value_node = stringnode(self.current_token)
+                #     self.next_token()
+            return at(VarAssignNode(var_name.value,value_node,WORD_T),var_name)
+            # if self.current_token.type != SEMI:
+            #     raise Exception("Expected ';' at the end of the statement")
+            # self.next_token()
+        
+        elif self.current_token.type == ID:
+            var_name = self.current_token
+            self.next_token()
+            if self.current_token.type == ASSIGN:
+                self.next_token()
+                value_node = self.type_cast()    
+
+            # if self.current_token.type != SEMI:
+            #     raise Exception("Expected ';' at the end of the statement")
+            # self.next_token()
+        
+                return at(VarAssignNode( var_name.value, value_node),var_name)
+        else:
+            node =self.comp_exprs()
+            while self.current_token.type is not None and self.current_token.type in ('and', 'or'):
+                token= self.current_token
+                self.next_token()
+                node =at(Binnode (node,token,self.comp_exprs()), token)
+            return node  # Handle other expressions
+        
+    def parse_subscript(self):
+        # Parses the inside of [...] after the '[': an index, or a slice
+        # i:j where either bound may be left out.
+        start=None
+        if self.current_token.type!=COLON:
+            start=self.comp_exprs()
+        if self.current_token.type!=COLON:
+            if self.current_token.type!=SRBRACES:
+                raise Exception('expected right square braces')
+            self.next_token()
+            return start,None,False
+        self.next_token()
+        stop=None
+        if self.current_token.type!=SRBRACES:
+            stop=self.comp_exprs()
+        if self.current_token.type!=SRBRACES:
+            raise Exception('expected right square braces')
+        self.next_token()
+        return start,stop,True
+
+    def parse_array_decl(self):
+        name_token=self.current_token
+        var_name=name_token.value
+        self.next_token()
+        self.next_token()
+        n,stop,is_slice=self.parse_subscript()
+        if self.current_token.type!=ASSIGN:
+            if is_slice:
+                return at(slicenode(var_name,n,stop),name_token)
+            return at(arrayvalnode(var_name,n),name_token)
+        elif self.current_token.type==ASSIGN:
+            self.next_token()
+            val=self.comp_exprs()
+            if is_slice:
+                return at(sliceassignnode(var_name,n,stop,val),name_token)
+            return at(arraysingularassignnode(var_name,n,val),name_token)
+        else:
+            raise Exception("Sytax Error")
+        
+    def parse_give(self):
+        if self.current_token.type== GIVE:
+            start = self.current_token
+            self.next_token()
+            if self.current_token.type!=LPAREN:
+                raise Exception('Expected Left Braces')
+            self.next_token()
+            node = self.comp_exprs()
+            if self.current_token.type!=RPAREN:
+                raise Exception('Expected Right Braces')
+            self.next_token()    
+            return at(givenode(node), start)
+        return self.statement()        
+
+    def parse_use(self):
+        start = self.current_token
+        self.next_token()
+        if self.current_token.type!=WORD:
+            raise Exception('Expected a module path in double quotes')
+        path = self.current_token.value
+        self.next_token()
+        return at(usenode(path), start)
+
+    def parse_parallel(self):
+        start = self.current_token
+        self.next_token()
+        if self.current_token.type!=FOR:
+            raise Exception("Expected 'for' after 'parallel'")
+        node = self.forexprs()
+        node.parallel = True
+        self.parallel_loops.append(node)
+        return at(node, start)
+
+    def make_call(self,name,args,token):
+        _, min_args, max_args = BUILTINS[name]
+        if not min_args <= len(args) <= max_args:
+            raise Exception(f'{name}() takes {min_args} to {max_args} arguments, got {len(args)}')
+        return at(callnode(name,args),token)
+
+    def expect(self,token_type,message):
+        if self.current_token.type!=token_type:
+            raise Exception(message)
+        self.next_token()
+
+    def type_cast(self):
+        if self.current_token.type== CHAR:
+            start = self.current_token
+            self.next_token()
+            if self.current_token.type!=LPAREN:
+                raise Exception('expected parenthesis')
+            self.next_token()
+            val=self.comp_exprs()
+            if self.current_token.type!=RPAREN:
+                raise Exception('expected parenthesis')
+            self.next_token()
+            return at(typecastnode(val), start)
+        return self.comp_exprs()
+
+
+    def comp_exprs(self):
+        # Iterative precedence climbing over an explicit stack of frames, so
+        # neither long operator chains nor deep nesting recurse in Python.
+        frames=[ExprFrame(None)]
+        frame=frames[0]
+        while True:
+            token=self.current_token
+            if frame.want_operand:
+                operand=None
+                if token.type==NOT and frame.allow_not:
+                    self.next_token()
+                    frame.ops.append((NOT_PREC,Token(NOT,None,token.pos),True))
+                    continue
+                elif token.type==MIN or token.type==PLUS:
+                    self.next_token()
+                    frame.ops.append((SIGN_PREC,token,True))
+                    frame.allow_not=False
+                    continue
+                elif token.type==INT_C or token.type==DEC_C:
+                    self.next_token()
+                    operand=at(Numnode(token),token)
+                elif token.type==WORD:
+                    self.next_token()
+                    operand=at(stringnode(token),token)
+                elif token.type==LPAREN:
+                    self.next_token()
+                    frame=ExprFrame(LPAREN)
+                    frames.append(frame)
+                    continue
+                elif token.type==CHAR:
+                    self.next_token()
+                    self.expect(LPAREN,'expected parenthesis')
+                    frame=ExprFrame(CHAR,token=token)
+                    frames.append(frame)
+                    continue
+                elif token.type==TAKE:
+                    self.next_token()
+                    self.expect(LPAREN,'expected parenthesis')
+                    kind=None
+                    if self.current_token.type in (CHAR,WORD_T,INT_T,DEC_T):
+                        kind=self.current_token.type
+                        self.next_token()
+                    self.expect(RPAREN,'expected parenthesis')
+                    operand=at(takenode(kind),token)
+                elif token.type==EOF:
+                    self.next_token()
+                    self.expect(LPAREN,'expected parenthesis')
+                    self.expect(RPAREN,'expected parenthesis')
+                    operand=at(eofnode(),token)
+                elif token.type==ID:
+                    var=token.value
+                    self.next_token()
+                    if self.current_token.type==LPAREN:
+                        if var not in BUILTINS:
+                            raise Exception(f'Unknown function {var}')
+                        self.next_token()
+                        if self.current_token.type==RPAREN:
+                            self.next_token()
+                            operand=self.make_call(var,[],token)
+                        else:
+                            frame=ExprFrame(COMMA,var,[],token)
+                            frames.append(frame)
+                            continue
+                    elif self.current_token.type==SLBRACES:
+                        self.next_token()
+                        if self.current_token.type!=COLON:
+                            frame=ExprFrame(SLBRACES,var,token=token)
+                            frames.append(frame)
+                            continue
+                        self.next_token()
+                        if self.current_token.type==SRBRACES:
+                            self.next_token()
+                            operand=at(slicenode(var,None,None),token)
+                        else:
+                            frame=ExprFrame(COLON,var,token=token)
+                            frames.append(frame)
+                            continue
+                    else:
+                        operand=at(VarNode(var),token)
+                else:
+                    raise Exception(f"Unexpected token: {token}")
+                frame.vals.append(operand)
+                frame.want_operand=False
+                continue
+
+            prec=BINARY_PREC.get(token.type)
+            if prec!=None:
+                frame.reduce(prec)
+                frame.ops.append((prec,token,False))
+                self.next_token()
+                frame.want_operand=True
+                frame.allow_not=False
+                continue
+
+            # the current frame's expression ends here
+            node=frame.finish()
+            kind=frame.kind
+            frames.pop()
+            if kind==None:
+                return node
+            elif kind==LPAREN:
+                self.expect(RPAREN,"Expected ')'")
+            elif kind==CHAR:
+                self.expect(RPAREN,'expected parenthesis')
+                node=at(typecastnode(node),frame.token)
+            elif kind==COMMA:
+                frame.data.append(node)
+                if self.current_token.type==COMMA:
+                    self.next_token()
+                    frame=ExprFrame(COMMA,frame.name,frame.data,frame.token)
+                    frames.append(frame)
+                    continue
+                self.expect(RPAREN,'expected parenthesis')
+                node=self.make_call(frame.name,frame.data,frame.token)
+            elif kind==SLBRACES:
+                if self.current_token.type==COLON:
+                    self.next_token()
+                    if self.current_token.type!=SRBRACES:
+                        frame=ExprFrame(COLON,frame.name,node,frame.token)
+                        frames.append(frame)
+                        continue
+                    self.next_token()
+                    node=at(slicenode(frame.name,node,None),frame.token)
+                else:
+                    self.expect(SRBRACES,'expected right square braces')
+                    node=at(arrayvalnode(frame.name,node),frame.token)
+            elif kind==COLON:
+                self.expect(SRBRACES,'expected right square braces')
+                node=at(slicenode(frame.name,frame.data,node),frame.token)
+            frame=frames[-1]
+            frame.vals.append(node)
+            frame.want_operand=False
+
+
+#######################################################################
+#######################################################################
+
+
+class Value:
+    def __init__(self):
+        self.set_pos()
+        self.set_context()
+
+    def set_pos(self, pos_start=None, pos_end=None):
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+        return self
+
+    def set_context(self, context=None):
+        self.context = context
+        return self
+
+    def added_to(self, other):
+        return None, self.illegal_operation(other)
+
+    def subbed_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def multed_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def dived_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def powed_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def get_comparison_eq(self, other):
+        return None, self.illegal_operation(other)
+
+    def get_comparison_ne(self, other):
+        return None, self.illegal_operation(other)
+
+    def get_comparison_lt(self, other):
+        return None, self.illegal_operation(other)
+
+    def get_comparison_gt(self, other):
+        return None, self.illegal_operation(other)
+
+    def get_comparison_lte(self, other):
+        return None, self.illegal_operation(other)
+
+    def get_comparison_gte(self, other):
+        return None, self.illegal_operation(other)
+
+    def anded_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def ored_by(self, other):
+        return None, self.illegal_operation(other)
+
+    def notted(self):
+        return None, self.illegal_operation()
+
+
+    def copy(self):
+        raise Exception('No copy method defined')
+
+    def is_true(self):
+        return False
+
+    def illegal_operation(self, other=None):
+        if not other: other = self
+        return RTError(
+            self.pos_start, other.pos_end,
+            'Illegal operation',
+            self.context
+        )
+
+class Number(Value):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    def added_to(self, other):
+        if isinstance(other, Number):
+            return Number(self.value + other.value).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def subbed_by(self, other):
+        if isinstance(other, Number):
+            return Number(self.value - other.value).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def multed_by(self, other):
+        if isinstance(other, Number):
+            return Number(self.value * other.value).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def dived_by(self, other):
+        if isinstance(other, Number):
+            if other.value == 0:
+                return None, RTError(
+                    other.pos_start, other.pos_end,
+                    'Division by zero',
+                    self.context
+                )
+
+            return Number(self.value / other.value).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def powed_by(self, other):
+        if isinstance(other, Number):
+            return Number(self.value ** other.value).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def get_comparison_eq(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value == other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def get_comparison_ne(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value != other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def get_comparison_lt(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value < other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def get_comparison_gt(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value > other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def get_comparison_lte(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value <= other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def get_comparison_gte(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value >= other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def anded_by(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value and other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def ored_by(self, other):
+        if isinstance(other, Number):
+            return Number(int(self.value or other.value)).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def notted(self):
+        return Number(1 if self.value == 0 else 0).set_context(self.context), None
+
+    def copy(self):
+        copy = Number(self.value)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def is_true(self):
+        return self.value != 0
+
+    def __repr__(self):
+        return str(self.value)
+
+class String(Value):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
+    def added_to(self, other):
+        if isinstance(other, String):
+            return String(self.value + other.value).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def multed_by(self, other):
+        if isinstance(other, Number):
+            return String(self.value * other.value).set_context(self.context), None
+        else:
+            return None, Value.illegal_operation(self, other)
+
+    def is_true(self):
+        return len(self.value) > 0
+
+    def copy(self):
+        copy = String(self.value)
+        copy.set_pos(self.pos_start, self.pos_end)
+        copy.set_context(self.context)
+        return copy
+
+    def __repr__(self):
+        return f'"{self.value}"'
+
+
+#######################################
+# SYMBOL TABLE
+#######################################
+
+class SymbolTable:
+    def __init__(self):
+        self.symbols = {}
+        self.types = {}       
+        self.parent = None
+        # path -> namespace of every module run so far, shared with the
+        # namespaces of those modules; name -> path of the module it came from
+        self.modules = {}
+        self.imported = {}
+        # bumped whenever the set of names changes; inline caches on
+        # VarNode/VarAssignNode are only trusted while it is unchanged
+        self.version = 0
+
+    def get(self, name):
+        value = self.symbols.get(name)
+        if value is None and self.parent is not None:
+           return self.parent.get(name)
+        return value
+    
+    def gettype(self, name):
+        type_ = self.types.get(name)
+        if type_ is None and self.parent is not None:
+          return self.parent.gettype(name)
+        return type_    
+
+    def bind(self, node):
+        # Remember that node.var_name lives in this table. Names found in a
+        # parent are not cached, so a later shadowing declaration here
+        # cannot be missed.
+        if node.var_name not in self.symbols:
+            return False
+        node.cache_table = self
+        node.cache_version = self.version
+        node.cache_holder = self.symbols
+        return True
+
+    def lookup(self, node):
+        if self.bind(node):
+            return self.symbols[node.var_name]
+        return self.get(node.var_name)
+
+    def set(self, name, value):
+        if name not in self.symbols:
+            self.version += 1
+        self.symbols[name] = value
+
+    def settype(self, name, _type):
+        self.types[name] = _type            
+        self.version += 1
+
+    def remove(self, name):
+        del self.symbols[name]
+        del self.types[name]
+        self.version += 1
+        if mem_tracker:
+            mem_tracker.forget(name)
+
+    def copy(self,symb):
+        self.symbols=symb.symbols.copy()
+        self.types=symb.types.copy()
+        self.version += 1
+
+def to_byte(value):
+    # byte variables and elements wrap around modulo 256
+    return int(value) % 256
+
+def store_item(arr, idx, val):
+    # a bytearray only rejects values outside 0..255; wrap those
+    try:
+        arr[idx] = val
+    except (TypeError, ValueError):
+        if arr.__class__ is not bytearray:
+            raise
+        arr[idx] = to_byte(val)
+
+def index_error(node, seq, idx):
+    # An element access outside seq, located at the access itself
+    e = Exception(f'index {idx} out of range for {node.var_name} (length {len(seq)})')
+    tag_error(e, node)
+    return e
+
+def checked_item(node, seq, idx):
+    # seq[idx] for 0 <= idx < len(seq); Python would count a negative idx
+    # from the end
+    if idx >= 0:
+        try:
+            return seq[idx]
+        except IndexError:
+            pass
+    raise index_error(node, seq, idx)
+
+def check_bounds(node, seq, idx):
+    if not 0 <= idx < len(seq):
+        raise index_error(node, seq, idx)
+
+def byte_array(values):
+    if values.__class__ is PagedArray:
+        return bytearray(len(values))
+    return bytearray([to_byte(value) for value in values])
+
+# coercion applied when assigning to a variable of each declared type
+ASSIGN_COERCE = {INT_T: int, DEC_T: float, BYTE_T: to_byte, WORD_T: lambda value: value}
+       
+
+
+#######################################
+# INPUT
+#######################################
+
+INPUT_BUFSIZE = 1 << 20
+_WHITESPACE = re.compile(rb'\s*')
+_NONSPACE = re.compile(rb'\S*')
+
+class InputStream:
+    # Reads through one large buffer so that byte-at-a-time takes are
+    # amortized O(1) and arbitrarily large inputs stream in a single pass.
+    def __init__(self, raw):
+        self.raw = raw
+        self.read_chunk = getattr(raw, 'read1', raw.read)
+        self.buf = b''
+        self.pos = 0
+        self.offset = 0  # input offset of buf[0]
+        self.exhausted = False
+        self.hit_eof = False
+
+    def fill(self):
+        if self.exhausted:
+            return False
+        chunk = self.read_chunk(INPUT_BUFSIZE)
+        if not chunk:
+            self.exhausted = True
+            return False
+        if self.pos < len(self.buf):
+            self.buf = self.buf[self.pos:] + chunk
+            self.offset += self.pos
+        else:
+            self.offset += len(self.buf)
+            self.buf = chunk
+        self.pos = 0
+        return True
+
+    def tell(self):
+        return self.offset + self.pos
+
+    def skip(self, count):
+        # used when resuming: drop input that was already consumed
+        while count > 0:
+            if self.pos >= len(self.buf) and not self.fill():
+                return
+            step = min(count, len(self.buf) - self.pos)
+            self.pos += step
+            count -= step
+
+    def read_byte(self):
+        if self.pos >= len(self.buf) and not self.fill():
+            self.hit_eof = True
+            return -1
+        b = self.buf[self.pos]
+        self.pos += 1
+        return b
+
+    def read_char(self):
+        b = self.read_byte()
+        return '' if b < 0 else chr(b)
+
+    def read_line(self):
+        parts = []
+        while True:
+            if self.pos >= len(self.buf) and not self.fill():
+                if not parts:
+                    self.hit_eof = True
+                break
+            end = self.buf.find(b'\n', self.pos)
+            if end >= 0:
+                parts.append(self.buf[self.pos:end])
+                self.pos = end + 1
+                break
+            parts.append(self.buf[self.pos:])
+            self.pos = len(self.buf)
+        line = b''.join(parts)
+        if line.endswith(b'\r'):
+            line = line[:-1]
+        return line.decode('utf-8', 'replace')
+
+    def read_token(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                break
+        parts = []
+        while True:
+            end = _NONSPACE.match(self.buf, self.pos).end()
+            parts.append(self.buf[self.pos:end])
+            self.pos = end
+            if end < len(self.buf) or not self.fill():
+                break
+        token = b''.join(parts)
+        if not token:
+            self.hit_eof = True
+        return token.decode('ascii', 'replace')
+
+    def read_int(self):
+        token = self.read_token()
+        if not token:
+            return 0
+        try:
+            return int(token)
+        except ValueError:
+            raise Exception(f'take(int): invalid integer {token!r}')
+
+    def read_dec(self):
+        token = self.read_token()
+        if not token:
+            return 0.0
+        try:
+            return float(token)
+        except ValueError:
+            raise Exception(f'take(dec): invalid number {token!r}')
+
+#######################################
+# BUILTINS
+#######################################
+
+class MappedWord:
+    # Read-only word backed by an mmap. Indexing and len() read straight
+    # from the mapping; the text is only decoded (latin-1, like take(char))
+    # when the whole value is needed, e.g. for give or concatenation.
+    def __init__(self, mm, start=0, stop=None):
+        self.mm = mm
+        self.start = start
+        self.stop = len(mm) if stop == None else stop
+
+    def __reduce__(self):
+        # mappings cannot be pickled (checkpoints); save the text instead
+        return (str, (str(self),))
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, idx):
+        n = self.stop - self.start
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(n)
+            if step != 1:
+                return str(self)[idx]
+            return MappedWord(self.mm, self.start + start, self.start + max(start, stop))
+        if idx < 0:
+            idx += n
+        if idx < 0 or idx >= n:
+            raise IndexError('word index out of range')
+        return chr(self.mm[self.start + idx])
+
+    def tobytes(self):
+        return self.mm[self.start:self.stop]
+
+    def __str__(self):
+        return self.tobytes().decode('latin-1')
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __bool__(self):
+        return self.stop > self.start
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def _other_bytes(self, other):
+        if isinstance(other, MappedWord):
+            return other.tobytes()
+        if isinstance(other, str):
+            try:
+                return other.encode('latin-1')
+            except UnicodeEncodeError:
+                return None
+        return NotImplemented
+
+    def __eq__(self, other):
+        other = self._other_bytes(other)
+        if other is NotImplemented:
+            return other
+        return other != None and self.tobytes() == other
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __lt__(self, other):
+        return str(self) < str(other)
+
+    def __le__(self, other):
+        return str(self) <= str(other)
+
+    def __gt__(self, other):
+        return str(self) > str(other)
+
+    def __ge__(self, other):
+        return str(self) >= str(other)
+
+    def __add__(self, other):
+        if isinstance(other, (str, MappedWord)):
+            return str(self) + str(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, str):
+            return other + str(self)
+        return NotImplemented
+
+    def __mul__(self, other):
+        return str(self) * other
+
+class SliceView:
+    # Window over a word or array produced by a[i:j]. Reads go straight to
+    # the backing value; the window is only copied out (materialize) when it
+    # is stored somewhere that could outlive or mutate its source.
+    def __init__(self, base, start, stop):
+        self.base = base
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, idx):
+        n = self.stop - self.start
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(n)
+            if step != 1:
+                return self.materialize()[idx]
+            return SliceView(self.base, self.start + start, self.start + max(start, stop))
+        if idx < 0:
+            idx += n
+        if idx < 0 or idx >= n:
+            raise IndexError('slice index out of range')
+        return self.base[self.start + idx]
+
+    def __iter__(self):
+        for i in range(self.start, self.stop):
+            yield self.base[i]
+
+    def materialize(self):
+        return self.base[self.start:self.stop]
+
+    def __str__(self):
+        return str(self.materialize())
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+    def __bool__(self):
+        return self.stop > self.start
+
+    def __eq__(self, other):
+        if isinstance(other, SliceView):
+            other = other.materialize()
+        return self.materialize() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self.materialize() < materialize(other)
+
+    def __le__(self, other):
+        return self.materialize() <= materialize(other)
+
+    def __gt__(self, other):
+        return self.materialize() > materialize(other)
+
+    def __ge__(self, other):
+        return self.materialize() >= materialize(other)
+
+    def __add__(self, other):
+        return self.materialize() + materialize(other)
+
+    def __radd__(self, other):
+        return materialize(other) + self.materialize()
+
+    def __mul__(self, other):
+        return self.materialize() * other
+
+# Zero-filled arrays declared with more elements than this are paged
+sparse_threshold = 1 << 20
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_MASK = PAGE_SIZE - 1
+
+class PagedArray:
+    # Fixed-length array stored as PAGE_SIZE-element pages that are only
+    # allocated on first write; unwritten elements read as 0. Indexing
+    # follows list semantics (negative indices, IndexError past the end).
+    def __init__(self, length):
+        self.length = length
+        self.pages = {}
+
+    def __len__(self):
+        return self.length
+
+    def index(self, idx):
+        if idx < 0:
+            idx += self.length
+        if idx < 0 or idx >= self.length:
+            raise IndexError('list index out of range')
+        return idx
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self.length))]
+        idx = self.index(idx)
+        page = self.pages.get(idx >> PAGE_SHIFT)
+        if page == None:
+            return 0
+        return page[idx & PAGE_MASK]
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            indices = range(*idx.indices(self.length))
+            value = list(value)
+            if len(value) != len(indices):
+                raise ValueError('slice assignment must not change the array length')
+            for i, item in zip(indices, value):
+                self[i] = item
+            return
+        idx = self.index(idx)
+        page = self.pages.get(idx >> PAGE_SHIFT)
+        if page == None:
+            page = self.pages[idx >> PAGE_SHIFT] = [0] * PAGE_SIZE
+        page[idx & PAGE_MASK] = value
+
+    def has_page(self, idx):
+        return (self.index(idx) >> PAGE_SHIFT) in self.pages
+
+    def write_run(self, start, items):
+        # items[k] goes to start + k, a page at a time
+        k = 0
+        while k < len(items):
+            idx = start + k
+            page = self.pages.get(idx >> PAGE_SHIFT)
+            if page == None:
+                page = self.pages[idx >> PAGE_SHIFT] = [0] * PAGE_SIZE
+            offset = idx & PAGE_MASK
+            count = min(PAGE_SIZE - offset, len(items) - k)
+            page[offset:offset + count] = items[k:k + count]
+            k += count
+
+    def find(self, value, start, stop):
+        # first index in [start, stop) holding value, -1 if there is none
+        idx = start
+        while idx < stop:
+            n = idx >> PAGE_SHIFT
+            end = min(stop, (n + 1) << PAGE_SHIFT)
+            page = self.pages.get(n)
+            if page == None:
+                if value == 0:
+                    return idx
+            else:
+                first = n << PAGE_SHIFT
+                try:
+                    return page.index(value, idx - first, end - first) + first
+                except ValueError:
+                    pass
+            idx = end
+        return -1
+
+    def sort(self):
+        # Only allocated pages are read. The unallocated ones are zeros, which
+        # end up between the negative and the positive values. Stored values
+        # equal to 0 that are not the int 0 (False, 0.0) keep their place
+        # among the zeros, as a stable sort of the list would leave them.
+        values = []
+        zeros = []  # (rank among the elements equal to 0, value)
+        seen = 0  # elements equal to 0 before the current one
+        last = -1
+        for n in sorted(self.pages):
+            seen += (n - last - 1) * PAGE_SIZE  # the unallocated pages before it
+            last = n
+            for item in self.pages[n][:min(PAGE_SIZE, self.length - (n << PAGE_SHIFT))]:
+                if item == 0:
+                    if item.__class__ is not int:
+                        zeros.append((seen, item))
+                    seen += 1
+                else:
+                    values.append(item)
+        values.sort()
+        low = bisect.bisect_left(values, 0)
+        self.pages = {}
+        self.write_run(0, values[:low])
+        self.write_run(self.length - (len(values) - low), values[low:])
+        for rank, item in zeros:
+            self[low + rank] = item
+
+    def __iter__(self):
+        for n in range((self.length + PAGE_MASK) >> PAGE_SHIFT):
+            page = self.pages.get(n)
+            count = min(PAGE_SIZE, self.length - (n << PAGE_SHIFT))
+            if page == None:
+                yield from (0 for _ in range(count))
+            else:
+                yield from page[:count]
+
+    def __eq__(self, other):
+        if isinstance(other, (list, PagedArray)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+def materialize(value):
+    if isinstance(value, SliceView):
+        return value.materialize()
+    return value
+
+def give_value(value):
+    # byte arrays and their slices print like the other arrays
+    if value.__class__ is bytearray:
+        return list(value)
+    if value.__class__ is SliceView and value.base.__class__ is bytearray:
+        return list(value)
+    return value
+
+def slice_bounds(length, start, stop):
+    start, stop, _ = slice(start, stop).indices(length)
+    return start, max(start, stop)
+
+def builtin_open_map(path):
+    with open(str(path), 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return MappedWord(mm)
+
+def builtin_len(value):
+    return len(value)
+
+# The array builtins take an array or a slice of one and work on the backing
+# list or pages directly, in one native operation.
+
+def array_window(value, name):
+    # (backing array, start, stop) of an array argument
+    if value.__class__ is SliceView:
+        base, start, stop = value.base, value.start, value.stop
+    else:
+        base, start, stop = value, 0, None
+    if not isinstance(base, (list, PagedArray, bytearray)):
+        raise Exception(f'{name}() expects an array')
+    return base, start, len(base) if stop == None else stop
+
+def store_window(base, start, values):
+    if base.__class__ is PagedArray:
+        base.write_run(start, values)
+    else:
+        if base.__class__ is bytearray and values.__class__ is not bytearray:
+            values = byte_array(values)
+        base[start:start + len(values)] = values
+
+def builtin_sort(array):
+    base, start, stop = array_window(array, 'sort')
+    if start == 0 and stop == len(base) and base.__class__ is not bytearray:
+        base.sort()
+    else:
+        store_window(base, start, sorted(base[start:stop]))
+
+def builtin_bsearch(array, value):
+    # index of value in an array sorted ascending, -1 if it is not there
+    base, start, stop = array_window(array, 'bsearch')
+    idx = bisect.bisect_left(base, value, start, stop)
+    return idx - start if idx < stop and base[idx] == value else -1
+
+def builtin_index_of(array, value):
+    base, start, stop = array_window(array, 'index_of')
+    if base.__class__ is PagedArray:
+        idx = base.find(value, start, stop)
+        return idx - start if idx >= 0 else -1
+    try:
+        return base.index(value, start, stop) - start
+    except ValueError:
+        return -1
+
+def builtin_fill(array, value):
+    base, start, stop = array_window(array, 'fill')
+    value = materialize(value)
+    if base.__class__ is PagedArray and value == 0 and start == 0 and stop == len(base):
+        base.pages = {}
+    elif base.__class__ is bytearray:
+        base[start:stop] = bytes([to_byte(value)]) * (stop - start)
+    else:
+        store_window(base, start, [value] * (stop - start))
+
+def builtin_copy(dst, src, count):
+    # the first count elements of src over the first count of dst
+    base, start, stop = array_window(dst, 'copy')
+    source, first, last = array_window(src, 'copy')
+    if count < 0 or count > stop - start or count > last - first:
+        raise Exception(f'copy(): cannot copy {count} elements')
+    store_window(base, start, source[first:first + count])
+
+# The word builtins run str methods on the text, or mmap methods on the
+# mapping of an open_map() word, without a per-character loop.
+
+def word_window(value, name):
+    # (backing str or mmap, start, stop) of a word argument
+    if value.__class__ is SliceView:
+        base, start, stop = value.base, value.start, value.stop
+    elif value.__class__ is MappedWord:
+        base, start, stop = value.mm, value.start, value.stop
+    else:
+        base, start, stop = value, 0, None
+    if not isinstance(base, (str, mmap.mmap)):
+        raise Exception(f'{name}() expects a word')
+    return base, start, len(base) if stop == None else stop
+
+def word_text(value, name):
+    value = materialize(value)
+    if not isinstance(value, (str, MappedWord)):
+        raise Exception(f'{name}() expects a word')
+    return str(value)
+
+def pattern_for(base, sub, name):
+    # sub in the representation of base, None if it cannot occur in it
+    sub = word_text(sub, name)
+    if isinstance(base, str):
+        return sub
+    try:
+        return sub.encode('latin-1')
+    except UnicodeEncodeError:
+        return None
+
+def builtin_find(word, sub, start=0):
+    # index of the first sub at or after start, -1 if there is none
+    base, first, last = word_window(word, 'find')
+    pattern = pattern_for(base, sub, 'find')
+    if pattern == None or start > last - first:
+        return -1
+    idx = base.find(pattern, first + max(start, 0), last)
+    return idx - first if idx >= 0 else -1
+
+def builtin_count(word, sub):
+    base, first, last = word_window(word, 'count')
+    pattern = pattern_for(base, sub, 'count')
+    if pattern == None:
+        return 0
+    if isinstance(base, str):
+        return base.count(pattern, first, last)
+    if not pattern:
+        return last - first + 1
+    # mmap has find() but no count()
+    n, idx = 0, base.find(pattern, first, last)
+    while idx >= 0:
+        n += 1
+        idx = base.find(pattern, idx + len(pattern), last)
+    return n
+
+def builtin_replace(word, old, new):
+    return word_text(word, 'replace').replace(word_text(old, 'replace'), word_text(new, 'replace'))
+
+def builtin_substr(word, start, count):
+    # count characters from start, cut off at the end of the word
+    if start < 0 or count < 0:
+        raise Exception(f'substr(): invalid start {start} or length {count}')
+    base, first, last = word_window(word, 'substr')
+    start = min(first + start, last)
+    stop = min(start + count, last)
+    if isinstance(base, mmap.mmap):
+        return MappedWord(base, start, stop)
+    return base[start:stop]
+
+def builtin_ord(word):
+    base, start, stop = word_window(word, 'ord')
+    if stop - start != 1:
+        raise Exception(f'ord() expects a single character, got a word of length {stop - start}')
+    return base[start] if isinstance(base, mmap.mmap) else ord(base[start])
+
+def builtin_int_of(word):
+    text = word_text(word, 'int_of')
+    try:
+        return int(text)
+    except ValueError:
+        raise Exception(f'int_of(): {text!r} is not an integer')
+
+def builtin_word_of(number):
+    if not isinstance(number, (int, float)):
+        raise Exception('word_of() expects a number')
+    return str(number)
+
+# name -> (function, min args, max args)
+BUILTINS = {
+    'open_map': (builtin_open_map, 1, 1),
+    'len': (builtin_len, 1, 1),
+    'sort': (builtin_sort, 1, 1),
+    'bsearch': (builtin_bsearch, 2, 2),
+    'index_of': (builtin_index_of, 2, 2),
+    'fill': (builtin_fill, 2, 2),
+    'copy': (builtin_copy, 3, 3),
+    'find': (builtin_find, 2, 3),
+    'count': (builtin_count, 2, 2),
+    'replace': (builtin_replace, 3, 3),
+    'substr': (builtin_substr, 3, 3),
+    'ord': (builtin_ord, 1, 1),
+    'int_of': (builtin_int_of, 1, 1),
+    'word_of': (builtin_word_of, 1, 1),
+}
+
+#######################################
+# MEMORY
+#######################################
+
+MEM_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+def parse_size(text):
+    # '4096', '512K', '64M', '2G' (an optional trailing B or iB is ignored)
+    m = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:I?B)?\s*', text.upper())
+    if not m:
+        raise argparse.ArgumentTypeError(f'invalid size: {text}')
+    return int(float(m.group(1)) * MEM_UNITS[m.group(2)])
+
+def format_size(size):
+    for unit in ('G', 'M', 'K'):
+        if size >= MEM_UNITS[unit]:
+            return f'{size / MEM_UNITS[unit]:.1f} {unit}iB'
+    return f'{size} B'
+
+def item_size(item):
+    # small ints and one-character words are shared objects in CPython
+    if item.__class__ is int and -5 <= item <= 256:
+        return 0
+    if item.__class__ is str and len(item) == 1 and item < '\x80':
+        return 0
+    return sys.getsizeof(item)
+
+def value_size(value):
+    # Bytes held by a variable's value: the array and every element in it.
+    # Pages of an open_map() word belong to the mapping and are not counted.
+    if value.__class__ is list:
+        return sys.getsizeof(value) + sum(map(item_size, value))
+    if value.__class__ is PagedArray:
+        return sys.getsizeof(value) + sum(map(value_size, value.pages.values()))
+    return item_size(value)
+
+def peak_rss():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class MemoryTracker:
+    # Footprint of every live variable, updated at each assignment. Element
+    # stores only account for the difference between old and new element.
+    def __init__(self, limit=None, interval=None, out=sys.stderr):
+        self.limit = limit
+        self.interval = interval
+        self.out = out
+        self.sizes = {}
+        self.positions = {}  # source position of each variable's last store
+        self.total = 0
+        self.peak = 0
+        self.peak_name = None
+        self.next_sample = time.perf_counter() + interval if interval else None
+
+    def assign(self, name, value, pos):
+        self.resize(name, value_size(value), pos)
+
+    def store_item(self, name, arr, idx, new, pos):
+        size = self.sizes.get(name, 0) + item_size(new) - item_size(arr[idx])
+        if arr.__class__ is PagedArray and not arr.has_page(idx):
+            size += sys.getsizeof([0] * PAGE_SIZE)
+        self.resize(name, size, pos)
+
+    def resize(self, name, size, pos):
+        self.total += size - self.sizes.get(name, 0)
+        self.sizes[name] = size
+        self.positions[name] = pos
+        if self.total > self.peak:
+            self.peak = self.total
+            self.peak_name = name
+        if self.limit != None and self.total > self.limit:
+            raise Exception(f'memory limit of {format_size(self.limit)} exceeded by {name} '
+                            f'at line {self.line(pos)} ({format_size(self.total)} in variables)')
+        if self.next_sample != None and time.perf_counter() >= self.next_sample:
+            self.report('sample')
+            self.next_sample = time.perf_counter() + self.interval
+
+    def reserve(self, what, size, pos):
+        # refuse an allocation of `size` bytes that would break the limit
+        # before it is made, rather than after it has used the memory
+        if self.limit != None and self.total + size > self.limit:
+            raise Exception(f'memory limit of {format_size(self.limit)} exceeded by {what} '
+                            f'at line {self.line(pos)} ({format_size(self.total + size)} in variables)')
+
+    def forget(self, name):
+        self.total -= self.sizes.pop(name, 0)
+        self.positions.pop(name, None)
+
+    def line(self, pos):
+        if pos == None or source_map == None:
+            return '?'
+        return source_map.line_col(pos)[0]
+
+    def report(self, label, top=10):
+        rss = peak_rss()
+        print(f'[mem] {label}: {format_size(self.total)} in {len(self.sizes)} variables, '
+              f'peak {format_size(self.peak)} (while assigning {self.peak_name})'
+              + (f', peak RSS {format_size(rss)}' if rss != None else ''), file=self.out)
+        largest = sorted(self.sizes.items(), key=lambda item: item[1], reverse=True)[:top]
+        for name, size in largest:
+            value = symbol_table.symbols.get(name)
+            kind = symbol_table.types.get(name)
+            if isinstance(value, (list, str, PagedArray, bytearray)):
+                kind = f'{kind}[{len(value)}]'
+            print(f'[mem]   {name:<16} {kind:<16} {format_size(size):>10}  line {self.line(self.positions[name])}',
+                  file=self.out)
+
+#######################################
+#GLOBAL VARIABLES
+######################################
+
+symbol_table = SymbolTable()
+input_stream = None
+output_stream = None  # give() writes here; None means sys.stdout
+source_map = None  # SourceMap of the running program, for error locations
+mem_tracker = None
+
+def get_input_stream():
+    global input_stream
+    if input_stream == None:
+        input_stream = InputStream(sys.stdin.buffer)
+    return input_stream
+
+#######################################
+# INTERPRETER
+#######################################              
+# node class -> name of the Interpreter method that evaluates it
+VISITORS = {
+    usenode: 'visit_usenode',
+    Binnode: 'visit_Binnode',
+    VarNode: 'visit_VarNode',
+    blocknode: 'visit_blocknode',
+    ArrayAssignNode: 'visit_arrayassignnode',
+    arraynode: 'visit_arraynode',
+    arrayvalnode: 'visit_arrayvalnode',
+    arraysingularassignnode: 'visit_arraysingularassignnode',
+    Ifnode: 'visit_Ifnode',
+    Whilenode: 'visit_Whilenode',
+    Fornode: 'visit_Fornode',
+    givenode: 'visit_givenode',
+    typecastnode: 'visit_typecastnode',
+    VarAssignNode: 'visit_VarAssignNode',
+    Numnode: 'visit_Numnode',
+    stringnode: 'visit_stringnode',
+    UnaryOpNode: 'visit_UnaryOpNode',
+    takenode: 'visit_takenode',
+    eofnode: 'visit_eofnode',
+    callnode: 'visit_callnode',
+    slicenode: 'visit_slicenode',
+    sliceassignnode: 'visit_sliceassignnode',
+    hoistscopenode: 'visit_hoistscopenode',
+    hoistnode: 'visit_hoistnode',
+    inductionnode: 'visit_inductionnode',
+    csedefnode: 'visit_csedefnode',
+    cseusenode: 'visit_cseusenode',
+}
+
+# Enclosing statements named in runtime error tracebacks
+CONTEXT_NAMES = {Whilenode: 'while loop', Fornode: 'for loop', Ifnode: 'if', blocknode: 'block',
+                 usenode: '<module>'}
+
+def tag_error(e, node):
+    # Records where an error happened while it unwinds through visit(): the
+    # innermost node with a position, then the enclosing loops, ifs and blocks
+    pos = getattr(node, 'pos', None)
+    if pos == None:
+        return
+    if getattr(e, 'wasp_pos', None) == None:
+        e.wasp_pos = pos
+        e.wasp_frames = []
+    elif node.__class__ in CONTEXT_NAMES:
+        e.wasp_frames.append(node)
+
+def error_report(e):
+    # What a program stopped by `e` prints; a traceback when the error's
+    # position in source_map is known
+    pos = getattr(e, 'wasp_pos', None)
+    if pos == None or source_map == None:
+        return f'Error: {e}'
+    source = source_map
+    context = Context('<program>', source=source)
+    for node in reversed(e.wasp_frames):
+        if node.__class__ is usenode:
+            source = node.module.source
+        context = Context(CONTEXT_NAMES[node.__class__], context, node.pos, source)
+    return RTError(pos, None, str(e), context, source).as_string()
+
+def track_builtin_store(node):
+    # a builtin changed the elements of its first argument
+    target = node.args[0]
+    if isinstance(target, (VarNode, slicenode)):
+        mem_tracker.assign(target.var_name, symbol_table.symbols[target.var_name], node.pos)
+
+class Interpreter():
+    def __init__(self, tree):
+        self.tree = tree
+        self.dispatch = {cls: getattr(self, name) for cls, name in VISITORS.items()}
+        global symbol_table
+
+    def visit(self, node):
+        method = self.dispatch.get(node.__class__)
+        if method:
+            try:
+                return method(node)
+            except Exception as e:
+                tag_error(e, node)
+                raise
+        elif isinstance(node, Token) and node.type == ID:  # Variable reference
+            return symbol_table.get(node.value, f"Undefined variable: {node.value}")
+
+    def visit_VarNode(self, node):
+        if node.cache_table is symbol_table and node.cache_version == symbol_table.version:
+            return node.cache_holder[node.var_name]
+        return symbol_table.lookup(node)
+
+    def visit_VarAssignNode(self, node):
+        if node.cache_table is symbol_table and node.cache_version == symbol_table.version:
+            if node.proven:
+                value = self.visit(node.value_node)
+            else:
+                value = node.cache_coerce(materialize(self.visit(node.value_node)))
+            node.cache_holder[node.var_name] = value
+            if mem_tracker:
+                mem_tracker.assign(node.var_name, value, node.pos)
+            return
+        var_name = node.var_name
+        var_type=node.var_type
+        # print(symbol_table.symbols)
+        if var_type!=None:
+            if var_name in symbol_table.symbols.keys():
+                raise Exception(f'variable declared twice {var_name},')
+            symbol_table.settype(var_name, var_type)
+        if var_type==None:
+            if var_name not in symbol_table.symbols.keys():
+                raise Exception('variable not declared')
+        if node.proven:
+            # typecheck() showed the value already has the variable's type
+            symbol_table.set(var_name,self.visit(node.value_node))
+            if mem_tracker:
+                mem_tracker.assign(var_name, symbol_table.get(var_name), node.pos)
+            if node.var_type==None:
+                symbol_table.bind(node)
+            return
+        value = materialize(self.visit(node.value_node))
+
+        var_type = symbol_table.types[var_name]
+        if var_type==INT_T:
+            symbol_table.set(var_name,int(value))
+        elif var_type==DEC_T:
+            symbol_table.set(var_name,float(value))
+        elif var_type==BYTE_T:
+            symbol_table.set(var_name,to_byte(value))
+        elif var_type==WORD_T:
+            symbol_table.set(var_name,value)
+        if mem_tracker:
+            mem_tracker.assign(var_name, symbol_table.get(var_name), node.pos)
+        if node.var_type==None and var_type in ASSIGN_COERCE and symbol_table.bind(node):
+            node.cache_coerce = ASSIGN_COERCE[var_type]
+        
+    def visit_Binnode(self, node):
+        if node.left.__class__ is not Binnode:
+            return self.apply_binop(node, self.visit(node.left))
+        # fold long left-leaning chains (a+b+c+...) without recursing
+        spine = []
+        while node.__class__ is Binnode:
+            spine.append(node)
+            node = node.left
+        value = self.visit(node)
+        for node in reversed(spine):
+            value = self.apply_binop(node, value)
+        return value
+
+    def apply_binop(self, node, left):
+        if node.op.type == PLUS:
+            return left + self.visit(node.right)
+        elif node.op.type == MIN:
+            return left - self.visit(node.right)
+        elif node.op.type == MUL:
+            return left * self.visit(node.right)
+        elif node.op.type == DIV:
+            return left / self.visit(node.right)
+        elif node.op.type == MOD:
+            return left % self.visit(node.right)
+        elif node.op.type == COMP_GTE:
+            return left >= self.visit(node.right)
+        elif node.op.type == COMP_GT:
+            return left > self.visit(node.right)
+        elif node.op.type == COMP_E:
+            return left == self.visit(node.right)
+        elif node.op.type == COMP_NE:
+            return left != self.visit(node.right)
+        elif node.op.type == COMP_LT:
+            return left < self.visit(node.right)
+        elif node.op.type == COMP_LTE:
+            return left <= self.visit(node.right)
+        elif node.op.type == AND:
+            return left and self.visit(node.right)
+        elif node.op.type == OR:
+            return left or self.visit(node.right)
+
+    def visit_Numnode(self, node):
+        return node.value
+    
+    def visit_stringnode(self, node):
+        return node.value
+    
+    def visit_arrayassignnode(self,node):
+        arr=[]
+        var_name = node.var_name
+        var_type=node.var_type
+        if var_type!=None:
+            if var_name in symbol_table.symbols.keys():
+                raise Exception('variable declared twice')
+            symbol_table.settype(var_name, var_type)
+        if var_type==None:
+            if var_name not in symbol_table.symbols.keys():
+                raise Exception('variable not declared')
+        value = self.visit(node.value_node)
+
+        # Update the variable in the symbol table
+        var_type=symbol_table.types[var_name]
+        if var_type==BYTE_T:
+            symbol_table.set(var_name,byte_array(value))
+        elif node.proven or (isinstance(node.value_node,arraynode) and node.value_node.expressions==None):
+            # zero-filled or already ints, nothing to convert
+            symbol_table.set(var_name,value)
+        elif var_type==INT_T:
+            for i in value:
+                arr.append(int(i))
+            symbol_table.set(var_name,arr)
+        elif var_type==DEC_T:
+            for i in value:
+                arr.append(int(i))
+            symbol_table.set(var_name,arr)
+        elif var_type==WORD_T:
+            symbol_table.set(var_name,value)
+        if mem_tracker:
+            mem_tracker.assign(var_name, symbol_table.get(var_name), node.pos)
+
+    def visit_arraynode(self, node):
+        arr=[]
+        num=self.visit(node.num)
+        expressions=node.expressions
+        if expressions==None and num>sparse_threshold:
+            return PagedArray(num)
+        if expressions!=None and num!=len(expressions):
+            raise Exception('Expected same values as of size')
+        if mem_tracker:
+            # the list's slots, before they are allocated
+            mem_tracker.reserve(f'an array of {num} elements', sys.getsizeof([]) + 8 * max(num, 0), node.pos)
+        if expressions==None:
+            return [0]*num
+        else:
+            for i in expressions:
+                arr.append(self.visit(i))
+        return arr
+    
+
+    def visit_arraysingularassignnode(self,node):
+        arr=symbol_table.symbols[node.var_name]
+        idx=self.visit(node.idx)
+        val=materialize(self.visit(node.value))
+        if not node.safe:
+            check_bounds(node,arr,idx)
+        if mem_tracker:
+            if arr.__class__ is bytearray:
+                val=to_byte(val)
+            mem_tracker.store_item(node.var_name, arr, idx, val, node.pos)
+        store_item(arr,idx,val)
+
+    def visit_slicenode(self,node):
+        seq=symbol_table.symbols[node.var_name]
+        start=None if node.start==None else self.visit(node.start)
+        stop=None if node.stop==None else self.visit(node.stop)
+        start,stop=slice_bounds(len(seq),start,stop)
+        if isinstance(seq,MappedWord):
+            return seq[start:stop]
+        return SliceView(seq,start,stop)
+
+    def visit_sliceassignnode(self,node):
+        seq=symbol_table.symbols[node.var_name]
+        start=None if node.start==None else self.visit(node.start)
+        stop=None if node.stop==None else self.visit(node.stop)
+        start,stop=slice_bounds(len(seq),start,stop)
+        val=self.visit(node.value)
+        if isinstance(seq,MappedWord):
+            raise Exception(f'cannot assign to read-only word {node.var_name}')
+        if isinstance(seq,str):
+            symbol_table.set(node.var_name,seq[:start]+str(val)+seq[stop:])
+        elif isinstance(val,SliceView):
+            if len(val)!=stop-start:
+                raise Exception('slice assignment must not change the array length')
+            # one bulk copy straight out of the source window
+            store_window(seq,start,val.base[val.start:val.stop])
+        elif isinstance(val,(list,PagedArray,bytearray)):
+            if len(val)!=stop-start:
+                raise Exception('slice assignment must not change the array length')
+            store_window(seq,start,val)
+        else:
+            raise Exception('expected an array slice')
+        if mem_tracker:
+            mem_tracker.assign(node.var_name, symbol_table.symbols[node.var_name], node.pos)
+
+    def visit_arrayvalnode(self,node):
+        arr=symbol_table.symbols[node.var_name]
+        idx=self.visit(node.idx)
+        if node.safe:
+            return arr[idx]
+        return checked_item(node,arr,idx)
+
+    def visit_typecastnode(self,node):
+        val=self.visit(node.value)
+        return chr(val)
+    def visit_takenode(self,node):
+        stream=get_input_stream()
+        if node.kind==None:
+            return stream.read_byte()
+        elif node.kind==CHAR:
+            return stream.read_char()
+        elif node.kind==WORD_T:
+            return stream.read_line()
+        elif node.kind==INT_T:
+            return stream.read_int()
+        elif node.kind==DEC_T:
+            return stream.read_dec()
+
+    def visit_eofnode(self,node):
+        return get_input_stream().hit_eof
+
+    def visit_callnode(self,node):
+        function=BUILTINS[node.name][0]
+        result=function(*[self.visit(arg) for arg in node.args])
+        if mem_tracker and node.name in MUTATING_BUILTINS:
+            track_builtin_store(node)
+        return result
+
+    def visit_UnaryOpNode(self, node):
+        if not hasattr(node.op_tok, 'type'):
+           raise Exception(f"Invalid op_tok: expected Token, got {type(node.op_tok).__name__}")
+        value = self.visit(node.node)
+
+       # error = None
+
+        if node.op_tok.type == MIN:
+            value = -value
+        elif node.op_tok.type == NOT:
+            value = not(value)
+        return value
+
+    def visit_blocknode(self,node):
+        symb=SymbolTable()
+        symb.copy(symbol_table) 
+        for statement in node.statements:
+            self.visit(statement)
+        keys_to_remove = [i for i in symbol_table.symbols.keys() if i not in symb.symbols.keys()]
+        for i in keys_to_remove:
+            symbol_table.remove(i)       
+
+    def visit_Ifnode(self,node):
+        j=0
+        for condition,cases in node.cases:
+            if(self.visit(condition)==True):
+                j=1
+                for case in cases:
+                    self.visit(case)
+        if node.elsecase and j==0:
+            for case in node.elsecase:
+                          self.visit(case)  
+
+    def visit_Whilenode(self,node):
+        symb=SymbolTable()
+        symb.copy(symbol_table)
+        loop=node.compiled
+        if loop==None:
+            hits=node.hits
+            while(self.visit(node.condition)):
+                for cases in node.expressions:
+                    self.visit(cases) 
+                hits+=1
+                if hits==tier_threshold:
+                    node.hits=hits
+                    loop=promote_loop(self,node)
+                    if loop!=None:
+                        break
+            else:
+                node.hits=hits
+        if loop!=None:
+            loop()
+        keys_to_remove = [i for i in symbol_table.symbols.keys() if i not in symb.symbols.keys()]
+        for i in keys_to_remove:
+            symbol_table.remove(i)       
+    def visit_Fornode(self,node):
+        symb=SymbolTable()
+        symb.copy(symbol_table) 
+        self.visit(node.decl)
+        loop=node.compiled
+        if node.parallel and run_parallel(self,node):
+            loop=None
+        elif loop==None:
+            hits=node.hits
+            while(self.visit(node.cond)):
+                for cases in node.expressions:
+                    self.visit(cases) 
+                    self.visit(node.inc)
+                hits+=1
+                if hits==tier_threshold:
+                    node.hits=hits
+                    loop=promote_loop(self,node)
+                    if loop!=None:
+                        break
+            else:
+                node.hits=hits
+        if loop!=None:
+            loop()
+        keys_to_remove = [i for i in symbol_table.symbols.keys() if i not in symb.symbols.keys()]
+        for i in keys_to_remove:
+            symbol_table.remove(i)      
+
+    def visit_hoistscopenode(self,node):
+        for hoisted in node.hoisted:
+            hoisted.valid=False
+        return self.visit(node.loop)
+
+    def visit_hoistnode(self,node):
+        if not node.valid:
+            node.value=self.visit(node.expr)
+            node.valid=True
+        return node.value
+
+    def visit_inductionnode(self,node):
+        var=symbol_table.get(node.var_name)
+        factor=self.visit(node.factor)
+        return var*factor if node.var_first else factor*var
+
+    def visit_csedefnode(self,node):
+        node.value=self.visit(node.read)
+        return node.value
+
+    def visit_cseusenode(self,node):
+        return node.source.value
+
+    def visit_usenode(self,node):
+        module=node.module
+        if module==None:
+            raise Exception(f'module "{node.path}" was not loaded')
+        table=symbol_table
+        namespace=table.modules.get(module.path)
+        if namespace==None:
+            namespace=run_module(module,table.modules)
+        # the module's own names; arrays are shared, other values copied
+        for name,value in namespace.symbols.items():
+            if name in namespace.imported:
+                continue
+            if name in table.symbols:
+                if table.imported.get(name)==module.path:
+                    continue
+                raise Exception(f'{name} from {node.path} is already declared')
+            table.settype(name,namespace.types[name])
+            table.set(name,value)
+            table.imported[name]=module.path
+            if mem_tracker:
+                mem_tracker.assign(name, value, node.pos)
+
+    def visit_givenode(self,node):
+        value=self.visit(node.token)
+        print(give_value(value), file=output_stream)
+
+    def interpret(self):
+        return self.visit(self.tree)
+    
+    
+            
+#######################################
+# TIERED EXECUTION
+#######################################
+
+# Loops start on the tree-walker. Once a loop has run tier_threshold
+# iterations (over all of its executions) its condition and body are
+# compiled into closures and the loop continues on them from the next
+# condition check. 0 disables promotion.
+tier_threshold = 1000
+tier_stats = []
+
+OP_SYMBOLS = {
+    PLUS: '+', MIN: '-', MUL: '*', DIV: '/', MOD: '%',
+    COMP_E: '==', COMP_NE: '!=', COMP_LT: '<', COMP_GT: '>',
+    COMP_LTE: '<=', COMP_GTE: '>=', AND: 'and', OR: 'or', NOT: 'not',
+}
+
+def expr_source(node):
+    # Short source-like rendering of an expression, for reports
+    if isinstance(node, Binnode):
+        parts = []
+        for side in (node.left, node.right):
+            text = expr_source(side)
+            parts.append(f'({text})' if isinstance(side, Binnode) else text)
+        return f'{parts[0]} {OP_SYMBOLS[node.op.type]} {parts[1]}'
+    elif isinstance(node, UnaryOpNode):
+        if node.op_tok.type == NOT:
+            return 'not ' + expr_source(node.node)
+        return OP_SYMBOLS[node.op_tok.type] + expr_source(node.node)
+    elif isinstance(node, VarNode):
+        return node.var_name
+    elif isinstance(node, Numnode):
+        return str(node.value)
+    elif isinstance(node, stringnode):
+        return f'"{node.value}"'
+    elif isinstance(node, arrayvalnode):
+        return f'{node.var_name}[{expr_source(node.idx)}]'
+    elif isinstance(node, slicenode):
+        start = '' if node.start == None else expr_source(node.start)
+        stop = '' if node.stop == None else expr_source(node.stop)
+        return f'{node.var_name}[{start}:{stop}]'
+    elif isinstance(node, typecastnode):
+        return f'char({expr_source(node.value)})'
+    elif isinstance(node, callnode):
+        return f'{node.name}(' + ', '.join(expr_source(arg) for arg in node.args) + ')'
+    elif isinstance(node, takenode):
+        return f'take({node.kind or ""})'
+    elif isinstance(node, eofnode):
+        return 'eof()'
+    elif isinstance(node, VarAssignNode):
+        prefix = node.var_type + ' ' if node.var_type else ''
+        return f'{prefix}{node.var_name} = {expr_source(node.value_node)}'
+    elif isinstance(node, ArrayAssignNode):
+        return f'{node.var_type} {node.var_name}[{expr_source(node.value_node.num)}]'
+    elif isinstance(node, arraysingularassignnode):
+        return f'{node.var_name}[{expr_source(node.idx)}] = {expr_source(node.value)}'
+    elif isinstance(node, sliceassignnode):
+        start = '' if node.start == None else expr_source(node.start)
+        stop = '' if node.stop == None else expr_source(node.stop)
+        return f'{node.var_name}[{start}:{stop}] = {expr_source(node.value)}'
+    elif isinstance(node, hoistnode):
+        return expr_source(node.expr)
+    elif isinstance(node, csedefnode):
+        return expr_source(node.read)
+    elif isinstance(node, cseusenode):
+        return expr_source(node.source.read)
+    elif isinstance(node, inductionnode):
+        if node.var_first:
+            return f'{node.var_name} * {expr_source(node.factor)}'
+        return f'{expr_source(node.factor)} * {node.var_name}'
+    return type(node).__name__
+
+def element_step(node):
+    # K when `node` is a[i] = a[i] + K or a[i] = a[i] - K with a simple
+    # index, the cell update of tape machines; None otherwise
+    value = node.value
+    if not (isinstance(value, Binnode) and value.op.type in (PLUS, MIN)
+            and isinstance(value.left, arrayvalnode) and value.left.var_name == node.var_name
+            and isinstance(value.right, Numnode) and value.right.type == INT_C):
+        return None
+    key = index_key(node.idx)
+    if key == None or key != index_key(value.left.idx):
+        return None
+    return value.right.value if value.op.type == PLUS else -value.right.value
+
+class LoopStats:
+    def __init__(self, node, promoted_at):
+        self.node = node
+        self.promoted_at = promoted_at
+        self.compiled_iterations = 0
+
+    def describe(self):
+        node = self.node
+        if isinstance(node, Whilenode):
+            return f'while ({expr_source(node.condition)})'
+        return f'for ({expr_source(node.decl)}; {expr_source(node.cond)}; {expr_source(node.inc)})'
+
+def drop_new_symbols(keys):
+    table = symbol_table
+    for name in [i for i in table.symbols if i not in keys]:
+        table.remove(name)
+
+# op -> (closure over two sub-closures, closure with a constant right side)
+BINOP_CLOSURES = {
+    PLUS: (lambda l, r: lambda: l() + r(), lambda l, c: lambda: l() + c),
+    MIN: (lambda l, r: lambda: l() - r(), lambda l, c: lambda: l() - c),
+    MUL: (lambda l, r: lambda: l() * r(), lambda l, c: lambda: l() * c),
+    DIV: (lambda l, r: lambda: l() / r(), lambda l, c: lambda: l() / c),
+    MOD: (lambda l, r: lambda: l() % r(), lambda l, c: lambda: l() % c),
+    COMP_E: (lambda l, r: lambda: l() == r(), lambda l, c: lambda: l() == c),
+    COMP_NE: (lambda l, r: lambda: l() != r(), lambda l, c: lambda: l() != c),
+    COMP_LT: (lambda l, r: lambda: l() < r(), lambda l, c: lambda: l() < c),
+    COMP_GT: (lambda l, r: lambda: l() > r(), lambda l, c: lambda: l() > c),
+    COMP_LTE: (lambda l, r: lambda: l() <= r(), lambda l, c: lambda: l() <= c),
+    COMP_GTE: (lambda l, r: lambda: l() >= r(), lambda l, c: lambda: l() >= c),
+    AND: (lambda l, r: lambda: l() and r(), lambda l, c: lambda: l() and c),
+    OR: (lambda l, r: lambda: l() or r(), lambda l, c: lambda: l() or c),
+}
+
+class Compiler:
+    # Turns a subtree into nested closures that do exactly what the matching
+    # Interpreter.visit_* methods do, minus the per-node dispatch. Nodes
+    # without a compile_* method fall back to the tree-walker. The closures
+    # running an if, a block or a loop keep their node in a local named
+    # `node`, where the sampling profiler looks for it.
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def compile(self, node):
+        method = getattr(self, 'compile_' + type(node).__name__, None)
+        if method == None:
+            visit = self.interpreter.visit
+            return lambda: visit(node)
+        return method(node)
+
+    def compile_body(self, statements):
+        fns = [self.compile(statement) for statement in statements]
+        if len(fns) == 1:
+            return fns[0]
+        def body():
+            try:
+                for fn in fns:
+                    fn()
+            except Exception as e:
+                tag_error(e, statements[fns.index(fn)])
+                raise
+        return body
+
+    def compile_Numnode(self, node):
+        value = node.value
+        return lambda: value
+
+    compile_stringnode = compile_Numnode
+
+    def compile_VarNode(self, node):
+        name = node.var_name
+        cached, version, holder = None, -1, None
+        def load():
+            nonlocal cached, version, holder
+            table = symbol_table
+            if table is cached and table.version == version:
+                return holder[name]
+            if name not in table.symbols:
+                return table.get(name)
+            cached, version, holder = table, table.version, table.symbols
+            return holder[name]
+        return load
+
+    def compile_Binnode(self, node):
+        left = self.compile(node.left)
+        dynamic, constant = BINOP_CLOSURES[node.op.type]
+        if isinstance(node.right, (Numnode, stringnode)):
+            return constant(left, node.right.value)
+        return dynamic(left, self.compile(node.right))
+
+    def compile_UnaryOpNode(self, node):
+        value = self.compile(node.node)
+        if node.op_tok.type == MIN:
+            return lambda: -value()
+        elif node.op_tok.type == NOT:
+            return lambda: not value()
+        return value
+
+    def compile_typecastnode(self, node):
+        value = self.compile(node.value)
+        return lambda: chr(value())
+
+    def compile_callnode(self, node):
+        function = BUILTINS[node.name][0]
+        args = [self.compile(arg) for arg in node.args]
+        if node.name in MUTATING_BUILTINS:
+            def call():
+                result = function(*[arg() for arg in args])
+                if mem_tracker:
+                    track_builtin_store(node)
+                return result
+            return call
+        return lambda: function(*[arg() for arg in args])
+
+    def compile_arrayvalnode(self, node):
+        name = node.var_name
+        if node.safe:
+            if isinstance(node.idx, Numnode):
+                idx = node.idx.value
+                return lambda: symbol_table.symbols[name][idx]
+            index = self.compile(node.idx)
+            return lambda: symbol_table.symbols[name][index()]
+        index = self.compile(node.idx)
+        def read():
+            seq = symbol_table.symbols[name]
+            idx = index()
+            if idx >= 0:
+                try:
+                    return seq[idx]
+                except IndexError:
+                    pass
+            raise index_error(node, seq, idx)
+        return read
+
+    def compile_arraysingularassignnode(self, node):
+        name = node.var_name
+        pos = node.pos
+        index = self.compile(node.idx)
+        value = self.compile(node.value)
+        safe = node.safe
+        def store():
+            arr = symbol_table.symbols[name]
+            idx = index()
+            val = value()
+            if val.__class__ is SliceView:
+                val = val.materialize()
+            if not safe and not 0 <= idx < len(arr):
+                raise index_error(node, arr, idx)
+            if mem_tracker:
+                if arr.__class__ is bytearray:
+                    val = to_byte(val)
+                mem_tracker.store_item(name, arr, idx, val, pos)
+            try:
+                arr[idx] = val
+            except (TypeError, ValueError):
+                store_item(arr, idx, val)
+        step = element_step(node)
+        if step == None:
+            return store
+        # a[i] = a[i] + K: read and write the element through one index
+        def update():
+            if mem_tracker:
+                return store()
+            arr = symbol_table.symbols[name]
+            idx = index()
+            if not safe and not 0 <= idx < len(arr):
+                raise index_error(node, arr, idx)
+            val = arr[idx] + step
+            try:
+                arr[idx] = val
+            except (TypeError, ValueError):
+                store_item(arr, idx, val)
+        return update
+
+    def compile_VarAssignNode(self, node):
+        name = node.var_name
+        var_type = node.var_type
+        pos = node.pos
+        proven = node.proven
+        value = self.compile(node.value_node)
+        cached, version, holder, coerce = None, -1, None, None
+        def assign():
+            nonlocal cached, version, holder, coerce
+            table = symbol_table
+            if table is cached and table.version == version:
+                if proven:
+                    val = holder[name] = value()
+                else:
+                    val = value()
+                    if val.__class__ is SliceView:
+                        val = val.materialize()
+                    val = holder[name] = coerce(val)
+                if mem_tracker:
+                    mem_tracker.assign(name, val, pos)
+                return
+            if var_type != None:
+                if name in table.symbols:
+                    raise Exception(f'variable declared twice {name},')
+                table.settype(name, var_type)
+            elif name not in table.symbols:
+                raise Exception('variable not declared')
+            val = value()
+            declared = table.types[name]
+            if val.__class__ is SliceView and not proven:
+                val = val.materialize()
+            if proven:
+                table.set(name, val)
+            elif declared == INT_T:
+                table.set(name, int(val))
+            elif declared == DEC_T:
+                table.set(name, float(val))
+            elif declared == BYTE_T:
+                table.set(name, to_byte(val))
+            elif declared == WORD_T:
+                table.set(name, val)
+            if mem_tracker:
+                mem_tracker.assign(name, table.get(name), pos)
+            if var_type == None and declared in ASSIGN_COERCE:
+                cached, version, holder = table, table.version, table.symbols
+                coerce = ASSIGN_COERCE[declared]
+        return assign
+
+    def compile_givenode(self, node):
+        value = self.compile(node.token)
+        return lambda: print(give_value(value()), file=output_stream)
+
+    def compile_Ifnode(self, node):
+        cases = [(self.compile(condition), self.compile_body(body)) for condition, body in node.cases]
+        elsecase = self.compile_body(node.elsecase) if node.elsecase else None
+        if len(cases) == 1 and elsecase == None:
+            condition, body = cases[0]
+            def run_if(node=node):
+                if condition() == True:
+                    body()
+            return run_if
+        def run_if(node=node):
+            j = 0
+            for condition, body in cases:
+                if condition() == True:
+                    j = 1
+                    body()
+            if elsecase and j == 0:
+                elsecase()
+        return run_if
+
+    def compile_blocknode(self, node):
+        body = self.compile_body(node.statements)
+        def run_block(node=node):
+            keys = set(symbol_table.symbols)
+            body()
+            drop_new_symbols(keys)
+        return run_block
+
+    def compile_Whilenode(self, node):
+        loop = self.compile_while_loop(node)
+        def run_while(node=node):
+            keys = set(symbol_table.symbols)
+            loop()
+            drop_new_symbols(keys)
+        return run_while
+
+    def compile_Fornode(self, node):
+        decl = self.compile(node.decl)
+        loop = self.compile_for_loop(node)
+        interpreter = self.interpreter
+        def run_for():
+            keys = set(symbol_table.symbols)
+            decl()
+            if not (node.parallel and run_parallel(interpreter, node)):
+                loop()
+            drop_new_symbols(keys)
+        return run_for
+
+    def compile_hoistscopenode(self, node):
+        hoisted = node.hoisted
+        loop = self.compile(node.loop)
+        def run_hoisted():
+            for h in hoisted:
+                h.valid = False
+            loop()
+        return run_hoisted
+
+    def compile_hoistnode(self, node):
+        expr = self.compile(node.expr)
+        def hoisted():
+            if not node.valid:
+                node.value = expr()
+                node.valid = True
+            return node.value
+        return hoisted
+
+    def compile_inductionnode(self, node):
+        name = node.var_name
+        factor = self.compile(node.factor)
+        if node.var_first:
+            return lambda: symbol_table.get(name) * factor()
+        return lambda: factor() * symbol_table.get(name)
+
+    def compile_csedefnode(self, node):
+        read = self.compile(node.read)
+        def define():
+            node.value = value = read()
+            return value
+        return define
+
+    def compile_cseusenode(self, node):
+        source = node.source
+        return lambda: source.value
+
+    def compile_while_loop(self, node, stats=None):
+        condition = self.compile(node.condition)
+        body = self.compile_body(node.expressions)
+        def loop():
+            n = 0
+            while condition():
+                body()
+                n += 1
+            if stats != None:
+                stats.compiled_iterations += n
+        return loop
+
+    def compile_for_loop(self, node, stats=None):
+        condition = self.compile(node.cond)
+        inc = self.compile(node.inc)
+        statements = [self.compile(statement) for statement in node.expressions]
+        def loop():
+            n = 0
+            while condition():
+                for statement in statements:
+                    statement()
+                    inc()
+                n += 1
+            if stats != None:
+                stats.compiled_iterations += n
+        return loop
+
+def promote_loop(interpreter, node):
+    # Compiles a hot loop; returns the closure that runs the rest of it
+    stats = LoopStats(node, node.hits)
+    compiler = Compiler(interpreter)
+    try:
+        if isinstance(node, Whilenode):
+            loop = compiler.compile_while_loop(node, stats)
+        else:
+            loop = compiler.compile_for_loop(node, stats)
+    except RecursionError:
+        return None  # too deep to compile, stay on the tree-walker
+    tier_stats.append(stats)
+    node.compiled = loop
+    return loop
+
+def print_tier_stats(file=sys.stderr):
+    print(f'tier: {len(tier_stats)} loop(s) promoted (threshold {tier_threshold})', file=file)
+    for stats in tier_stats:
+        print(f'  {stats.describe()}: promoted after {stats.promoted_at} iterations, '
+              f'{stats.compiled_iterations} compiled iterations', file=file)
+
+#######################################
+# TYPE CHECKING
+#######################################
+
+# typecheck() works out the type of every expression from the literals,
+# char(), take() and the declarations, and rejects programs that combine
+# them in ways that cannot run. None is a type it cannot tell (an array
+# holding elements of several types, a name declared differently on two
+# paths); nothing is rejected or proven about those. Assignments whose value
+# already has the variable's type are marked `proven` and store it as is.
+BOOL_T = 'bool'
+NUMERIC = (INT_T, DEC_T, BOOL_T)
+ARRAY = 'array'
+
+# builtin -> (argument kinds, result type); an argument kind is a type,
+# 'array', 'number', 'sized' (a word or an array) or 'any'
+BUILTIN_TYPES = {
+    'open_map': (('any',), WORD_T),
+    'len': (('sized',), INT_T),
+    'sort': ((ARRAY,), None),
+    'bsearch': ((ARRAY, 'number'), INT_T),
+    'index_of': ((ARRAY, 'number'), INT_T),
+    'fill': ((ARRAY, 'number'), None),
+    'copy': ((ARRAY, ARRAY, INT_T), None),
+    'find': ((WORD_T, WORD_T, INT_T), INT_T),
+    'count': ((WORD_T, WORD_T), INT_T),
+    'replace': ((WORD_T, WORD_T, WORD_T), WORD_T),
+    'substr': ((WORD_T, INT_T, INT_T), WORD_T),
+    'ord': ((WORD_T,), INT_T),
+    'int_of': ((WORD_T,), INT_T),
+    'word_of': (('number',), WORD_T),
+}
+
+def array_type(element):
+    return (element or '?') + '[]'
+
+def is_array(t):
+    return t != None and t.endswith('[]')
+
+def element_type(t):
+    return None if t == '?[]' else t[:-2]
+
+def join_type(a, b):
+    return a if a == b else None
+
+def type_name(t):
+    return f'{element_type(t) or "mixed"} array' if is_array(t) else t
+
+def may_be_view(node):
+    # values that can be a SliceView, which assignments copy out
+    if isinstance(node, slicenode):
+        return True
+    if isinstance(node, Binnode) and node.op.type in (AND, OR):
+        return may_be_view(node.left) or may_be_view(node.right)
+    return False
+
+class TypeChecker:
+    def __init__(self):
+        # name -> joined type of everything stored in a word, or in the
+        # elements of an array, wherever the program stores it
+        self.contents = {}
+        self.errors = []
+        self.env = {}
+        self.imported = set()  # names that came from modules
+        self.statement = None
+
+    def check_program(self, tree_list):
+        # element stores later in a loop body reach reads earlier in it, so
+        # repeat until the joined contents stop changing
+        while True:
+            before = dict(self.contents)
+            self.errors = []
+            self.env = {}
+            self.imported = set()
+            self.check_body(tree_list)
+            if self.contents == before:
+                return self.errors
+
+    def error(self, node, details):
+        pos = getattr(node, 'pos', None)
+        if pos == None:
+            pos = self.statement.pos
+        self.errors.append((pos, details))
+
+    def store(self, name, t):
+        if name in self.contents:
+            t = join_type(self.contents[name], t)
+        self.contents[name] = t
+
+    def check(self, node):
+        method = getattr(self, 'check_' + type(node).__name__, None)
+        if method == None:
+            return None
+        return method(node)
+
+    def check_body(self, statements):
+        outer = self.statement
+        for statement in statements:
+            if getattr(statement, 'pos', None) != None:
+                self.statement = statement
+            self.check(statement)
+        self.statement = outer
+
+    def check_Numnode(self, node):
+        return DEC_T if isinstance(node.value, float) else INT_T
+
+    def check_stringnode(self, node):
+        return WORD_T
+
+    def check_VarNode(self, node):
+        kind = self.env.get(node.var_name)
+        if kind == ARRAY:
+            return array_type(self.contents.get(node.var_name))
+        if kind == WORD_T:
+            return self.contents.get(node.var_name)
+        if kind == BYTE_T:
+            # stores wrap them into 0..255
+            return INT_T
+        return kind
+
+    def check_Binnode(self, node):
+        left = self.check(node.left)
+        right = self.check(node.right)
+        op = node.op.type
+        if op in (AND, OR):
+            return join_type(left, right)
+        if left == None or right == None:
+            return BOOL_T if op in (COMP_E, COMP_NE, COMP_LT, COMP_LTE, COMP_GT, COMP_GTE) else None
+        if op in (COMP_E, COMP_NE):
+            if (left in NUMERIC) != (right in NUMERIC) or is_array(left) != is_array(right):
+                self.error(node, f'cannot compare {type_name(left)} with {type_name(right)}')
+            return BOOL_T
+        if op in (COMP_LT, COMP_LTE, COMP_GT, COMP_GTE):
+            if not (left in NUMERIC and right in NUMERIC or left == right):
+                self.error(node, f'cannot order {type_name(left)} and {type_name(right)}')
+            return BOOL_T
+        if left in NUMERIC and right in NUMERIC:
+            if op == DIV or DEC_T in (left, right):
+                return DEC_T
+            return INT_T
+        if op == PLUS and left == right == WORD_T:
+            return WORD_T
+        if op == PLUS and is_array(left) and is_array(right):
+            return array_type(join_type(element_type(left), element_type(right)))
+        if op == MUL and WORD_T in (left, right) and (INT_T in (left, right) or BOOL_T in (left, right)):
+            return WORD_T
+        self.error(node, f'unsupported operand types for {OP_SYMBOLS[op]}: '
+                         f'{type_name(left)} and {type_name(right)}')
+        return None
+
+    def check_UnaryOpNode(self, node):
+        t = self.check(node.node)
+        if node.op_tok.type == NOT:
+            return BOOL_T
+        if t == None:
+            return None
+        if t not in NUMERIC:
+            self.error(node, f'bad operand type for unary {OP_SYMBOLS[node.op_tok.type]}: {type_name(t)}')
+            return None
+        if node.op_tok.type == MIN and t == BOOL_T:
+            return INT_T
+        return t
+
+    def check_typecastnode(self, node):
+        t = self.check(node.value)
+        if t not in (None, INT_T, BOOL_T):
+            self.error(node, f'char() expects an int, got {type_name(t)}')
+        return WORD_T
+
+    def check_takenode(self, node):
+        if node.kind in (CHAR, WORD_T):
+            return WORD_T
+        return node.kind or INT_T
+
+    def check_eofnode(self, node):
+        return BOOL_T
+
+    def check_callnode(self, node):
+        kinds, result = BUILTIN_TYPES.get(node.name, ((), None))
+        types = []
+        for arg, kind in zip(node.args, kinds + ('any',) * len(node.args)):
+            t = self.check(arg)
+            types.append(t)
+            if t == None or kind == 'any':
+                continue
+            if kind == 'sized' and t != WORD_T and not is_array(t):
+                self.error(node, f'{node.name}() expects a word or an array, got {type_name(t)}')
+            elif kind == ARRAY and not is_array(t):
+                self.error(node, f'{node.name}() expects an array, got {type_name(t)}')
+            elif kind == 'number' and t not in NUMERIC:
+                self.error(node, f'{node.name}() expects a number, got {type_name(t)}')
+            elif kind == INT_T and t not in (INT_T, BOOL_T):
+                self.error(node, f'{node.name}() expects an int, got {type_name(t)}')
+            elif kind == WORD_T and t != WORD_T:
+                self.error(node, f'{node.name}() expects a word, got {type_name(t)}')
+        # fill() and copy() store into the elements of their first argument
+        if node.name in ('fill', 'copy') and isinstance(node.args[0], (VarNode, slicenode)):
+            stored = types[1] if node.name == 'fill' else types[1] and element_type(types[1])
+            if not is_array(stored):
+                self.store(node.args[0].var_name, stored)
+        return result
+
+    def check_index(self, node, index):
+        t = self.check(index)
+        if t != None and t not in (INT_T, BOOL_T):
+            self.error(node, f'index of {node.var_name} must be an int, got {type_name(t)}')
+
+    def check_sequence(self, node):
+        # type of the word or array `node` indexes or slices
+        t = self.check_VarNode(node)
+        if t != None and t != WORD_T and not is_array(t):
+            self.error(node, f'{node.var_name} is {type_name(t)}, not a word or an array')
+            return None
+        return t
+
+    def check_arrayvalnode(self, node):
+        t = self.check_sequence(node)
+        self.check_index(node, node.idx)
+        return element_type(t) if is_array(t) else t
+
+    def check_slicenode(self, node):
+        t = self.check_sequence(node)
+        for bound in (node.start, node.stop):
+            if bound != None:
+                self.check_index(node, bound)
+        return t
+
+    def check_givenode(self, node):
+        self.check(node.token)
+
+    def check_usenode(self, node):
+        if node.module == None:
+            return
+        exports, contents = module_types(node.module)
+        for name, kind in exports.items():
+            self.env[name] = kind
+            self.imported.add(name)
+            if name in contents:
+                self.store(name, contents[name])
+
+    def check_VarAssignNode(self, node):
+        t = self.check(node.value_node)
+        name = node.var_name
+        if node.var_type != None:
+            self.env[name] = node.var_type
+        kind = self.env.get(name)
+        node.proven = False
+        if kind == ARRAY:
+            self.error(node, f'cannot assign to array {name}')
+            return
+        if t != None and kind != None:
+            if kind == WORD_T and t != WORD_T or kind != WORD_T and t not in NUMERIC:
+                self.error(node, f'cannot assign {type_name(t)} to {kind} variable {name}')
+                return
+            node.proven = t == kind and not may_be_view(node.value_node)
+        if kind in (WORD_T, None):
+            self.store(name, t)
+
+    def check_ArrayAssignNode(self, node):
+        array = node.value_node
+        self.env[node.var_name] = ARRAY
+        size = self.check(array.num)
+        if size != None and size not in (INT_T, BOOL_T):
+            self.error(array, f'size of {node.var_name} must be an int, got {type_name(size)}')
+        proven = True
+        for element in array.expressions or ():
+            t = self.check(element)
+            if t != None and t not in NUMERIC:
+                self.error(node, f'cannot store {type_name(t)} in array {node.var_name}')
+            proven = proven and t == INT_T
+        # initializers are converted to int
+        node.proven = proven
+        self.store(node.var_name, INT_T)
+
+    def check_arraysingularassignnode(self, node):
+        kind = self.env.get(node.var_name)
+        self.check_index(node, node.idx)
+        t = self.check(node.value)
+        if kind == WORD_T:
+            self.error(node, f'cannot assign to an element of word {node.var_name}')
+        elif kind != None and kind != ARRAY:
+            self.error(node, f'{node.var_name} is {kind}, not an array')
+        elif t != None and t not in NUMERIC:
+            self.error(node, f'cannot store {type_name(t)} in array {node.var_name}')
+        else:
+            self.store(node.var_name, t)
+
+    def check_sliceassignnode(self, node):
+        kind = self.env.get(node.var_name)
+        for bound in (node.start, node.stop):
+            if bound != None:
+                self.check_index(node, bound)
+        t = self.check(node.value)
+        if kind == ARRAY:
+            if t != None and not is_array(t):
+                self.error(node, f'cannot assign {type_name(t)} to a slice of array {node.var_name}')
+            else:
+                self.store(node.var_name, element_type(t) if t != None else None)
+        elif kind == WORD_T:
+            # the value is converted with str()
+            self.store(node.var_name, WORD_T)
+        elif kind != None:
+            self.error(node, f'{node.var_name} is {kind}, not a word or an array')
+
+    def check_Ifnode(self, node):
+        # any number of the cases may run, and declarations in them stay
+        for condition, cases in node.cases:
+            self.check(condition)
+            before = dict(self.env)
+            self.check_body(cases)
+            self.env = merge_env(before, self.env)
+        if node.elsecase:
+            before = dict(self.env)
+            self.check_body(node.elsecase)
+            self.env = merge_env(before, self.env)
+
+    # loops and blocks drop the names declared inside them
+    def check_Whilenode(self, node):
+        env = dict(self.env)
+        self.check(node.condition)
+        self.check_body(node.expressions)
+        self.env = env
+
+    def check_Fornode(self, node):
+        env = dict(self.env)
+        self.check(node.decl)
+        self.check(node.cond)
+        self.check_body(node.expressions)
+        self.check(node.inc)
+        self.env = env
+
+    def check_blocknode(self, node):
+        env = dict(self.env)
+        self.check_body(node.statements)
+        self.env = env
+
+def merge_env(a, b):
+    # names declared on either of two paths; a clash leaves the kind unknown
+    merged = dict(a)
+    for name, kind in b.items():
+        merged[name] = join_type(merged[name], kind) if name in merged else kind
+    return merged
+
+def module_types(module):
+    # (name -> kind, name -> contents) of what a module declares, checking
+    # it the first time
+    if module.exports == None:
+        checker = TypeChecker()
+        errors = checker.check_program(module.tree_list)
+        if errors:
+            pos, details = errors[0]
+            raise Exception(TypeCheckError(pos, None, details, module.source).as_string())
+        module.exports = {name: kind for name, kind in checker.env.items() if name not in checker.imported}
+        module.contents = {name: checker.contents[name] for name in module.exports if name in checker.contents}
+    return module.exports, module.contents
+
+def typecheck(tree_list, source=None):
+    errors = TypeChecker().check_program(tree_list)
+    if errors:
+        pos, details = errors[0]
+        raise Exception(TypeCheckError(pos, None, details, source or source_map).as_string())
+
+#######################################
+# OPTIMIZER
+#######################################
+
+# Child fields of each node kind in evaluation order:
+# 0 = single node (may be None), 1 = list of nodes, 2 = if/elif cases
+NODE_FIELDS = {
+    Binnode: (('left', 0), ('right', 0)),
+    UnaryOpNode: (('node', 0),),
+    VarAssignNode: (('value_node', 0),),
+    ArrayAssignNode: (('value_node', 0),),
+    arraynode: (('num', 0), ('expressions', 1)),
+    arrayvalnode: (('idx', 0),),
+    arraysingularassignnode: (('idx', 0), ('value', 0)),
+    slicenode: (('start', 0), ('stop', 0)),
+    sliceassignnode: (('start', 0), ('stop', 0), ('value', 0)),
+    typecastnode: (('value', 0),),
+    callnode: (('args', 1),),
+    givenode: (('token', 0),),
+    blocknode: (('statements', 1),),
+    Whilenode: (('condition', 0), ('expressions', 1)),
+    Fornode: (('decl', 0), ('cond', 0), ('inc', 0), ('expressions', 1)),
+    Ifnode: (('cases', 2), ('elsecase', 1)),
+    hoistscopenode: (('loop', 0),),
+    hoistnode: (('expr', 0),),
+    inductionnode: (('factor', 0),),
+    csedefnode: (('read', 0),),
+}
+
+# Builtins without side effects, and builtins that modify their first argument
+PURE_BUILTINS = {'len', 'bsearch', 'index_of', 'find', 'count', 'replace', 'substr',
+                 'ord', 'int_of', 'word_of'}
+MUTATING_BUILTINS = {'sort', 'fill', 'copy'}
+
+def children(node):
+    result = []
+    for field, kind in NODE_FIELDS.get(type(node), ()):
+        value = getattr(node, field)
+        if value == None:
+            continue
+        if kind == 0:
+            result.append(value)
+        elif kind == 1:
+            result.extend(value)
+        else:
+            for condition, body in value:
+                result.append(condition)
+                result.extend(body)
+    return result
+
+def walk(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(children(node)))
+
+def copy_node(node):
+    # Shallow copy; copied loops start cold on the tier counters
+    node = copy.copy(node)
+    if isinstance(node, (Whilenode, Fornode)):
+        node.hits = 0
+        node.compiled = None
+    if isinstance(node, Fornode):
+        node.plan = None
+    return node
+
+def rebuild(node, fn):
+    # Copy of node with fn applied to every direct child; node itself if
+    # nothing changed.
+    changes = {}
+    for field, kind in NODE_FIELDS.get(type(node), ()):
+        value = getattr(node, field)
+        if value == None:
+            continue
+        if kind == 0:
+            new = fn(value)
+            changed = new is not value
+        elif kind == 1:
+            new = [fn(child) for child in value]
+            changed = any(a is not b for a, b in zip(new, value))
+        else:
+            new = [[fn(condition), [fn(child) for child in body]] for condition, body in value]
+            changed = any(a[0] is not b[0] or any(x is not y for x, y in zip(a[1], b[1]))
+                          for a, b in zip(new, value))
+        if changed:
+            changes[field] = new
+    if not changes:
+        return node
+    node = copy_node(node)
+    for field, value in changes.items():
+        setattr(node, field, value)
+    return node
+
+class Effects:
+    # Variables and arrays a subtree reads and writes
+    def __init__(self, nodes):
+        self.reads = set()
+        self.writes = set()
+        self.impure = False  # reads input
+        for root in nodes:
+            for node in walk(root):
+                if isinstance(node, VarNode):
+                    self.reads.add(node.var_name)
+                elif isinstance(node, (arrayvalnode, slicenode)):
+                    self.reads.add(node.var_name)
+                elif isinstance(node, (VarAssignNode, ArrayAssignNode, arraysingularassignnode, sliceassignnode)):
+                    self.writes.add(node.var_name)
+                elif isinstance(node, (takenode, eofnode)):
+                    self.impure = True
+                elif isinstance(node, usenode):
+                    # runs the module, which may give output and change
+                    # arrays shared with other modules
+                    self.impure = True
+                    if node.module != None:
+                        self.writes |= node.module.names
+                elif isinstance(node, callnode):
+                    if node.name in MUTATING_BUILTINS and node.args and isinstance(node.args[0], (VarNode, slicenode)):
+                        self.writes.add(node.args[0].var_name)
+                    elif node.name not in PURE_BUILTINS:
+                        self.impure = True
+
+HOISTABLE = (Binnode, UnaryOpNode, arrayvalnode, slicenode, typecastnode, callnode)
+EXPRESSION_NODES = HOISTABLE + (VarNode, Numnode, stringnode)
+
+def expression_info(root):
+    # id(node) -> (pure, names read) for every node under root, bottom-up.
+    # Hoisted expressions count as pure constants.
+    info = {}
+    for node in reversed(list(walk(root))):
+        if isinstance(node, hoistnode):
+            info[id(node)] = (True, frozenset())
+            continue
+        pure = isinstance(node, EXPRESSION_NODES) and not (
+            isinstance(node, callnode) and node.name not in PURE_BUILTINS)
+        reads = set()
+        if isinstance(node, (VarNode, arrayvalnode, slicenode)):
+            reads.add(node.var_name)
+        for child in children(node):
+            child_pure, child_reads = info[id(child)]
+            pure = pure and child_pure
+            reads |= child_reads
+        info[id(node)] = (pure, reads)
+    return info
+
+def index_key(node):
+    # Structural key of a simple index expression, None if not simple
+    if isinstance(node, Numnode):
+        return ('n', node.type, node.value)
+    elif isinstance(node, VarNode):
+        return ('v', node.var_name)
+    elif isinstance(node, Binnode) and node.op.type in (PLUS, MIN, MUL, MOD):
+        left = index_key(node.left)
+        right = index_key(node.right)
+        if left != None and right != None:
+            return ('b', node.op.type, left, right)
+    elif isinstance(node, UnaryOpNode) and node.op_tok.type == MIN:
+        inner = index_key(node.node)
+        if inner != None:
+            return ('u', inner)
+    return None
+
+WRITE_NODES = (VarAssignNode, ArrayAssignNode, arraysingularassignnode, sliceassignnode)
+
+def reads_of(node):
+    # names whose value `node` may read; stores into an element or a slice
+    # need the array or word itself
+    reads = Effects([node]).reads
+    for child in walk(node):
+        if isinstance(child, (arraysingularassignnode, sliceassignnode)):
+            reads.add(child.var_name)
+    return reads
+
+NUMBER_TYPES = {INT_T: INT_T, BYTE_T: INT_T, DEC_T: DEC_T}  # declared type -> type of its values
+
+def top_level_numbers(tree_list):
+    # name -> (type of its values, pos, is an array) for the int, byte and
+    # dec variables and arrays declared once in the program, by a top-level
+    # statement: after that statement they exist until the program ends.
+    # Names a module brings in are left out: declaring them is an error.
+    counts = collections.Counter(node.var_name for root in tree_list for node in walk(root)
+                                 if isinstance(node, WRITE_NODES) and getattr(node, 'var_type', None) != None)
+    imported = imported_names(tree_list)
+    numbers = {}
+    for node in tree_list:
+        if (isinstance(node, (VarAssignNode, ArrayAssignNode)) and node.var_type in NUMBER_TYPES
+                and counts[node.var_name] == 1 and node.var_name not in imported):
+            numbers[node.var_name] = (NUMBER_TYPES[node.var_type], node.pos, isinstance(node, ArrayAssignNode))
+    return numbers
+
+def imported_names(tree_list):
+    return {name for root in tree_list for node in walk(root)
+            if isinstance(node, usenode) and node.module != None for name in node.module.names}
+
+def fault_free_declaration(node, numbers):
+    # a top-level int, byte or dec array declaration of a constant size with
+    # constant elements, which cannot raise; under --max-memory it may, so
+    # none is
+    value = node.value_node
+    found = numbers.get(node.var_name)
+    if found == None or not found[2] or found[1] != node.pos or not isinstance(value, arraynode):
+        return False
+    if not (isinstance(value.num, Numnode) and value.num.type == INT_C and value.num.value >= 0):
+        return False
+    if value.expressions != None and not (
+            len(value.expressions) == value.num.value
+            and all(isinstance(e, Numnode) and (e.type == INT_C or node.var_type == DEC_T)
+                    for e in value.expressions)):
+        return False
+    return mem_tracker == None or mem_tracker.limit == None
+
+def fault_free_type(node, numbers, pos):
+    # INT_T or DEC_T if evaluating node at pos cannot raise, else None:
+    # numbers, scalars from `numbers` declared before pos, + - * of operands
+    # of one type and ints modulo a nonzero int constant. Division, any other
+    # modulo, element access and calls can.
+    if isinstance(node, Numnode):
+        return {INT_C: INT_T, DEC_C: DEC_T}.get(node.type)
+    if isinstance(node, VarNode):
+        found = numbers.get(node.var_name)
+        if found != None and not found[2] and found[1] < pos:
+            return found[0]
+        return None
+    if isinstance(node, UnaryOpNode) and node.op_tok.type == MIN:
+        return fault_free_type(node.node, numbers, pos)
+    if isinstance(node, Binnode) and node.op.type in (PLUS, MIN, MUL):
+        left = fault_free_type(node.left, numbers, pos)
+        if left != None and left == fault_free_type(node.right, numbers, pos):
+            return left
+    if (isinstance(node, Binnode) and node.op.type == MOD and isinstance(node.right, Numnode)
+            and node.right.type == INT_C and node.right.value != 0
+            and fault_free_type(node.left, numbers, pos) == INT_T):
+        return INT_T
+    return None
+
+def fault_free_write(node, numbers):
+    # a store that cannot raise, so dropping it cannot hide an error
+    if node.pos == None:
+        return False
+    if isinstance(node, VarAssignNode):
+        found = numbers.get(node.var_name)
+        if node.var_type != None:
+            # only a top-level declaration, which cannot be a redeclaration
+            return (found != None and found[1] == node.pos
+                    and fault_free_type(node.value_node, numbers, node.pos) == found[0])
+        return (found != None and not found[2] and found[1] < node.pos
+                and fault_free_type(node.value_node, numbers, node.pos) == found[0])
+    if isinstance(node, arraysingularassignnode):
+        found = numbers.get(node.var_name)
+        return (node.safe and found != None and found[2] and found[1] < node.pos
+                and fault_free_type(node.idx, numbers, node.pos) == INT_T
+                and fault_free_type(node.value, numbers, node.pos) == found[0])
+    return False
+
+def default_value(var_type, pos):
+    # what a declaration without a value starts with
+    if var_type == WORD_T:
+        return stringnode(Token(WORD, '', pos))
+    if var_type == DEC_T:
+        return Numnode(Token(DEC_C, 0.0, pos))
+    return Numnode(Token(INT_C, 0, pos))
+
+class Optimizer:
+    def __init__(self, keep=()):
+        self.notes = []
+        self.keep = set(keep)  # names whose values at the end of the program matter
+        self.unused = set()
+        self.numbers = {}  # top_level_numbers() of the program
+        self.removed = []
+
+    def note(self, message, node=None):
+        pos = getattr(node, 'pos', None)
+        if pos != None and source_map != None:
+            message = f'line {source_map.line_col(pos)[0]}: {message}'
+        self.notes.append(message)
+
+    def optimize(self, tree_list):
+        try:
+            tree_list = self.remove_dead(tree_list)
+        except RecursionError:
+            self.notes.clear()
+        result = []
+        available = {}
+        for node in tree_list:
+            noted = len(self.notes)
+            try:
+                new = self.optimize_loops(node)
+                new = self.cse_statement(new, available)
+            except RecursionError:
+                # too deeply nested to rewrite; run it as parsed
+                del self.notes[noted:]
+                available.clear()
+                new = node
+            result.append(new)
+        # reads that were never reused go back to plain reads (keeping an
+        # unused definition is harmless, so a failure here is not fatal)
+        for i, node in enumerate(result):
+            try:
+                result[i] = self.drop_unused_defs(node)
+            except RecursionError:
+                pass
+        return result
+
+    # -- dead stores and unused variables --
+
+    def remove_dead(self, tree_list):
+        self.numbers = top_level_numbers(tree_list)
+        self.unused = self.unused_names(tree_list)
+        result = self.dead_list(tree_list, set(self.keep))[0]
+        # found back to front; list them in source order
+        for node, message in sorted(self.removed, key=lambda item: item[0].pos or 0):
+            self.note(message, node)
+        return result
+
+    def unused_names(self, tree_list):
+        # Names whose values never reach output or control flow, directly or
+        # through other variables: read only to compute other unused names.
+        # Their writes all have to go, so each must be declared exactly once
+        # and outside loops (running a declaration twice is an error), and
+        # every write must be one that cannot raise.
+        needed = set(self.keep)
+        feeds = collections.defaultdict(set)  # name -> names its writes read
+        declared = collections.Counter()
+        stack = [(node, False) for node in tree_list]
+        while stack:
+            node, in_loop = stack.pop()
+            if isinstance(node, WRITE_NODES):
+                name = node.var_name
+                if getattr(node, 'var_type', None) != None:
+                    declared[name] += 1
+                    if in_loop:
+                        needed.add(name)
+                if isinstance(node, ArrayAssignNode):
+                    if not fault_free_declaration(node, self.numbers):
+                        needed.add(name)
+                elif not fault_free_write(node, self.numbers):
+                    needed.add(name)
+                feeds[name] |= Effects(children(node)).reads
+                continue
+            if isinstance(node, (VarNode, arrayvalnode, slicenode)):
+                needed.add(node.var_name)
+            in_loop = in_loop or isinstance(node, (Whilenode, Fornode))
+            stack.extend((child, in_loop) for child in children(node))
+        pending = list(needed)
+        while pending:
+            for name in feeds.pop(pending.pop(), ()):
+                if name not in needed:
+                    needed.add(name)
+                    pending.append(name)
+        return {name for name, count in declared.items() if count == 1 and name not in needed}
+
+    def dead_list(self, statements, live, in_for=False):
+        # Backward over the statements: what stays, and the names live
+        # before them. `live` holds the names read after the list.
+        result = []
+        for node in reversed(statements):
+            new, live = self.dead_statement(node, live)
+            if new == None and in_for:
+                # inc runs after each statement of a for body, so the
+                # statement count has to stay
+                new = Numnode(Token(INT_C, 0, node.pos))
+            if new != None:
+                result.append(new)
+        result.reverse()
+        return result, live
+
+    def dead_statement(self, node, live):
+        # (node to run instead, or None to drop it; names live before it)
+        if isinstance(node, WRITE_NODES) and node.var_name in self.unused:
+            self.removed.append((node, f'removed {expr_source(node)}: {node.var_name} is never used'))
+            return None, live
+        if isinstance(node, VarAssignNode):
+            name = node.var_name
+            if node.var_type != None:
+                # the declaration stays; only its value may go
+                value_type = NUMBER_TYPES.get(node.var_type)
+                droppable = value_type != None and fault_free_type(node.value_node, self.numbers, node.pos) == value_type
+            else:
+                droppable = fault_free_write(node, self.numbers)
+            if name in live or not droppable:
+                return node, (live - {name}) | reads_of(node.value_node)
+            if node.var_type == None:
+                self.removed.append((node, f'removed dead store {expr_source(node)}'))
+                return None, live
+            if not isinstance(node.value_node, (Numnode, stringnode)):
+                self.removed.append((node, f'dropped the initial value of {name}, overwritten before it is read'))
+                node = copy_node(node)
+                node.value_node = default_value(node.var_type, node.pos)
+            return node, live
+        if isinstance(node, ArrayAssignNode):
+            return node, (live - {node.var_name}) | reads_of(node.value_node)
+        if isinstance(node, Ifnode):
+            # any number of the cases may run, each after its condition
+            after = live
+            new = copy_node(node)
+            if node.elsecase:
+                new.elsecase, before = self.dead_list(node.elsecase, after)
+                after = after | before
+            new.cases = []
+            for condition, body in reversed(node.cases):
+                body, before = self.dead_list(body, after)
+                after = after | before | reads_of(condition)
+                new.cases.append([condition, body])
+            new.cases.reverse()
+            return new, after
+        if isinstance(node, (Whilenode, Fornode)):
+            # everything the loop reads is live on every pass through it
+            live = live | reads_of(node)
+            new = copy_node(node)
+            new.expressions = self.dead_list(node.expressions, live, isinstance(node, Fornode))[0]
+            return new, live
+        if isinstance(node, blocknode):
+            new = copy_node(node)
+            new.statements, live = self.dead_list(node.statements, live)
+            return new, live
+        return node, live | reads_of(node)
+
+    # -- loop-invariant code motion and induction multiplications --
+
+    def optimize_loops(self, node):
+        if isinstance(node, (Whilenode, Fornode)):
+            return self.optimize_loop(node)
+        return rebuild(node, self.optimize_loops)
+
+    def optimize_loop(self, loop):
+        effects = Effects([loop])
+        info = expression_info(loop)
+        hoisted = []
+
+        def hoist(node):
+            pure, reads = info[id(node)]
+            if isinstance(node, HOISTABLE) and pure and not (reads & effects.writes):
+                h = hoistnode(node)
+                hoisted.append(h)
+                return h
+            if isinstance(node, hoistnode):
+                return node
+            return rebuild(node, hoist)
+
+        new = rebuild(loop, hoist)
+        new = self.reduce_strength(new, loop)
+        # inner loops hoist what is invariant in them but not out here
+        new = rebuild(new, self.optimize_inner)
+        for h in hoisted:
+            self.note(f'hoisted {expr_source(h.expr)} out of {loop_source(loop)}', h)
+        if hoisted:
+            return hoistscopenode(new, hoisted)
+        return new
+
+    def optimize_inner(self, node):
+        if isinstance(node, hoistnode):
+            return node
+        return self.optimize_loops(node)
+
+    def induction_variables(self, loop):
+        # name -> constant step of variables updated exactly once per pass
+        # through the loop, by 'v = v + K' or 'v = v - K'
+        if isinstance(loop, Fornode):
+            candidates = [loop.inc]
+            scope = [loop.cond, loop.inc] + loop.expressions
+        else:
+            candidates = loop.expressions
+            scope = [loop.condition] + loop.expressions
+        counts = {}
+        for node in (child for root in scope for child in walk(root)):
+            if isinstance(node, (VarAssignNode, ArrayAssignNode, arraysingularassignnode, sliceassignnode)):
+                counts[node.var_name] = counts.get(node.var_name, 0) + 1
+        steps = {}
+        for node in candidates:
+            if (isinstance(node, VarAssignNode) and node.var_type == None
+                    and isinstance(node.value_node, Binnode)
+                    and node.value_node.op.type in (PLUS, MIN)
+                    and isinstance(node.value_node.left, VarNode)
+                    and node.value_node.left.var_name == node.var_name
+                    and isinstance(node.value_node.right, Numnode)
+                    and node.value_node.right.type == INT_C
+                    and counts.get(node.var_name) == 1):
+                step = node.value_node.right.value
+                steps[node.var_name] = step if node.value_node.op.type == PLUS else -step
+        return steps
+
+    def reduce_strength(self, loop, original):
+        steps = self.induction_variables(loop)
+        if not steps:
+            return loop
+
+        # A running sum (one addition per pass instead of the multiply)
+        # costs more than the multiply it replaces in Python, so the
+        # product stays a multiply; only a hoisted factor gains, by
+        # skipping the Binnode dispatch around it.
+        def is_factor(node):
+            return isinstance(node, hoistnode)
+
+        def reduce(node):
+            if isinstance(node, Binnode) and node.op.type == MUL:
+                for var, factor, var_first in ((node.left, node.right, True), (node.right, node.left, False)):
+                    if isinstance(var, VarNode) and var.var_name in steps and is_factor(factor):
+                        self.note(f'fused {expr_source(node)} in {loop_source(original)}', node)
+                        reduced = inductionnode(var.var_name, factor, var_first)
+                        reduced.pos = node.pos
+                        return reduced
+            if isinstance(node, (hoistnode, Whilenode, Fornode)):
+                return node
+            return rebuild(node, reduce)
+
+        return rebuild(loop, reduce)
+
+    # -- repeated array reads in straight-line code --
+
+    def invalidate(self, available, names):
+        for key in [key for key, (_, reads) in available.items() if reads & names]:
+            del available[key]
+
+    def cse_list(self, statements, available, after_each=None):
+        result = []
+        for statement in statements:
+            result.append(self.cse_statement(statement, available))
+            if after_each:
+                self.invalidate(available, after_each)
+        return result
+
+    def cse_statement(self, node, available):
+        if isinstance(node, Ifnode):
+            cases = []
+            for n, (condition, body) in enumerate(node.cases):
+                if n == 0:
+                    condition = self.cse_expr(condition, available)
+                    body = self.cse_list(body, dict(available))
+                else:
+                    condition = self.cse_expr(condition, {})
+                    body = self.cse_list(body, {})
+                cases.append([condition, body])
+            elsecase = self.cse_list(node.elsecase, {}) if node.elsecase else node.elsecase
+            self.invalidate(available, Effects([node]).writes)
+            new = copy_node(node)
+            new.cases = cases
+            new.elsecase = elsecase
+            return new
+        elif isinstance(node, hoistscopenode):
+            new = copy_node(node)
+            new.loop = self.cse_statement(node.loop, available)
+            return new
+        elif isinstance(node, Whilenode):
+            new = copy_node(node)
+            new.condition = self.cse_expr(node.condition, {})
+            new.expressions = self.cse_list(node.expressions, {})
+            self.invalidate(available, Effects([node]).writes)
+            return new
+        elif isinstance(node, Fornode):
+            new = copy_node(node)
+            new.decl = self.cse_statement(node.decl, available)
+            new.cond = self.cse_expr(node.cond, {})
+            new.inc = self.cse_statement(node.inc, {})
+            new.expressions = self.cse_list(node.expressions, {}, Effects([node.inc]).writes)
+            self.invalidate(available, Effects([node]).writes)
+            return new
+        elif isinstance(node, blocknode):
+            new = copy_node(node)
+            new.statements = self.cse_list(node.statements, available)
+            return new
+        elif isinstance(node, usenode):
+            # the module may write to any array it shares
+            available.clear()
+            return node
+        new = self.cse_expr(node, available)
+        if isinstance(node, (VarAssignNode, ArrayAssignNode, arraysingularassignnode, sliceassignnode)):
+            self.invalidate(available, {node.var_name})
+        return new
+
+    def cse_expr(self, node, available, conditional=False):
+        if isinstance(node, (hoistnode, inductionnode)):
+            return node
+        if isinstance(node, Binnode) and node.op.type in (AND, OR):
+            left = self.cse_expr(node.left, available, conditional)
+            right = self.cse_expr(node.right, available, True)
+            if left is node.left and right is node.right:
+                return node
+            new = copy_node(node)
+            new.left = left
+            new.right = right
+            return new
+        new = rebuild(node, lambda child: self.cse_expr(child, available, conditional))
+        if isinstance(node, arrayvalnode):
+            key = index_key(node.idx)
+            if key == None:
+                return new
+            key = (node.var_name, key)
+            if key in available:
+                source = available[key][0]
+                source.uses += 1
+                return cseusenode(source)
+            if conditional:
+                return new
+            definition = csedefnode(new)
+            available[key] = (definition, Effects([node]).reads)
+            return definition
+        if isinstance(node, callnode) and node.name in MUTATING_BUILTINS:
+            self.invalidate(available, Effects([node]).writes)
+        return new
+
+    def drop_unused_defs(self, node):
+        if isinstance(node, csedefnode):
+            if node.uses == 0:
+                return self.drop_unused_defs(node.read)
+            # the uses point at this very object, so keep it and fix it up
+            node.read = self.drop_unused_defs(node.read)
+            self.note(f'reused {expr_source(node.read)} for {node.uses} repeated read(s)', node)
+            return node
+        if isinstance(node, (cseusenode, hoistnode, inductionnode)):
+            return node
+        return rebuild(node, self.drop_unused_defs)
+
+def loop_source(loop):
+    if isinstance(loop, Whilenode):
+        return f'while ({expr_source(loop.condition)})'
+    head = 'parallel for' if loop.parallel else 'for'
+    return f'{head} ({expr_source(loop.decl)}; {expr_source(loop.cond)}; {expr_source(loop.inc)})'
+
+def optimize(tree_list, keep=()):
+    optimizer = Optimizer(keep)
+    return optimizer.optimize(tree_list), optimizer.notes
+
+#######################################
+# BOUNDS CHECK ELIMINATION
+#######################################
+
+# Element reads and stores check that the index is in range. prove_bounds()
+# marks the accesses whose index is always in range so that the checks can
+# be left out: constant indices and `x % K` into arrays declared with a
+# constant length, and indices made of the variables of for loops that step
+# a fixed amount towards a bound, such as
+#
+#     for (int i = 0; i < len(a); i = i + 1) { b[i] = a[i] * 2; };
+#
+# An index is an interval (lo, hi, rel): lo is a lower bound or None, and hi
+# an upper bound, or an offset from len(rel) when rel is the name of an
+# array or word. The loop variable of a for is i0 + j * step in the j-th
+# statement of the body (the increment runs after each), where i0 is a
+# value that passed the condition.
+
+def array_lengths(tree_list):
+    # name -> (shortest, longest) declared length, for the names only ever
+    # bound by declarations of a constant length
+    lengths = {}
+    unknown = set()
+    for root in tree_list:
+        for node in walk(root):
+            if isinstance(node, ArrayAssignNode):
+                value = node.value_node
+                if (isinstance(value, arraynode) and isinstance(value.num, Numnode)
+                        and value.num.type == INT_C):
+                    n = value.num.value
+                    shortest, longest = lengths.get(node.var_name, (n, n))
+                    lengths[node.var_name] = (min(shortest, n), max(longest, n))
+                else:
+                    unknown.add(node.var_name)
+            elif isinstance(node, VarAssignNode):
+                unknown.add(node.var_name)
+            elif isinstance(node, usenode) and node.module != None:
+                unknown |= node.module.names
+    for name in unknown:
+        lengths.pop(name, None)
+    return lengths
+
+def rebound_names(nodes):
+    # names a subtree binds to a new value as a whole; storing into elements,
+    # sort(), fill() and copy() keep the length
+    names = set()
+    for root in nodes:
+        for node in walk(root):
+            if isinstance(node, (VarAssignNode, ArrayAssignNode, sliceassignnode)):
+                names.add(node.var_name)
+            elif isinstance(node, usenode) and node.module != None:
+                names |= node.module.names
+    return names
+
+class BoundsProver:
+    def __init__(self, tree_list):
+        self.lengths = array_lengths(tree_list)
+
+    def absolute(self, interval):
+        lo, hi, rel = interval
+        if rel == None:
+            return interval
+        if rel in self.lengths:
+            return (lo, hi + self.lengths[rel][1], None)
+        return (lo, None, None)
+
+    def interval(self, node, env, depth=0):
+        if depth > 20:
+            return None
+        if isinstance(node, Numnode):
+            return (node.value, node.value, None) if node.type == INT_C else None
+        if isinstance(node, VarNode):
+            return env.get(node.var_name)
+        if isinstance(node, callnode):
+            if node.name == 'len' and len(node.args) == 1 and isinstance(node.args[0], VarNode):
+                name = node.args[0].var_name
+                return (self.lengths[name][0] if name in self.lengths else 0, 0, name)
+            return None
+        if not isinstance(node, Binnode):
+            return None
+        op = node.op.type
+        if op == MOD:
+            right = node.right
+            if isinstance(right, Numnode) and right.type == INT_C and right.value > 0:
+                return (0, right.value - 1, None)
+            return None
+        left = self.interval(node.left, env, depth + 1)
+        right = self.interval(node.right, env, depth + 1)
+        if left == None or right == None:
+            return None
+        if op == PLUS:
+            if left[2] != None and right[2] != None:
+                left = self.absolute(left)
+            if left[2] == None:
+                left, right = right, left
+            lo = None if left[0] == None or right[0] == None else left[0] + right[0]
+            if left[1] == None or right[1] == None:
+                return (lo, None, None)
+            return (lo, left[1] + right[1], left[2])
+        if op == MIN:
+            right = self.absolute(right)
+            lo = None if left[0] == None or right[1] == None else left[0] - right[1]
+            if left[1] == None or right[0] == None:
+                return (lo, None, None)
+            return (lo, left[1] - right[0], left[2])
+        if op == MUL:
+            left, right = self.absolute(left), self.absolute(right)
+            if None in left[:2] or None in right[:2]:
+                return None
+            products = [a * b for a in left[:2] for b in right[:2]]
+            return (min(products), max(products), None)
+        return None
+
+    def safe(self, node, env):
+        interval = self.interval(node.idx, env)
+        if interval == None or interval[0] == None or interval[0] < 0:
+            return False
+        if interval[2] == node.var_name:
+            return interval[1] <= -1
+        hi = self.absolute(interval)[1]
+        return hi != None and node.var_name in self.lengths and hi < self.lengths[node.var_name][0]
+
+    def loop_variable(self, loop, env):
+        # (var, step, interval of var where the body starts), None when the
+        # loop's variable is not bounded that way
+        decl, cond, inc = loop.decl, loop.cond, loop.inc
+        if not isinstance(decl, VarAssignNode) or decl.var_type != INT_T:
+            return None  # a byte would wrap around
+        var = decl.var_name
+        if not (isinstance(inc, VarAssignNode) and inc.var_type == None and inc.var_name == var):
+            return None
+        step = loop_offset(inc.value_node, var)
+        if not step or not isinstance(cond, Binnode) or cond.op.type not in COMPARISONS:
+            return None
+        if isinstance(cond.left, VarNode) and cond.left.var_name == var:
+            op, bound = cond.op.type, cond.right
+        elif isinstance(cond.right, VarNode) and cond.right.var_name == var:
+            op, bound = FLIPPED_COMPARISONS[cond.op.type], cond.left
+        else:
+            return None
+        if (step > 0) != (op in (COMP_LT, COMP_LTE)):
+            return None
+        rebound = rebound_names(loop.expressions)
+        effects = Effects([bound])
+        if var in rebound or var in effects.reads or effects.reads & rebound or effects.impure:
+            return None
+        first = self.interval(decl.value_node, env)
+        limit = self.interval(bound, env)
+        if first == None or limit == None:
+            return None
+        if step > 0:
+            lo = first[0]
+            hi = None if limit[1] == None else limit[1] - (op == COMP_LT)
+            interval = (lo, hi, limit[2])
+        else:
+            lo = None if limit[0] == None else limit[0] + (op == COMP_GT)
+            interval = (lo, first[1], first[2])
+        if interval[2] in rebound:
+            interval = self.absolute(interval)
+        return var, step, interval
+
+    def prove(self, tree_list):
+        # Sets `safe` on every element access; True if any changed
+        changed = False
+        stack = [(node, {}) for node in tree_list]
+        while stack:
+            node, env = stack.pop()
+            if node.__class__ in (arrayvalnode, arraysingularassignnode):
+                safe = self.safe(node, env)
+                changed = changed or safe != node.safe
+                node.safe = safe
+            if node.__class__ is not Fornode:
+                stack.extend((child, env) for child in children(node))
+                continue
+            stack.extend((child, env) for child in (node.decl, node.cond, node.inc))
+            variable = self.loop_variable(node, env)
+            for j, statement in enumerate(node.expressions):
+                inner = env
+                if variable != None:
+                    var, step, (lo, hi, rel) = variable
+                    shift = j * step
+                    inner = dict(env)
+                    inner[var] = (None if lo == None else lo + shift,
+                                  None if hi == None else hi + shift, rel)
+                stack.append((statement, inner))
+        return changed
+
+def prove_bounds(tree_list):
+    # Marks the element accesses of a parsed program that cannot be out of
+    # range. Statements whose marks changed (a re-parse by --watch) give up
+    # the loops compiled with the old ones.
+    prover = BoundsProver(tree_list)
+    for statement in tree_list:
+        if prover.prove([statement]):
+            for node in walk(statement):
+                if isinstance(node, (Whilenode, Fornode)):
+                    node.hits = 0
+                    node.compiled = None
+
+#######################################
+# ASYNC EXECUTION
+#######################################
+
+# run_async runs a program as a coroutine. Statements are executed by
+# generators that hand control back to the event loop every
+# async_yield_every loop iterations and whenever take() needs input that
+# has not arrived yet; statements without loops run on the normal visitors.
+async_yield_every = 1000
+
+YIELD = 'yield'
+NEED_INPUT = 'need input'
+
+class NeedInput(Exception):
+    pass
+
+class AsyncInputStream(InputStream):
+    # Input fed from an asyncio StreamReader. A read past the bytes received
+    # so far raises NeedInput; the statement is rewound to its mark and run
+    # again once more data has arrived.
+    def __init__(self, reader):
+        self.reader = reader
+        self.buf = b''
+        self.pos = 0
+        self.offset = 0
+        self.exhausted = reader == None
+        self.hit_eof = False
+        self.pending = []
+        self.mark_pos = 0
+        self.mark_eof = False
+
+    def fill(self):
+        if self.pending:
+            # keep everything from the mark so the statement can be rewound
+            self.buf = self.buf[self.mark_pos:] + b''.join(self.pending)
+            self.offset += self.mark_pos
+            self.pos -= self.mark_pos
+            self.mark_pos = 0
+            self.pending = []
+            return True
+        if self.exhausted:
+            return False
+        raise NeedInput()
+
+    def mark(self):
+        self.mark_pos = self.pos
+        self.mark_eof = self.hit_eof
+
+    def rewind(self):
+        self.pos = self.mark_pos
+        self.hit_eof = self.mark_eof
+
+    async def receive(self):
+        chunk = await self.reader.read(INPUT_BUFSIZE)
+        if chunk:
+            self.pending.append(chunk)
+        else:
+            self.exhausted = True
+
+class AsyncOutput:
+    # give() output for an asyncio StreamWriter; drained at every yield
+    def __init__(self, writer):
+        self.writer = writer
+
+    def write(self, text):
+        self.writer.write(text.encode())
+
+    def flush(self):
+        pass
+
+class Runtime:
+    # The interpreter state that lives in module globals, swapped in while
+    # a coroutine runs and swapped back out when it yields.
+    def __init__(self, input_stream, output_stream, table=None):
+        self.state = (SymbolTable() if table == None else table, input_stream, output_stream, None)
+
+    def enter(self):
+        global symbol_table, input_stream, output_stream, mem_tracker
+        saved = (symbol_table, input_stream, output_stream, mem_tracker)
+        symbol_table, input_stream, output_stream, mem_tracker = self.state
+        return saved
+
+    def leave(self, saved):
+        global symbol_table, input_stream, output_stream, mem_tracker
+        self.state = (symbol_table, input_stream, output_stream, mem_tracker)
+        symbol_table, input_stream, output_stream, mem_tracker = saved
+
+def has_loop(node):
+    return any(isinstance(n, (Whilenode, Fornode)) for n in walk(node))
+
+def reads_input(node):
+    return any(isinstance(n, takenode) for n in walk(node))
+
+def async_step(statement):
+    # (statement, runs as a generator, reads input). Compound statements that
+    # read input run as generators too, so that a take() waiting for input
+    # rewinds only its own statement and not the ones already run before it.
+    reads = reads_input(statement)
+    nested = reads and isinstance(statement, (blocknode, Ifnode))
+    return (statement, nested or has_loop(statement), reads)
+
+class AsyncInterpreter(Interpreter):
+    def __init__(self, stream, yield_every):
+        super().__init__(None)
+        self.stream = stream
+        self.yield_every = yield_every
+        self.budget = yield_every
+        # keyed by id(); the key object is kept in the value so the id
+        # cannot be reused while this interpreter is alive
+        self.plans = {}
+        self.loops = {}
+        self.runners = {
+            blocknode: self.run_blocknode,
+            Ifnode: self.run_Ifnode,
+            Whilenode: self.run_loop,
+            Fornode: self.run_loop,
+            hoistscopenode: self.run_hoistscopenode,
+        }
+
+    def plan(self, statements):
+        # async_step() of every statement in a list
+        entry = self.plans.get(id(statements))
+        if entry == None:
+            entry = self.plans[id(statements)] = (statements, [async_step(s) for s in statements])
+        return entry[1]
+
+    def step(self, node):
+        entry = self.plans.get(id(node))
+        if entry == None:
+            entry = self.plans[id(node)] = (node, async_step(node))
+        return entry[1]
+
+    def attempt(self, fn, *args):
+        while True:
+            self.stream.mark()
+            try:
+                return fn(*args)
+            except NeedInput:
+                self.stream.rewind()
+                yield NEED_INPUT
+
+    def run(self, node):
+        node, loops, reads = self.step(node)
+        if loops:
+            yield from self.runners[node.__class__](node)
+        elif reads:
+            yield from self.attempt(self.visit, node)
+        else:
+            self.visit(node)
+
+    def run_list(self, statements):
+        for statement, loops, reads in self.plan(statements):
+            if loops:
+                yield from self.runners[statement.__class__](statement)
+            elif reads:
+                yield from self.attempt(self.visit, statement)
+            else:
+                self.visit(statement)
+
+    def run_blocknode(self, node):
+        keys = set(symbol_table.symbols)
+        yield from self.run_list(node.statements)
+        drop_new_symbols(keys)
+
+    def run_Ifnode(self, node):
+        j = 0
+        for condition, cases in node.cases:
+            if (yield from self.run_expr(condition)) == True:
+                j = 1
+                yield from self.run_list(cases)
+        if node.elsecase and j == 0:
+            yield from self.run_list(node.elsecase)
+
+    def run_hoistscopenode(self, node):
+        for hoisted in node.hoisted:
+            hoisted.valid = False
+        yield from self.run(node.loop)
+
+    def run_expr(self, node):
+        if self.step(node)[2]:
+            return (yield from self.attempt(self.visit, node))
+        return self.visit(node)
+
+    def run_loop(self, node):
+        keys = set(symbol_table.symbols)
+        if isinstance(node, Fornode):
+            yield from self.run(node.decl)
+            condition = node.cond
+        else:
+            condition = node.condition
+        entry = self.loops.get(id(node))
+        if entry != None:
+            loop = entry[1]()
+        elif tier_threshold and node.hits >= tier_threshold:
+            loop = self.promote(node)
+        else:
+            loop = self.walk_loop(node, condition)
+        yield from loop
+        drop_new_symbols(keys)
+
+    def body_plan(self, node):
+        # a for loop runs its increment after every body statement
+        entry = self.plans.get(id(node.expressions))
+        if entry == None:
+            statements = node.expressions
+            if isinstance(node, Fornode):
+                statements = [s for statement in statements for s in (statement, node.inc)]
+            entry = self.plans[id(node.expressions)] = (node.expressions, [self.step(s) for s in statements])
+        return entry[1]
+
+    def walk_loop(self, node, condition):
+        # tree-walker iterations, switching to compiled steps once hot
+        plan = self.body_plan(node)
+        cond_reads = self.step(condition)[2]
+        visit = self.visit
+        hits = node.hits
+        if not cond_reads and not any(loops or reads for _, loops, reads in plan):
+            statements = [statement for statement, _, _ in plan]
+            while visit(condition):
+                for statement in statements:
+                    visit(statement)
+                hits += 1
+                self.budget -= 1
+                if self.budget <= 0:
+                    self.budget = self.yield_every
+                    yield YIELD
+                if hits == tier_threshold:
+                    node.hits = hits
+                    yield from self.promote(node)
+                    return
+            node.hits = hits
+            return
+        while True:
+            if cond_reads:
+                if not (yield from self.attempt(visit, condition)):
+                    break
+            elif not visit(condition):
+                break
+            for statement, loops, reads in plan:
+                if loops:
+                    yield from self.runners[statement.__class__](statement)
+                elif reads:
+                    yield from self.attempt(visit, statement)
+                else:
+                    visit(statement)
+            hits += 1
+            self.budget -= 1
+            if self.budget <= 0:
+                self.budget = self.yield_every
+                yield YIELD
+            if hits == tier_threshold:
+                node.hits = hits
+                yield from self.promote(node)
+                return
+        node.hits = hits
+
+    def promote(self, node):
+        # Like promote_loop, but only loop-free statements are compiled; the
+        # loop itself stays a generator so that it can still yield.
+        compiler = Compiler(self)
+        condition = node.cond if isinstance(node, Fornode) else node.condition
+        cond_reads = self.step(condition)[2]
+        plan = self.body_plan(node)
+        try:
+            cond = compiler.compile(condition)
+            steps = [(statement if loops else compiler.compile(statement), loops, reads)
+                     for statement, loops, reads in plan]
+        except RecursionError:
+            return self.walk_loop(node, condition)
+        if not cond_reads and not any(loops or reads for _, loops, reads in steps):
+            body = compiler.compile_body([statement for statement, _, _ in plan]) if plan else (lambda: None)
+            def loop():
+                while cond():
+                    body()
+                    self.budget -= 1
+                    if self.budget <= 0:
+                        self.budget = self.yield_every
+                        yield YIELD
+        else:
+            def loop():
+                while (yield from self.attempt(cond)) if cond_reads else cond():
+                    for step, loops, reads in steps:
+                        if loops:
+                            yield from self.runners[step.__class__](step)
+                        elif reads:
+                            yield from self.attempt(step)
+                        else:
+                            step()
+                    self.budget -= 1
+                    if self.budget <= 0:
+                        self.budget = self.yield_every
+                        yield YIELD
+        self.loops[id(node)] = (node, loop)
+        return loop()
+
+async def run_async(tree_list, reader=None, writer=None, yield_every=None, table=None):
+    # Runs a parsed program as a coroutine. take() reads from the asyncio
+    # StreamReader `reader` (no input when None) and give() writes to the
+    # StreamWriter `writer`; without a writer the output is returned. The
+    # program's variables live in `table` (a fresh SymbolTable by default).
+    # Trees from optimize() keep per-loop state in their nodes, so
+    # concurrent runs each need their own.
+    stream = AsyncInputStream(reader)
+    out = io.StringIO() if writer == None else AsyncOutput(writer)
+    runtime = Runtime(stream, out, table)
+    interpreter = AsyncInterpreter(stream, yield_every or async_yield_every)
+
+    def program():
+        try:
+            for statement in tree_list:
+                yield from interpreter.run(statement)
+        except Exception as e:
+            print(error_report(e), file=out)
+
+    steps = program()
+    while True:
+        saved = runtime.enter()
+        try:
+            signal = next(steps, None)
+        finally:
+            runtime.leave(saved)
+        if signal == None:
+            break
+        if signal == NEED_INPUT:
+            await stream.receive()
+        elif writer != None:
+            await writer.drain()
+        else:
+            await asyncio.sleep(0)
+    if writer != None:
+        await writer.drain()
+        return None
+    return out.getvalue()
+
+#######################################
+# PARALLEL LOOPS
+#######################################
+
+# `parallel for` splits a loop's iterations into chunks that run on a pool
+# of worker processes. parse_text() only accepts a loop whose iterations
+# cannot see each other's work: the body stores nothing but array elements
+# at the loop variable plus a constant (the same constant for every store
+# into an array), reads those arrays only at that element, and takes no
+# input and gives no output. Arrays of ints, decs and bytes reach the
+# workers through shared memory; each worker copies them out once per loop
+# and writes back the elements its chunks stored. A loop that does not fit
+# when it runs (too few iterations, an array holding mixed types, a chunk
+# that failed) runs on the serial loop instead, which reports any error.
+parallel_workers = os.cpu_count() or 1
+parallel_min_iterations = 1000
+parallel_pool = None
+parallel_pool_workers = 0
+parallel_runs = 0
+
+class NotParallel(Exception):
+    def __init__(self, message, node=None):
+        super().__init__(message)
+        self.node = node
+
+class ParallelPlan:
+    def __init__(self, var, step, op, bound_left, writes, names):
+        self.var = var  # the loop variable
+        self.step = step  # what the increment adds to it
+        self.op = op  # comparison in the condition, loop variable on the left
+        self.bound_left = bound_left  # the bound is the condition's left side
+        self.writes = writes  # array -> offset from the loop variable it is stored at
+        self.names = names  # names the body reads or writes, except the loop variable
+        self.payload = None  # pickled body and increment, for the workers
+        self.key = None
+
+# comparison -> the same comparison with its sides swapped
+FLIPPED_COMPARISONS = {COMP_LT: COMP_GT, COMP_GT: COMP_LT, COMP_LTE: COMP_GTE, COMP_GTE: COMP_LTE}
+COMPARISONS = {COMP_LT: lambda a, b: a < b, COMP_LTE: lambda a, b: a <= b,
+               COMP_GT: lambda a, b: a > b, COMP_GTE: lambda a, b: a >= b}
+
+def loop_offset(node, var):
+    # c for `var`, `var + c`, `c + var` or `var - c`; None for anything else
+    if isinstance(node, VarNode) and node.var_name == var:
+        return 0
+    if isinstance(node, Binnode) and node.op.type in (PLUS, MIN):
+        left, right = node.left, node.right
+        if (isinstance(left, VarNode) and left.var_name == var
+                and isinstance(right, Numnode) and right.type == INT_C):
+            return right.value if node.op.type == PLUS else -right.value
+        if (node.op.type == PLUS and isinstance(right, VarNode) and right.var_name == var
+                and isinstance(left, Numnode) and left.type == INT_C):
+            return left.value
+    return None
+
+def parallel_plan(loop):
+    # How to split `loop` into chunks; NotParallel if its iterations may
+    # depend on each other
+    decl, cond, inc = loop.decl, loop.cond, loop.inc
+    if not isinstance(decl, VarAssignNode) or decl.var_type not in (None, INT_T):
+        raise NotParallel('the loop variable has to be an int', decl)
+    var = decl.var_name
+    step = None
+    if isinstance(inc, VarAssignNode) and inc.var_type == None and inc.var_name == var:
+        step = loop_offset(inc.value_node, var)
+    if not step:
+        raise NotParallel(f'the increment has to add a constant to {var}, as in {var} = {var} + 1', inc)
+    if not isinstance(cond, Binnode) or cond.op.type not in COMPARISONS:
+        raise NotParallel(f'the condition has to compare {var} with <, <=, > or >=', cond)
+    if isinstance(cond.left, VarNode) and cond.left.var_name == var:
+        op, bound, bound_left = cond.op.type, cond.right, False
+    elif isinstance(cond.right, VarNode) and cond.right.var_name == var:
+        op, bound, bound_left = FLIPPED_COMPARISONS[cond.op.type], cond.left, True
+    else:
+        raise NotParallel(f'the condition has to compare {var} with a bound', cond)
+    effects = Effects([bound])
+    if var in effects.reads or effects.impure:
+        raise NotParallel(f'the bound {expr_source(bound)} has to be the same on every pass', cond)
+    if (step > 0) != (op in (COMP_LT, COMP_LTE)):
+        raise NotParallel(f'{var} moves away from the bound', inc)
+    body = [node for root in loop.expressions for node in walk(root)]
+    writes = {}
+    for node in body:
+        if isinstance(node, (VarAssignNode, ArrayAssignNode, sliceassignnode)):
+            raise NotParallel(f'{expr_source(node)}: only elements at {var} plus a constant can be '
+                              f'stored in a parallel for', node)
+        elif isinstance(node, arraysingularassignnode):
+            offset = loop_offset(node.idx, var)
+            if offset == None:
+                raise NotParallel(f'{expr_source(node)}: only elements at {var} plus a constant can be '
+                                  f'stored in a parallel for', node)
+            if writes.setdefault(node.var_name, offset) != offset:
+                raise NotParallel(f'{node.var_name} is stored at more than one offset from {var}', node)
+        elif isinstance(node, (Whilenode, Fornode)):
+            raise NotParallel('a parallel for cannot contain another loop', node)
+        elif isinstance(node, givenode):
+            raise NotParallel('give() in a parallel for would print out of order', node)
+        elif isinstance(node, (takenode, eofnode, usenode)) or (
+                isinstance(node, callnode) and node.name not in PURE_BUILTINS):
+            raise NotParallel(f'{expr_source(node)} cannot run in a parallel for', node)
+    # stored arrays may only be read at the element being stored, or by len()
+    reads = body + list(walk(bound))
+    lengths = {id(node.args[0]) for node in reads if isinstance(node, callnode) and node.name == 'len'}
+    for node in reads:
+        name = getattr(node, 'var_name', None)
+        if name not in writes:
+            continue
+        if isinstance(node, arrayvalnode) and loop_offset(node.idx, var) != writes[name]:
+            raise NotParallel(f'{expr_source(node)} reads an element of {name} that another '
+                              f'iteration stores', node)
+        if isinstance(node, slicenode) or (isinstance(node, VarNode) and id(node) not in lengths):
+            raise NotParallel(f'{name} is read as a whole while the loop stores into it', node)
+    names = (Effects(loop.expressions).reads | set(writes)) - {var}
+    return ParallelPlan(var, step, op, bound_left, writes, names)
+
+def check_parallel(loops, source):
+    # Rejects, before anything runs, the parallel loops that cannot be split
+    for loop in loops:
+        try:
+            parallel_plan(loop)
+        except NotParallel as e:
+            pos = getattr(e.node, 'pos', None)
+            raise Exception(ParallelError(loop.pos if pos == None else pos, None,
+                                          str(e), source).as_string()) from None
+
+def trip_count(first, op, bound, stride):
+    # Passes through a loop testing `i op bound`, where i starts at first and
+    # moves by stride on each pass
+    test = COMPARISONS[op]
+    if not test(first, bound):
+        return 0
+    count = max(1, int((bound - first) / stride))
+    while count > 1 and not test(first + (count - 1) * stride, bound):
+        count -= 1
+    while test(first + count * stride, bound):
+        count += 1
+    return count
+
+def shared_format(value):
+    # array format an array can be shared in, None if it cannot
+    if value.__class__ is bytearray:
+        return 'B'
+    if value.__class__ is list:
+        types = set(map(type, value))
+        if types <= {int}:
+            return 'q'
+        if types == {float}:
+            return 'd'
+    return None
+
+def parallel_executor():
+    global parallel_pool, parallel_pool_workers
+    if parallel_pool != None and parallel_pool_workers != parallel_workers:
+        parallel_pool.shutdown()
+        parallel_pool = None
+    if parallel_pool == None:
+        parallel_pool = concurrent.futures.ProcessPoolExecutor(parallel_workers)
+        parallel_pool_workers = parallel_workers
+    return parallel_pool
+
+def stop_parallel():
+    global parallel_pool
+    if parallel_pool != None:
+        parallel_pool.shutdown()
+        parallel_pool = None
+
+def run_parallel(interpreter, loop):
+    # Runs a parallel for whose declaration has run on the worker pool, and
+    # leaves the loop variable as the serial loop would. False, with nothing
+    # changed, if the loop has to run serially.
+    global parallel_pool, parallel_runs
+    plan = loop.plan
+    if plan == None:
+        try:
+            plan = parallel_plan(loop)
+            plan.payload = pickle.dumps((loop.expressions, loop.inc), pickle.HIGHEST_PROTOCOL)
+            plan.key = hashlib.blake2b(plan.payload, digest_size=16).hexdigest()
+        except (NotParallel, pickle.PicklingError, TypeError, RecursionError):
+            plan = False
+        loop.plan = plan
+    # async runs and checkpoints need every iteration on their own engine
+    if plan == False or parallel_workers < 2 or mem_tracker or type(interpreter) is not Interpreter:
+        return False
+    table = symbol_table
+    first = table.get(plan.var)
+    k = len(loop.expressions)
+    try:
+        bound = interpreter.visit(loop.cond.left if plan.bound_left else loop.cond.right)
+        if first.__class__ is not int or bound.__class__ not in (int, float):
+            return False
+        count = trip_count(first, plan.op, bound, plan.step * k)
+    except Exception:
+        return False  # the serial loop reports it
+    if count < parallel_min_iterations:
+        return False
+    # the loop variable at the first and the last statement run
+    last = first + (count * k - 1) * plan.step
+    low, high = min(first, last), max(first, last)
+    values, shared, blocks, seen = {}, {}, {}, set()
+    try:
+        for name in plan.names:
+            value = table.get(name)
+            if value == None:
+                return False
+            fmt = shared_format(value)
+            if name in plan.writes:
+                offset = plan.writes[name]
+                if fmt == None or low + offset < 0 or high + offset >= len(value):
+                    return False
+            if fmt == None:
+                values[name] = (table.gettype(name), value)
+                continue
+            if id(value) in seen:
+                return False  # two names for one array
+            seen.add(id(value))
+            data = memoryview(value if fmt == 'B' else array.array(fmt, value)).cast('B')
+            block = blocks[name] = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+            block.buf[:data.nbytes] = data
+            shared[name] = (table.gettype(name), block.name, fmt, len(value))
+        parallel_runs += 1
+        run = (os.getpid(), parallel_runs)
+        chunks = min(count, parallel_workers * 4)
+        bounds = [count * n // chunks for n in range(chunks + 1)]
+        try:
+            pool = parallel_executor()
+            futures = [pool.submit(parallel_chunk, plan.key, plan.payload, run, values, shared, plan.writes,
+                                   plan.var, first, plan.step, k, bounds[n], bounds[n + 1])
+                       for n in range(chunks)]
+        except Exception:
+            return False
+        try:
+            changed = [future.result() for future in futures]
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            concurrent.futures.wait(futures)
+            if isinstance(e, concurrent.futures.process.BrokenProcessPool):
+                parallel_pool = None
+            return False
+        for name, offset in plan.writes.items():
+            value = table.get(name)
+            fmt = shared[name][2]
+            with blocks[name].buf.cast(fmt) as view:
+                part = view[low + offset:high + offset + 1]
+                value[low + offset:high + offset + 1] = part if fmt == 'B' else part.tolist()
+                part.release()
+        for parts in changed:
+            for name, (start, part) in parts.items():
+                value = table.get(name)
+                value[start:start + len(part)] = part
+    except OverflowError:
+        return False  # an int that does not fit in 64 bits
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+    table.set(plan.var, first + count * k * plan.step)
+    return True
+
+# In a worker: plan key -> compiled body, and the arrays copied out of
+# shared memory for the loop being run
+parallel_bodies = {}
+parallel_copies = {}
+
+def parallel_chunk(key, payload, run, values, shared, writes, var, first, step, k, start, stop):
+    # Runs passes [start, stop) of a parallel for in a worker and writes the
+    # elements they stored back to shared memory. Returns, by array, the
+    # stored elements the shared format cannot hold (a dec stored into an
+    # array of ints), to be copied in by the caller.
+    global symbol_table
+    body = parallel_bodies.get(key)
+    if body == None:
+        statements, inc = pickle.loads(payload)
+        compiler = Compiler(Interpreter(None))
+        hoisted = [node for root in statements + [inc] for node in walk(root) if isinstance(node, hoistnode)]
+        body = parallel_bodies[key] = ([compiler.compile(s) for s in statements], compiler.compile(inc), hoisted)
+    statements, inc, hoisted = body
+    if parallel_copies.get(None) != run:
+        parallel_copies.clear()
+        parallel_copies[None] = run
+    table = SymbolTable()
+    for name, (type_, value) in values.items():
+        table.settype(name, type_)
+        table.set(name, value)
+    blocks = {}
+    try:
+        for name, (type_, block_name, fmt, length) in shared.items():
+            value = parallel_copies.get(name)
+            if value == None:
+                block = blocks[name] = shared_memory.SharedMemory(block_name)
+                with block.buf.cast(fmt) as view:
+                    part = view[:length]
+                    value = parallel_copies[name] = bytearray(part) if fmt == 'B' else part.tolist()
+                    part.release()
+            table.settype(name, type_)
+            table.set(name, value)
+        table.settype(var, INT_T)
+        table.set(var, first + start * k * step)
+        symbol_table = table
+        for h in hoisted:
+            h.valid = False
+        for _ in range(start, stop):
+            for statement in statements:
+                statement()
+                inc()
+        first, last = first + start * k * step, first + (stop * k - 1) * step
+        low, high = min(first, last), max(first, last)
+        changed = {}
+        for name, offset in writes.items():
+            _, block_name, fmt, _ = shared[name]
+            part = parallel_copies[name][low + offset:high + offset + 1]
+            if fmt != 'B' and not set(map(type, part)) <= {int if fmt == 'q' else float}:
+                changed[name] = (low + offset, part)
+                continue
+            block = blocks.get(name)
+            if block == None:
+                block = blocks[name] = shared_memory.SharedMemory(block_name)
+            with block.buf.cast(fmt) as view:
+                view[low + offset:high + offset + 1] = part if fmt == 'B' else array.array(fmt, part)
+        return changed
+    finally:
+        for block in blocks.values():
+            block.close()
+
+#######################################
+# MODULES
+#######################################
+
+# `use "lib.wasp";` runs lib.wasp in a namespace of its own, once per run,
+# and declares the variables it declared where the use statement is; later
+# uses of it share that namespace. Modules are looked for next to the file
+# using them, then in module_path (--module-path) and WASP_PATH. A parsed
+# module is kept in memory by path and content hash, and pickled under
+# __waspcache__/ next to it, so an unchanged module is lexed and parsed once.
+
+MODULE_CACHE_DIR = '__waspcache__'
+MODULE_CACHE_MAGIC = b'WASPMOD1\n'
+
+module_path = []  # directories searched after the using file's own
+module_cache = {}  # path -> Module, the last version of each file loaded
+module_loads = collections.Counter()  # how modules were loaded: parsed, disk, memory
+_interpreter_digest = None
+
+def interpreter_digest():
+    # cached trees are only reused by the interpreter that pickled them
+    global _interpreter_digest
+    if _interpreter_digest == None:
+        with open(__file__, 'rb') as f:
+            _interpreter_digest = hashlib.blake2b(f.read(), digest_size=16).digest()
+    return _interpreter_digest
+
+class Module:
+    def __init__(self, path, key, source, tree_list):
+        self.path = path
+        self.key = key
+        self.source = source
+        self.tree_list = tree_list
+        self.signature = None  # key of it and the modules it uses, as linked
+        self.names = set()  # names it and the modules it uses declare
+        self.exports = None  # set by module_types()
+        self.contents = None
+        # its use statements and declared names, found in one walk
+        self.uses, self.declared = scan_uses(tree_list)
+
+def scan_uses(tree_list):
+    uses, declared = [], set()
+    for root in tree_list:
+        for node in walk(root):
+            if isinstance(node, usenode):
+                uses.append(node)
+            elif isinstance(node, (VarAssignNode, ArrayAssignNode)) and node.var_type != None:
+                declared.add(node.var_name)
+    return uses, declared
+
+def search_dirs(source):
+    here = os.path.dirname(source.fn) if os.path.isfile(source.fn) else os.getcwd()
+    env = os.environ.get('WASP_PATH')
+    return [here or '.'] + module_path + (env.split(os.pathsep) if env else [])
+
+def find_module(name, source):
+    for directory in search_dirs(source):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return os.path.realpath(path)
+    return None
+
+# Only these may appear in a cached tree: a cache file is read from the
+# module's directory, and unpickling anything else could run code
+TREE_BUILTINS = {'set', 'frozenset'}
+
+class TreeUnpickler(pickle.Unpickler):
+    # Node classes are pickled as __main__.X when this file runs as a
+    # script and as swaspi.X when it is imported; either means ours.
+    def find_class(self, module, name):
+        found = globals().get(name)
+        if module in ('__main__', 'swaspi', __name__) and (found in VISITORS or found is Token):
+            return found
+        if module == 'builtins' and name in TREE_BUILTINS:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f'{module}.{name} is not allowed in a cached tree')
+
+def cache_file(path, key):
+    return os.path.join(os.path.dirname(path), MODULE_CACHE_DIR, f'{os.path.basename(path)}.{key}.pickle')
+
+def read_cached_tree(path, key):
+    try:
+        with open(cache_file(path, key), 'rb') as f:
+            data = f.read()
+        if data.startswith(MODULE_CACHE_MAGIC):
+            return TreeUnpickler(io.BytesIO(data[len(MODULE_CACHE_MAGIC):])).load()
+    except Exception:
+        pass  # missing or unreadable: parse again
+    return None
+
+def write_cached_tree(path, key, tree_list):
+    try:
+        data = MODULE_CACHE_MAGIC + pickle.dumps(tree_list, pickle.HIGHEST_PROTOCOL)
+    except RecursionError:
+        return
+    target = cache_file(path, key)
+    directory = os.path.dirname(target)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp = f'{target}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, target)
+        # trees of earlier versions of the file
+        prefix = os.path.basename(path) + '.'
+        for name in os.listdir(directory):
+            rest = name[len(prefix):]
+            if (name.startswith(prefix) and rest.endswith('.pickle') and '.' not in rest[:-7]
+                    and name != os.path.basename(target)):
+                os.remove(os.path.join(directory, name))
+    except OSError:
+        pass  # not writable: parse again next time
+
+def load_module(path, stack, linked):
+    with open(path, 'r') as f:
+        text = f.read()
+    key = hashlib.blake2b(interpreter_digest() + text.encode(), digest_size=16).hexdigest()
+    module = module_cache.get(path)
+    if module != None and module.key == key:
+        module_loads['memory'] += 1
+    else:
+        source = SourceMap(text, path)
+        tree_list = read_cached_tree(path, key)
+        if tree_list == None:
+            tree_list = parse_text(text, source)
+            write_cached_tree(path, key, tree_list)
+            module_loads['parsed'] += 1
+        else:
+            module_loads['disk'] += 1
+        module = module_cache[path] = Module(path, key, source, tree_list)
+    uses = link_modules(module.uses, module.source, stack + (path,), linked)
+    signature = (key, tuple(used.signature for used in uses))
+    if signature != module.signature:
+        # a module it uses changed: its types have to be checked again
+        module.signature = signature
+        module.exports = module.contents = None
+        module.names = set(module.declared)
+        for used in uses:
+            module.names |= used.names
+        prove_bounds(module.tree_list)
+    return module
+
+def link_modules(use_nodes, source, stack=None, linked=None):
+    # Finds and loads the module of every use statement in use_nodes, and
+    # the modules those use; a module using itself, directly or not, is an
+    # error. Returns the modules used.
+    if stack == None:
+        stack = (os.path.realpath(source.fn),) if os.path.isfile(source.fn) else ()
+    if linked == None:
+        linked = {}
+    uses = []
+    for node in use_nodes:
+        path = find_module(node.path, source)
+        if path == None:
+            raise Exception(ModuleError(node.pos, None, f'cannot find module "{node.path}" '
+                                        f'(searched {", ".join(search_dirs(source))})', source).as_string())
+        if path in stack:
+            chain = ' -> '.join(os.path.basename(p) for p in stack[stack.index(path):] + (path,))
+            raise Exception(ModuleError(node.pos, None, f'import cycle: {chain}', source).as_string())
+        if path not in linked:
+            linked[path] = load_module(path, stack, linked)
+        node.module = linked[path]
+        uses.append(node.module)
+    return uses
+
+def run_module(module, modules):
+    # Runs a module's statements in a new namespace and records it in
+    # `modules`, the namespaces of this run
+    global symbol_table, source_map
+    outer = symbol_table, source_map
+    namespace = SymbolTable()
+    namespace.modules = modules
+    symbol_table, source_map = namespace, module.source
+    interpreter = Interpreter(None)
+    try:
+        for statement in module.tree_list:
+            interpreter.visit(statement)
+    finally:
+        symbol_table, source_map = outer
+    modules[module.path] = namespace
+    return namespace
+
+#######################################
+# SAMPLING PROFILER
+#######################################
+
+# --sample-profile FILE samples the running program every --sample-interval
+# milliseconds of CPU time. Nothing is recorded between samples: the SIGPROF
+# handler walks the Python stack and keeps the frames that hold a loop, if,
+# block or module node in a local named `node`. The tree-walker's visit_*
+# methods, the async and checkpointing runners and the compiled closures
+# all do, so every engine is covered. Samples are written as folded stacks,
+# one line per distinct stack with its count
+#     <program>;while loop prog.wasp:3;if prog.wasp:5 42
+# which is the input of flamegraph.pl, inferno and speedscope.
+SAMPLE_INTERVAL_MS = 1.0
+
+class SampleProfiler:
+    def __init__(self, interval_ms=SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.counts = collections.Counter()  # tuple of nodes, outermost first -> samples
+        self.samples = 0
+        self.has_node = {}  # code object -> whether its frames can hold `node`
+        self.previous = None
+
+    def start(self):
+        self.previous = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous or signal.SIG_DFL)
+
+    def sample(self, signum, frame):
+        nodes = []
+        has_node = self.has_node
+        while frame != None:
+            code = frame.f_code
+            found = has_node.get(code)
+            if found == None:
+                found = has_node[code] = ('node' in code.co_varnames or 'node' in code.co_freevars
+                                          or 'node' in code.co_cellvars)
+            if found:
+                node = frame.f_locals.get('node')
+                # visit() and the visit_* method it calls hold the same node
+                if node.__class__ in CONTEXT_NAMES and not (nodes and nodes[-1] is node):
+                    nodes.append(node)
+            frame = frame.f_back
+        nodes.reverse()
+        self.counts[tuple(nodes)] += 1
+        self.samples += 1
+
+    def folded(self, source):
+        # 'frame;frame;... count' lines, heaviest first
+        stacks = collections.Counter()
+        for nodes, count in self.counts.items():
+            names = ['<program>']
+            where = source
+            for node in nodes:
+                name = CONTEXT_NAMES[node.__class__]
+                if node.pos != None and where != None:
+                    name += f' {os.path.basename(where.fn)}:{where.line_col(node.pos)[0]}'
+                names.append(name.replace(';', ','))
+                if node.__class__ is usenode and node.module != None:
+                    where = node.module.source
+            stacks[';'.join(names)] += count
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+    def write(self, path, source):
+        with open(path, 'w') as f:
+            f.write(self.folded(source))
+
+#######################################
+# WATCH
+#######################################
+
+# Top-level statements end at a ';' outside any brackets and strings.
+_STATEMENT_SCAN = re.compile(r'"[^"]*(?:"|$)|[;(){}\[\]]')
+
+def split_statements(text):
+    spans = []
+    depth = 0
+    start = 0
+    for m in _STATEMENT_SCAN.finditer(text):
+        c = m.group()
+        if c in '({[':
+            depth += 1
+        elif c in ')}]':
+            depth -= 1
+        elif c == ';' and depth == 0:
+            spans.append((start, m.end()))
+            start = m.end()
+    if text[start:].strip():
+        spans.append((start, len(text)))
+    return spans
+
+class IncrementalParser:
+    # Caches the AST of every top-level statement by the hash of its source
+    # text, so a re-parse only lexes and parses the statements that changed.
+    def __init__(self):
+        self.cache = {}
+        self.reused = 0
+        self.parsed = 0
+
+    def parse(self, text, source=None):
+        source = source or SourceMap(text)
+        cache = {}
+        tree_list = []
+        self.reused = self.parsed = 0
+        for start, end in split_statements(text):
+            piece = text[start:end]
+            start += len(piece) - len(piece.lstrip())
+            piece = piece.strip()
+            key = hashlib.blake2b(piece.encode(), digest_size=16).digest()
+            # a statement repeated in the file gets a tree of its own
+            entry = self.cache.get(key) if key not in cache else None
+            if entry == None:
+                nodes = parse_text(piece, source, start, whole=True)
+                self.parsed += 1
+            else:
+                nodes, parsed_at = entry
+                if parsed_at != start:
+                    shift_positions(nodes, start - parsed_at)
+                self.reused += 1
+            cache[key] = (nodes, start)
+            tree_list.extend(nodes)
+        # only statements still present in the file stay cached
+        self.cache = cache
+        # modules are looked up again: they may have changed too
+        link_modules(scan_uses(tree_list)[0], source)
+        prove_bounds(tree_list)
+        return tree_list
+
+def shift_positions(tree_list, delta):
+    # a cached statement that moved within the file
+    for statement in tree_list:
+        for node in walk(statement):
+            if getattr(node, 'pos', None) != None:
+                node.pos += delta
+
+def watch(path, run, interval=0.25):
+    global source_map
+    incremental = IncrementalParser()
+    last = None
+    try:
+        while True:
+            try:
+                st = os.stat(path)
+                stamp = (st.st_mtime_ns, st.st_size)
+            except FileNotFoundError:
+                stamp = None
+            if stamp != None and stamp != last:
+                last = stamp
+                text = open(path, 'r').read()
+                started = time.perf_counter()
+                source_map = SourceMap(text, path)
+                try:
+                    tree_list = incremental.parse(text, source_map)
+                except Exception as e:
+                    print(f"Error: {e}")
+                    tree_list = None
+                parsed = time.perf_counter()
+                total = incremental.parsed + incremental.reused
+                print(f'[watch] {path}: parsed {incremental.parsed} of {total} statements '
+                      f'in {(parsed - started) * 1000:.1f} ms', file=sys.stderr)
+                if tree_list != None:
+                    run(tree_list)
+                    print(f'[watch] ran in {(time.perf_counter() - parsed) * 1000:.1f} ms',
+                          file=sys.stderr)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+#######################################
+# CHECKPOINT
+#######################################
+
+# --checkpoint-every runs the program on CheckpointInterpreter, which keeps
+# an explicit stack of frames (which statement of each enclosing block, if
+# or loop is running) so that at a loop back-edge the whole execution state
+# can be written out and later resumed with --resume. give() output is
+# buffered and written to stdout just before each snapshot, so output after
+# the last snapshot is produced again, once, by the resumed run.
+
+CHECKPOINT_MAGIC = b'WASPCKPT1\n'
+CHECKPOINT_CHECK_EVERY = 256  # back-edges between clock reads
+
+def pack_value(value, memo):
+    # int arrays are stored as machine words, everything else as is. An
+    # array a module shares with the program is packed once (memo: id of
+    # the list -> packed), so it is still shared when unpacked.
+    if value.__class__ is list:
+        packed = memo.get(id(value))
+        if packed == None:
+            packed = value
+            # array('q') would turn bools into ints
+            if set(map(type, value)) <= {int}:
+                try:
+                    packed = array.array('q', value)
+                except OverflowError:
+                    pass
+            memo[id(value)] = packed
+        return packed
+    return value
+
+def unpack_value(value, memo):
+    # memo: id of the packed array -> list
+    if value.__class__ is array.array:
+        unpacked = memo.get(id(value))
+        if unpacked == None:
+            unpacked = memo[id(value)] = value.tolist()
+        return unpacked
+    return value
+
+def pack_table(table, memo):
+    return ({name: pack_value(value, memo) for name, value in table.symbols.items()},
+            dict(table.types), dict(table.imported))
+
+def unpack_table(packed, memo, modules):
+    symbols, types, imported = packed
+    table = SymbolTable()
+    table.symbols = {name: unpack_value(value, memo) for name, value in symbols.items()}
+    table.types = dict(types)
+    table.imported = dict(imported)
+    table.modules = modules
+    return table
+
+# What the -O nodes remember between evaluations; a resumed run restores it
+# into the same nodes of the program optimized again
+OPTIMIZER_STATE = {
+    hoistnode: ('valid', 'value'),
+    csedefnode: ('value',),
+}
+
+def optimizer_nodes(tree_list):
+    return [node for root in tree_list for node in walk(root) if node.__class__ in OPTIMIZER_STATE]
+
+class Checkpointer:
+    def __init__(self, path, every, key):
+        self.path = path
+        self.every = every
+        self.key = key
+        self.output = io.StringIO()
+        self.due = time.perf_counter() + every if every else None
+        self.saved = 0
+        self.last_size = 0
+        self.last_ms = 0.0
+        self.nodes = []  # optimizer_nodes() of the program being run
+
+    def snapshot(self, frames):
+        stream = input_stream
+        memo = {}
+        return {
+            'program': self.key,
+            'table': pack_table(symbol_table, memo),
+            # namespaces of the modules run so far, so a resumed run does
+            # not run them again
+            'modules': {path: pack_table(namespace, memo) for path, namespace in symbol_table.modules.items()},
+            'frames': copy.deepcopy(frames),
+            'input': None if stream == None else (stream.tell(), stream.hit_eof),
+            'nodes': [tuple(getattr(node, field) for field in OPTIMIZER_STATE[node.__class__])
+                      for node in self.nodes],
+        }
+
+    def save(self, frames):
+        started = time.perf_counter()
+        self.flush()
+        data = CHECKPOINT_MAGIC + zlib.compress(
+            pickle.dumps(self.snapshot(frames), protocol=pickle.HIGHEST_PROTOCOL), 1)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.saved += 1
+        self.last_size = len(data)
+        self.last_ms = (time.perf_counter() - started) * 1000
+        if self.every:
+            self.due = time.perf_counter() + self.every
+
+    def flush(self):
+        sys.stdout.write(self.output.getvalue())
+        sys.stdout.flush()
+        self.output.seek(0)
+        self.output.truncate()
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(CHECKPOINT_MAGIC):
+        raise Exception(f'{path} is not a checkpoint')
+    return pickle.loads(zlib.decompress(data[len(CHECKPOINT_MAGIC):]))
+
+class CheckpointInterpreter(Interpreter):
+    # Frames are small lists: ['top', statement], ['block', statement, names],
+    # ['if', case, statement, taken], ['while'|'for', statement, names, hits].
+    # `names` are the variables that existed when the scope was entered.
+    def __init__(self, checkpointer, resume=()):
+        super().__init__(None)
+        self.checkpointer = checkpointer
+        self.frames = []
+        self.resume = list(resume)
+        self.countdown = CHECKPOINT_CHECK_EVERY
+        self.compiled = {}
+
+    def restore(self):
+        if self.resume:
+            return self.resume.pop(0)
+        return None
+
+    def back_edge(self):
+        self.countdown -= 1
+        if self.countdown <= 0:
+            self.countdown = CHECKPOINT_CHECK_EVERY
+            due = self.checkpointer.due
+            if due != None and time.perf_counter() >= due:
+                self.checkpointer.save(self.frames)
+
+    def run_body(self, statements, frame, start, slot, inc=None):
+        for k in range(start, len(statements)):
+            frame[slot] = k
+            self.visit(statements[k])
+            if inc != None:
+                self.visit(inc)
+        frame[slot] = 0
+
+    def run_top(self, tree_list, start=0):
+        frame = ['top', start]
+        self.frames.append(frame)
+        for k in range(start, len(tree_list)):
+            frame[1] = k
+            self.visit(tree_list[k])
+        self.frames.pop()
+
+    def visit_blocknode(self, node):
+        frame = self.restore()
+        if frame == None:
+            frame = ['block', 0, sorted(symbol_table.symbols)]
+        self.frames.append(frame)
+        self.run_body(node.statements, frame, frame[1], 1)
+        self.frames.pop()
+        drop_new_symbols(set(frame[2]))
+
+    def visit_Ifnode(self, node):
+        frame = self.restore()
+        resumed = None
+        if frame == None:
+            frame = ['if', 0, 0, 0]
+        else:
+            resumed = frame[1]
+        self.frames.append(frame)
+        for case in range(frame[1], len(node.cases)):
+            frame[1] = case
+            condition, body = node.cases[case]
+            if case == resumed:
+                self.run_body(body, frame, frame[2], 2)
+            elif self.visit(condition) == True:
+                frame[3] = 1
+                self.run_body(body, frame, 0, 2)
+        if node.elsecase and frame[3] == 0:
+            start = frame[2] if resumed == len(node.cases) else 0
+            frame[1] = len(node.cases)
+            self.run_body(node.elsecase, frame, start, 2)
+        self.frames.pop()
+
+    def visit_Whilenode(self, node):
+        self.run_loop(node, 'while', node.condition, None)
+
+    def visit_Fornode(self, node):
+        self.run_loop(node, 'for', node.cond, node.inc)
+
+    def run_loop(self, node, kind, condition, inc):
+        frame = self.restore()
+        if frame == None:
+            frame = [kind, 0, sorted(symbol_table.symbols), 0]
+            if inc != None:
+                self.visit(node.decl)
+        self.frames.append(frame)
+        statements = node.expressions
+        if self.resume:
+            # resuming inside a statement of this iteration
+            self.run_body(statements, frame, frame[1], 1, inc)
+            frame[3] += 1
+            self.back_edge()
+        compiled = self.compiled.get(id(node), (node, None))[1]
+        while compiled == None:
+            if not self.visit(condition):
+                break
+            self.run_body(statements, frame, 0, 1, inc)
+            frame[3] += 1
+            self.back_edge()
+            if tier_threshold and frame[3] >= tier_threshold and id(node) not in self.compiled:
+                compiled = self.promote(node, condition, inc)
+        if compiled != None:
+            cond, body = compiled
+            while cond():
+                body()
+                frame[3] += 1
+                self.back_edge()
+        self.frames.pop()
+        drop_new_symbols(set(frame[2]))
+
+    def promote(self, node, condition, inc):
+        # Bodies without nested loops are compiled; the loop itself stays
+        # here so that it still reaches back_edge every iteration.
+        compiled = None
+        if not any(has_loop(statement) for statement in node.expressions):
+            statements = node.expressions
+            if inc != None:
+                statements = [s for statement in statements for s in (statement, inc)]
+            compiler = Compiler(self)
+            try:
+                compiled = (compiler.compile(condition),
+                            compiler.compile_body(statements) if statements else (lambda: None))
+            except RecursionError:
+                pass
+        self.compiled[id(node)] = (node, compiled)
+        return compiled
+
+def run_checkpointed(tree_list, checkpointer, snapshot=None):
+    global symbol_table, output_stream
+    interpreter = CheckpointInterpreter(checkpointer)
+    checkpointer.nodes = optimizer_nodes(tree_list)
+    start = 0
+    if snapshot != None:
+        if snapshot['program'] != checkpointer.key:
+            raise Exception('checkpoint was taken from a different program or with different flags')
+        memo, modules = {}, {}
+        symbol_table = unpack_table(snapshot['table'], memo, modules)
+        for path, packed in snapshot['modules'].items():
+            modules[path] = unpack_table(packed, memo, modules)
+        for node, state in zip(checkpointer.nodes, snapshot['nodes']):
+            for field, value in zip(OPTIMIZER_STATE[node.__class__], state):
+                setattr(node, field, value)
+        frames = snapshot['frames']
+        start = frames[0][1]
+        interpreter.resume = frames[1:]
+    output_stream = checkpointer.output
+    try:
+        interpreter.run_top(tree_list, start)
+        return True
+    except Exception as e:
+        print(error_report(e), file=output_stream)
+        return False
+    finally:
+        output_stream = None
+        checkpointer.flush()
+
+#######################################
+# SERVE
+#######################################
+
+# `swaspi.py serve` answers JSON-lines requests on a Unix socket or a
+# localhost TCP port. A request is
+#   {"source": "...", "input": "...", "optimize": false, "run": true}
+# or {"program": "<hash>", ...} to re-run a program sent earlier. Programs run
+# on a pool of pre-forked worker processes, each of which keeps its parsed
+# (and, once loops get hot, compiled) programs in an LRU cache by hash.
+
+class ProgramCache:
+    def __init__(self, size):
+        self.size = size
+        self.entries = collections.OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry != None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+def program_key(source):
+    return hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+
+worker_programs = None
+
+def serve_worker_init(cache_size, threshold):
+    global worker_programs, tier_threshold, parallel_workers
+    worker_programs = ProgramCache(cache_size)
+    tier_threshold = threshold
+    parallel_workers = 1  # the server already runs a worker per CPU
+    # warm up the interpreter paths
+    serve_execute(program_key('give(0);'), 'give(0);', b'', False, True)
+
+def serve_execute(key, source, data, optimize_tree, run):
+    global symbol_table, input_stream, output_stream
+    started = time.perf_counter()
+    result = {'output': '', 'error': None, 'cached': True}
+    tree_list = worker_programs.get((key, optimize_tree))
+    try:
+        if tree_list == None:
+            result['cached'] = False
+            tree_list = parse_program(source)
+            typecheck(tree_list, SourceMap(source))
+            if optimize_tree:
+                tree_list, _ = optimize(tree_list)
+            worker_programs.put((key, optimize_tree), tree_list)
+    except Exception as e:
+        result['error'] = str(e)
+        run = False
+    parsed = time.perf_counter()
+    if run:
+        symbol_table = SymbolTable()
+        input_stream = InputStream(io.BytesIO(data))
+        output_stream = io.StringIO()
+        try:
+            for statement in tree_list:
+                Interpreter(statement).interpret()
+        except Exception as e:
+            result['error'] = str(e)
+            if getattr(e, 'wasp_pos', None) != None:
+                result['line'], result['column'] = SourceMap(source).line_col(e.wasp_pos)
+        finally:
+            result['output'] = output_stream.getvalue()
+            input_stream = output_stream = None
+    result['parse_ms'] = (parsed - started) * 1000
+    result['run_ms'] = (time.perf_counter() - parsed) * 1000
+    return result
+
+async def serve_request(request, pool, sources):
+    if not isinstance(request, dict):
+        return {'ok': False, 'error': 'request must be a JSON object'}
+    source = request.get('source')
+    if source != None:
+        if not isinstance(source, str):
+            return {'ok': False, 'error': 'source must be a string'}
+        key = program_key(source)
+        sources.put(key, source)
+    else:
+        key = request.get('program')
+        if not isinstance(key, str):
+            return {'ok': False, 'error': 'request needs a source or a program hash string'}
+        source = sources.get(key)
+        if source == None:
+            return {'ok': False, 'error': f'unknown program {key}'}
+    started = time.perf_counter()
+    result = await asyncio.get_running_loop().run_in_executor(
+        pool, serve_execute, key, source, str(request.get('input', '')).encode(),
+        bool(request.get('optimize')), request.get('run', True) != False)
+    result['ok'] = result['error'] == None
+    result['program'] = key
+    result['total_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+async def serve_connection(reader, writer, pool, sources):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                response = await serve_request(json.loads(line), pool, sources)
+            except ValueError as e:
+                response = {'ok': False, 'error': f'bad request: {e}'}
+            except Exception as e:
+                # one bad request must not end the connection
+                response = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(socket_path=None, host='127.0.0.1', port=7878, workers=None, cache_size=128):
+    workers = workers or os.cpu_count() or 1
+    pool = concurrent.futures.ProcessPoolExecutor(
+        workers, initializer=serve_worker_init, initargs=(cache_size, tier_threshold))
+    try:
+        # start every worker now instead of on the first requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(pool, time.sleep, 0.05) for _ in range(workers)))
+        sources = ProgramCache(cache_size)
+        handler = lambda reader, writer: serve_connection(reader, writer, pool, sources)
+        if socket_path != None:
+            server = await asyncio.start_unix_server(handler, socket_path)
+            where = socket_path
+        else:
+            server = await asyncio.start_server(handler, host, port)
+            where = f'{host}:{port}'
+        print(f'[serve] listening on {where} with {workers} worker(s)', file=sys.stderr, flush=True)
+        stop = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+        async with server:
+            await stop.wait()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def serve_main(argv):
+    global tier_threshold
+    parser = argparse.ArgumentParser(
+        prog='swaspi.py serve',
+        description='Run WASP programs sent as JSON lines on a pool of warm workers'
+    )
+    parser.add_argument('--socket', help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP address (default %(default)s)')
+    parser.add_argument('--port', type=int, default=7878, help='TCP port (default %(default)s)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--cache-size', type=int, default=128,
+                        help='Programs kept per worker and on the server (default %(default)s)')
+    parser.add_argument('--tier-threshold', type=int, default=tier_threshold,
+                        help='Loop iterations before a loop is compiled (default %(default)s)')
+    args = parser.parse_args(argv)
+    tier_threshold = args.tier_threshold
+    try:
+        asyncio.run(serve(args.socket, args.host, args.port, args.workers, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.socket != None and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+#######################################
+# RESULT CACHE
+#######################################
+
+# --cache-results DIR keeps what a run printed and its exit status, keyed by
+# the program, the modules it uses, its input (when it reads any), the
+# interpreter and the flags. A program run again on the same input prints
+# the stored output without running. Entries are files, evicted least
+# recently used first once they hold more than --cache-results-size bytes.
+
+RESULT_CACHE_SIZE = 64 * 1024 * 1024
+RESULT_CACHE_SUFFIX = '.result'
+
+class TeeOutput:
+    # stdout that also keeps a copy of what was written
+    def __init__(self, stream):
+        self.stream = stream
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def getvalue(self):
+        return ''.join(self.parts)
+
+def used_modules(tree_list):
+    # every module a program uses, directly or through other modules
+    found = {}
+    stack = list(scan_uses(tree_list)[0])
+    while stack:
+        module = stack.pop().module
+        if module != None and module.path not in found:
+            found[module.path] = module
+            stack.extend(module.uses)
+    return [found[path] for path in sorted(found)]
+
+def result_inputs(tree_list):
+    # (reads input, why the results cannot be cached or None)
+    reads_input = False
+    for root in tree_list + [node for module in used_modules(tree_list) for node in module.tree_list]:
+        for node in walk(root):
+            if isinstance(node, (takenode, eofnode)):
+                reads_input = True
+            elif isinstance(node, callnode) and node.name == 'open_map':
+                return reads_input, 'open_map() reads a file that may change between runs'
+    return reads_input, None
+
+def result_key(path, text, tree_list, flags, data):
+    # error tracebacks in the output name the program's file, so the same
+    # text at another path is another result
+    h = hashlib.blake2b(interpreter_digest(), digest_size=16)
+    h.update(repr(flags).encode())
+    h.update(f'{os.path.realpath(path)}\0'.encode())
+    h.update(b'%d\0' % len(text.encode()) + text.encode())
+    for module in used_modules(tree_list):
+        h.update(f'{module.path}\0{module.key}\0'.encode())
+    if data != None:
+        h.update(b'input\0' + data)
+    return h.hexdigest()
+
+class ResultCache:
+    def __init__(self, directory, limit=RESULT_CACHE_SIZE):
+        self.directory = directory
+        self.limit = limit
+
+    def path(self, key):
+        return os.path.join(self.directory, key + RESULT_CACHE_SUFFIX)
+
+    def get(self, key):
+        # (status, output) or None
+        path = self.path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)  # most recently used
+            return entry['status'], entry['output']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key, status, output):
+        data = json.dumps({'status': status, 'output': output})
+        if len(data) > self.limit:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            target = self.path(key)
+            tmp = f'{target}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                f.write(data)
+            os.replace(tmp, target)
+            self.evict()
+        except OSError:
+            pass  # not writable: run again next time
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(RESULT_CACHE_SUFFIX):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.limit:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+#######################################
+# RUN
+#######################################
+
+def parse_text(text, source, base=0, whole=False):
+    # Parses `text`, which starts at offset `base` of the file `source` maps;
+    # syntax errors name their line and column. With `whole`, tokens left
+    # over after the statement list are an error too.
+    tokens, error = Lexer(text, source.fn, base).make_tokens()
+    if error:
+        error.source = source
+        raise Exception(error.as_string())
+    parser = Parser(tokens)
+    try:
+        tree_list = parser.statement_list()
+        if whole and parser.idx < len(tokens):
+            raise Exception(f"Syntax error - {parser.current_token}")
+    except Exception as e:
+        pos = parser.current_token.pos
+        if pos == None:
+            pos = base + len(text.rstrip())  # ran out of tokens
+        raise Exception(InvalidSyntaxError(pos, None, str(e), source).as_string()) from None
+    check_parallel(parser.parallel_loops, source)
+    return tree_list
+
+def parse_program(text, source=None):
+    source = source or SourceMap(text)
+    tree_list = parse_text(text, source)
+    link_modules(scan_uses(tree_list)[0], source)
+    prove_bounds(tree_list)
+    return tree_list
+
+def run_program(tree_list):
+    # False if the program stopped on an error
+    try:    
+        for i in tree_list:
+            Interpreter(i).interpret()
+    except Exception as e:
+        print(error_report(e))
+        return False
+    return True
+
+def main():
+    global _SHOULD_LOG_SCOPE, input_stream, symbol_table, tier_threshold, mem_tracker, sparse_threshold, source_map, module_path, parallel_workers
+    if sys.argv[1:2] == ['serve']:
+        serve_main(sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(
+        description='SWASPI - Simple WASP Interpreter'
+    )
+    parser.add_argument('inputfile', help='WASP source file')
+    parser.add_argument(
+        '--scope',
+        help='Print scope information',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--input',
+        help='Read take() input from this file instead of stdin',
+    )
+    parser.add_argument(
+        '--tier-threshold',
+        help='Loop iterations before a loop is compiled (0 disables, default %(default)s)',
+        type=int,
+        default=tier_threshold,
+    )
+    parser.add_argument(
+        '--tier-stats',
+        help='Report the loops promoted to compiled code on stderr',
+        action='store_true',
+    )
+    parser.add_argument(
+        '-O', '--optimize',
+        help='Hoist loop invariants, fuse induction multiplications, reuse repeated array reads '
+             'and remove dead stores and unused variables',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--explain-opt',
+        help='Optimize as -O does and list every change on stderr',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--no-typecheck',
+        help='Run without checking types first; every assignment then converts its value',
+        dest='typecheck',
+        action='store_false',
+    )
+    parser.add_argument(
+        '--module-path',
+        help='Also look for modules named in use statements in DIR (repeatable; WASP_PATH works too)',
+        action='append',
+        default=[],
+        metavar='DIR',
+    )
+    parser.add_argument(
+        '--parallel-workers',
+        help='Worker processes for parallel for loops (1 runs them serially, default: one per CPU)',
+        type=int,
+        default=parallel_workers,
+        metavar='N',
+    )
+    parser.add_argument(
+        '--sample-profile',
+        help='Sample the loops and ifs being run and write them to FILE as folded stacks (for flamegraph tools)',
+        metavar='FILE',
+    )
+    parser.add_argument(
+        '--sample-interval',
+        help='CPU milliseconds between --sample-profile samples (default %(default)s)',
+        type=float,
+        default=SAMPLE_INTERVAL_MS,
+        metavar='MS',
+    )
+    parser.add_argument(
+        '--watch',
+        help='Re-run whenever the source file changes, re-parsing only edited statements',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--checkpoint-every',
+        help='Save a snapshot of the running program every SECONDS (see --checkpoint)',
+        type=float,
+        metavar='SECONDS',
+    )
+    parser.add_argument(
+        '--checkpoint',
+        help='Snapshot file for --checkpoint-every (default: INPUTFILE.ckpt, or the --resume file)',
+        metavar='FILE',
+    )
+    parser.add_argument(
+        '--resume',
+        help='Continue the program from a snapshot written by --checkpoint-every',
+        metavar='FILE',
+    )
+    parser.add_argument(
+        '--sparse-threshold',
+        help='Arrays declared with more elements than this are allocated in pages on first write (default %(default)s)',
+        type=int,
+        default=sparse_threshold,
+    )
+    parser.add_argument(
+        '--mem-report',
+        help='Report per-variable memory, the peak and the largest variables on stderr at exit',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--mem-interval',
+        help='With --mem-report, also report every SECONDS while running',
+        type=float,
+        metavar='SECONDS',
+    )
+    parser.add_argument(
+        '--cache-results',
+        help='Replay the output and exit status of an earlier run of the same program on the same input from DIR',
+        metavar='DIR',
+    )
+    parser.add_argument(
+        '--cache-results-size',
+        help='Evict the least recently used results once DIR holds more than SIZE (default 64M)',
+        type=parse_size,
+        default=RESULT_CACHE_SIZE,
+        metavar='SIZE',
+    )
+    parser.add_argument(
+        '--max-memory',
+        help='Abort once variables hold more than SIZE bytes (suffixes K, M, G)',
+        type=parse_size,
+        metavar='SIZE',
+    )
+    args = parser.parse_args()
+    if args.cache_results and (args.watch or args.checkpoint_every or args.resume):
+        parser.error('--cache-results cannot be used with --watch, --checkpoint-every or --resume')
+    _SHOULD_LOG_SCOPE = args.scope
+    tier_threshold = args.tier_threshold
+    module_path = args.module_path
+    parallel_workers = args.parallel_workers
+    sparse_threshold = args.sparse_threshold
+
+    def run(tree_list, data=None):
+        # exit status: 1 if the program stopped on an error
+        global input_stream, symbol_table, mem_tracker
+        if args.typecheck:
+            try:
+                typecheck(tree_list)
+            except Exception as e:
+                print(f"Error: {e}")
+                return 1
+        symbol_table = SymbolTable()
+        input_stream = None
+        mem_tracker = None
+        if args.mem_report or args.max_memory != None:
+            mem_tracker = MemoryTracker(args.max_memory, args.mem_interval if args.mem_report else None)
+        if data != None:
+            input_stream = InputStream(io.BytesIO(data))
+        elif args.input:
+            input_stream = InputStream(open(args.input, 'rb', buffering=0))
+        if args.optimize or args.explain_opt:
+            tree_list, notes = optimize(tree_list)
+            if args.explain_opt:
+                for note in notes or ['nothing to change']:
+                    print(f'[opt] {note}', file=sys.stderr)
+        profiler = None
+        if args.sample_profile:
+            profiler = SampleProfiler(args.sample_interval)
+            profiler.start()
+        try:
+            if args.checkpoint_every or args.resume:
+                finished = run_resumable(tree_list)
+            else:
+                finished = run_program(tree_list)
+        finally:
+            if profiler != None:
+                profiler.stop()
+                profiler.write(args.sample_profile, source_map)
+                print(f'[profile] {profiler.samples} samples every {args.sample_interval:g} ms '
+                      f'written to {args.sample_profile}', file=sys.stderr)
+        if args.tier_stats:
+            print_tier_stats()
+        if args.mem_report:
+            mem_tracker.report('exit')
+        return 0 if finished else 1
+
+    def run_resumable(tree_list):
+        global input_stream
+        path = args.checkpoint or args.resume or args.inputfile + '.ckpt'
+        # a snapshot only fits the program run with the same flags
+        flags = (args.optimize or args.explain_opt, args.typecheck, args.sparse_threshold)
+        modules = ''.join(module.key for module in used_modules(tree_list))
+        key = program_key(repr(flags) + modules + '\0' + open(args.inputfile).read())
+        checkpointer = Checkpointer(path, args.checkpoint_every, key)
+        snapshot = None
+        if args.resume:
+            try:
+                snapshot = load_checkpoint(args.resume)
+            except (OSError, ValueError, pickle.UnpicklingError, zlib.error) as e:
+                print(f"Error: cannot resume from {args.resume}: {e}")
+                return False
+            if snapshot['input'] != None:
+                offset, hit_eof = snapshot['input']
+                input_stream = get_input_stream()
+                input_stream.skip(offset)
+                input_stream.hit_eof = hit_eof
+        finished = run_checkpointed(tree_list, checkpointer, snapshot)
+        if finished and os.path.exists(path):
+            os.remove(path)  # finished, nothing left to resume
+        if args.checkpoint_every and checkpointer.saved:
+            print(f'checkpoint: {checkpointer.saved} snapshot(s), last {checkpointer.last_size} bytes '
+                  f'in {checkpointer.last_ms:.1f} ms', file=sys.stderr)
+        return finished
+
+    def run_cached(text, tree_list):
+        reads_input, refused = result_inputs(tree_list)
+        diagnostics = [flag for flag, on in (('--tier-stats', args.tier_stats), ('--mem-report', args.mem_report),
+                                             ('--sample-profile', args.sample_profile),
+                                             ('--explain-opt', args.explain_opt), ('--scope', args.scope)) if on]
+        if refused == None and diagnostics:
+            refused = f'{diagnostics[0]} reports are not kept'
+        if refused != None:
+            print(f'[cache] not cached: {refused}', file=sys.stderr)
+            return run(tree_list)
+        data = None
+        if reads_input:
+            if args.input:
+                with open(args.input, 'rb') as f:
+                    data = f.read()
+            else:
+                data = sys.stdin.buffer.read()
+        flags = (args.optimize, args.typecheck, args.max_memory, args.sparse_threshold, args.tier_threshold)
+        key = result_key(args.inputfile, text, tree_list, flags, data)
+        cache = ResultCache(args.cache_results, args.cache_results_size)
+        entry = cache.get(key)
+        if entry != None:
+            status, output = entry
+            sys.stdout.write(output)
+            return status
+        tee = TeeOutput(sys.stdout)
+        with contextlib.redirect_stdout(tee):
+            status = run(tree_list, data)
+        cache.put(key, status, tee.getvalue())
+        return status
+
+    try:
+        if args.watch:
+            watch(args.inputfile, run)
+            return
+        text = open(args.inputfile, 'r').read()
+        source_map = SourceMap(text, args.inputfile)
+        tree_list = parse_program(text, source_map)
+        if args.cache_results:
+            status = run_cached(text, tree_list)
+        else:
+            status = run(tree_list)
+    finally:
+        stop_parallel()
+    if status:
+        sys.exit(status)
+ 
+
+if __name__ == '__main__':
+    main()